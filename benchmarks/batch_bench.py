@@ -0,0 +1,55 @@
+# ================================================================
+#   BENCHMARK : OIGNONS UN PAR UN / PAR LOTS (NUMPY)
+# ================================================================
+#   Usage :
+#   python benchmarks/batch_bench.py [nb_messages] [nb_sauts] [taille_message]
+# ================================================================
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.batch import numpy_available
+from src.common.crypto import RSAEncryption
+from src.common.onion import OnionRouter
+from src.common.wire import FORMAT_TEXT, FORMAT_BINARY
+
+
+def rate(count, fn):
+    start = time.perf_counter()
+    result = fn()
+    return count / (time.perf_counter() - start), result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    hops = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    size = int(sys.argv[3]) if len(sys.argv) > 3 else 180
+
+    chain = [f"router{i}" for i in range(1, hops + 1)]
+    keys = {name: RSAEncryption().generate_keys() for name in chain}
+    public_keys = {name: pair[0] for name, pair in keys.items()}
+    private_key = keys[chain[0]][1]
+
+    message = ("Bonjour SAE 302 ! " * (size // 18 + 1))[:size]
+    batch = [(message, "clientB", chain, public_keys)] * count
+
+    print(f"===== BENCHMARK LOTS ({count} messages de {size} octets, {hops} sauts, "
+          f"NumPy : {numpy_available()}) =====\n")
+
+    for wire_format in (FORMAT_TEXT, FORMAT_BINARY):
+        onion = OnionRouter(wire_format)
+
+        one_by_one, _ = rate(count, lambda: [onion.create_onion_message(*item) for item in batch])
+        batched, layers = rate(count, lambda: onion.create_onion_messages(batch))
+        print(f"{wire_format:7} création   : {one_by_one:9.0f} /s un par un | {batched:9.0f} /s par lot")
+
+        one_by_one, _ = rate(count, lambda: [onion.process_onion_layer(layer, private_key) for layer in layers])
+        batched, _ = rate(count, lambda: onion.process_onion_layers(layers, private_key))
+        print(f"{wire_format:7} traitement : {one_by_one:9.0f} /s un par un | {batched:9.0f} /s par lot")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# ================================================================
+#   BENCHMARK : DÉCHIFFREMENT SUR 1 CŒUR / SUR UN POOL DE PROCESSUS
+# ================================================================
+#   Usage :
+#   python benchmarks/decryption_pool_bench.py [workers] [bits_clé] [taille_message] [nb_messages]
+# ================================================================
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.crypto import RSAEncryption
+from src.common.onion import OnionRouter
+from src.common.wire import FORMAT_BINARY
+from src.router.decryption_pool import DecryptionPool
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    key_bits = int(sys.argv[2]) if len(sys.argv) > 2 else 1024
+    size = int(sys.argv[3]) if len(sys.argv) > 3 else 16384
+    count = int(sys.argv[4]) if len(sys.argv) > 4 else 50
+
+    public_key, private_key = RSAEncryption(key_bits).generate_keys()
+    onion = OnionRouter(FORMAT_BINARY)
+    message = ("Bonjour SAE 302 ! " * (size // 18 + 1))[:size]
+    layers = [onion.create_onion_message(message, "clientB", ["router1"], {"router1": public_key})
+              for _ in range(count)]
+
+    print(f"===== BENCHMARK DÉCHIFFREMENT ({count} couches de {size} octets, "
+          f"clés {key_bits} bits, {workers} workers) =====\n")
+
+    start = time.perf_counter()
+    for layer in layers:
+        onion.process_onion_layer(layer, private_key)
+    single = time.perf_counter() - start
+    print(f"1 cœur (OnionRouter)       : {count / single:8.1f} couches/s")
+
+    pool = DecryptionPool(private_key, workers)
+    try:
+        # Une couche à la fois, découpée en morceaux
+        start = time.perf_counter()
+        for layer in layers:
+            pool.process(layer)
+        chunked = time.perf_counter() - start
+        print(f"Pool, couches découpées    : {count / chunked:8.1f} couches/s  (x{single / chunked:.1f})")
+
+        # Toutes les couches en même temps, une par worker
+        start = time.perf_counter()
+        for future in [pool.submit(layer) for layer in layers]:
+            future.result()
+        spread = time.perf_counter() - start
+        print(f"Pool, couches réparties    : {count / spread:8.1f} couches/s  (x{single / spread:.1f})")
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
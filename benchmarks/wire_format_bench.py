@@ -0,0 +1,79 @@
+# ================================================================
+#   BENCHMARK : OCTETS SUR LE RÉSEAU PAR SAUT (TEXTE / BINAIRE / HYBRIDE)
+# ================================================================
+#   Usage :
+#   python benchmarks/wire_format_bench.py [nb_sauts] [taille_message] [bits_clé]
+# ================================================================
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.crypto import KEY_BITS, RSAEncryption
+from src.common.onion import OnionRouter
+from src.common.wire import FORMAT_TEXT, FORMAT_BINARY, FORMAT_HYBRID, to_bytes
+
+
+def build_network(hops, key_bits=KEY_BITS):
+    """Génère les clés d'une chaîne de 'hops' routeurs."""
+    chain = [f"router{i}" for i in range(1, hops + 1)]
+    public_keys, private_keys = {}, {}
+
+    for name in chain:
+        public_keys[name], private_keys[name] = RSAEncryption(key_bits).generate_keys()
+
+    return chain, public_keys, private_keys
+
+
+def measure(wire_format, message, chain, public_keys, private_keys):
+    """Retourne (taille envoyée à chaque saut, durée de construction)."""
+    onion = OnionRouter(wire_format)
+
+    start = time.perf_counter()
+    layer = onion.create_onion_message(message, "clientB", chain, public_keys)
+    build_time = time.perf_counter() - start
+
+    sizes = []
+    for name in chain:
+        sizes.append(len(to_bytes(layer)))
+        next_hop, layer = onion.process_onion_layer(layer, private_keys[name])
+
+    # Dernier saut : message final vers le client
+    sizes.append(len(to_bytes(layer)))
+    assert layer == message, "Le message final doit être intact"
+
+    return sizes, build_time
+
+
+def main():
+    hops = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    key_bits = int(sys.argv[3]) if len(sys.argv) > 3 else KEY_BITS
+
+    message = ("Bonjour SAE 302 ! " * (size // 18 + 1))[:size]
+    chain, public_keys, private_keys = build_network(hops, key_bits)
+
+    print(f"===== BENCHMARK FORMAT DES COUCHES ({hops} sauts, message {size} octets, "
+          f"clés {key_bits} bits) =====\n")
+
+    formats = (FORMAT_TEXT, FORMAT_BINARY, FORMAT_HYBRID)
+    results = {}
+    for wire_format in formats:
+        results[wire_format] = measure(wire_format, message, chain, public_keys, private_keys)
+
+    print(f"{'Saut (octets)':<22}" + "".join(f"{f:>12}" for f in formats))
+    labels = [f"client → {chain[0]}"]
+    labels += [f"{a} → {b}" for a, b in zip(chain, chain[1:])]
+    labels += [f"{chain[-1]} → clientB"]
+
+    for i, label in enumerate(labels):
+        print(f"{label:<22}" + "".join(f"{results[f][0][i]:>12}" for f in formats))
+
+    print(f"\n{'Total':<22}" + "".join(f"{sum(results[f][0]):>12}" for f in formats))
+    print(f"{'Construction (ms)':<22}" + "".join(f"{results[f][1] * 1000:>12.2f}" for f in formats))
+
+
+if __name__ == "__main__":
+    main()
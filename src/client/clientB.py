@@ -1,12 +1,33 @@
+import os
 import socket
 import json
-import random
-from src.common.onion import OnionRouter
+import threading
+from src.common.startup import StartupTimer
+from src.common.onion import OnionRouter, receipt_destination
+from src.common.circuit import Circuit
+from src.common.pool import LINK_HELLO, MuxLink, serve_link
+from src.common.stream import StreamReceiver, is_stream_data, send_stream
+from src.common.directory import DirectoryCache, select_path
+from src.common.wire import FORMAT_TEXT
+from src.common.framing import recv_frame, send_frame, request
 
 MASTER_IP = "192.168.200.2"
 MASTER_PORT = 9000
 LISTEN_PORT = 9100
 
+# Adresse à laquelle les routeurs de sortie nous joignent (annoncée au MASTER)
+ADVERTISED_IP = "127.0.0.1"
+
+# Format des couches : FORMAT_TEXT (historique), FORMAT_BINARY (compact)
+# ou FORMAT_HYBRID (clé de session RSA + chiffrement à flot)
+WIRE_FORMAT = FORMAT_TEXT
+
+# Circuits réutilisables : RSA une fois par circuit, pas par message
+USE_CIRCUITS = False
+
+# Fichiers reçus en flux de cellules (voir send_file)
+RECEIVE_DIR = "fichiers_recus"
+
 
 class ClientB:
     """
@@ -15,29 +36,65 @@ class ClientB:
     - peut envoyer un message vers Client A
     """
 
-    def __init__(self):
-        self.onion = OnionRouter()
+    def __init__(self, wire_format=WIRE_FORMAT, use_circuits=USE_CIRCUITS):
+        self.onion = OnionRouter(wire_format)
+
+        self.use_circuits = use_circuits
+        self.circuit = None
+        self.entry = None   # (ip, port) du premier routeur du circuit
+
+        # Copie locale de l'annuaire (MASTER contacté seulement après le TTL)
+        self.directory = DirectoryCache(self.master_request)
+
+        # Flux reçus : cellules remises dans l'ordre, écrites au fur et à mesure
+        self.streams = StreamReceiver(self.open_received_file)
 
     # ===============================
     # Récupération des routeurs
     # ===============================
-    def get_routers(self):
+    def master_request(self, req):
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
             s.connect((MASTER_IP, MASTER_PORT))
-            s.sendall(b"GET_ROUTERS")
-            resp = s.recv(8192).decode()
-        return json.loads(resp)
+            return request(s, req.encode()).decode()
+
+    def get_routers(self):
+        return self.directory.routers()
+
+    def register_to_master(self):
+        """Annonce notre adresse : les routeurs de sortie la trouvent dans l'annuaire."""
+        data = {"name": "clientB", "ip": ADVERTISED_IP, "port": LISTEN_PORT}
+        try:
+            self.master_request("REGISTER_CLIENT " + json.dumps(data))
+        except OSError as e:
+            print(f"[CLIENT B] ⚠ Enregistrement auprès du MASTER impossible : {e}")
+
+    def connect_router(self, router):
+        """Connexion à un routeur ; s'il est injoignable, l'annuaire est rafraîchi."""
+        try:
+            return socket.create_connection((router["ip"], router["port"]))
+        except OSError:
+            self.directory.refresh()
+            raise
 
     # ===============================
     # Envoi du message
     # ===============================
-    def send_message(self, message, debug=False):
+    def send_message(self, message, debug=False, receipt=False):
+        """
+        receipt=True : "RECEIPT <id>" nous revient par un oignon de retour après livraison
+        (retourne l'id de l'accusé attendu, sinon None).
+        """
+        if self.use_circuits:
+            self.send_on_circuit(message, debug)
+            return None
+
         routers = self.get_routers()
 
         if debug:
             print("[CLIENT B] Routeurs disponibles :", routers)
 
-        selected = random.sample(routers, 3)
+        # Routeurs les moins chargés favorisés (charge publiée par le MASTER)
+        selected = select_path(routers, 3)
         chain = [r["name"] for r in selected]
 
         if debug:
@@ -45,39 +102,170 @@ class ClientB:
 
         keys = {r["name"]: r["public_key"] for r in selected}
 
+        destination = "clientA"
+        receipt_id = None
+        if receipt:
+            # Oignon de retour par un autre chemin : la sortie ne voit qu'un jeton
+            # chiffré, ni notre nom ni notre adresse
+            receipt_id = os.urandom(4).hex()
+            back = select_path(routers, 3)
+            reply_onion = self.onion.create_onion_message(
+                f"RECEIPT {receipt_id}",
+                "clientB",
+                [r["name"] for r in back],
+                {r["name"]: r["public_key"] for r in back}
+            )
+            destination = receipt_destination(destination, back[0]["name"], reply_onion)
+
         onion_msg = self.onion.create_onion_message(
             message,
-            "clientA",
+            destination,
             chain,
             keys
         )
 
+        with self.connect_router(selected[0]) as s:
+            send_frame(s, onion_msg)
+
+        return receipt_id
+
+    # ===============================
+    # Circuits
+    # ===============================
+    def build_circuit(self, debug=False):
+        routers = self.get_routers()
+
+        # Routeurs les moins chargés favorisés (charge publiée par le MASTER)
+        selected = select_path(routers, 3)
+        chain = [r["name"] for r in selected]
+        keys = {r["name"]: r["public_key"] for r in selected}
+
+        circuit = Circuit(chain, keys, "clientA")
         first = selected[0]
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.connect((first["ip"], first["port"]))
-            s.sendall(onion_msg.encode())
+
+        with self.connect_router(first) as s:
+            reply = request(s, circuit.create_message())
+
+        if reply != b"OK":
+            raise ConnectionError(f"Création du circuit refusée : {reply.decode()}")
+
+        if debug:
+            print("[CLIENT B] Circuit établi :", chain)
+
+        self.circuit = circuit
+        self.entry = (first["ip"], first["port"])
+
+    def send_on_circuit(self, message, debug=False):
+        # Circuit perdu (routeur redémarré...) → une seule reconstruction
+        for attempt in range(2):
+            if self.circuit is None or self.circuit.expired:
+                self.build_circuit(debug)
+
+            try:
+                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                    s.connect(self.entry)
+                    reply = request(s, self.circuit.cell(message))
+            except OSError as e:
+                # Entrée injoignable : même traitement qu'un circuit rejeté
+                reply = str(e).encode()
+
+            if reply == b"OK":
+                return
+
+            if debug:
+                print("[CLIENT B] Circuit rejeté :", reply.decode(errors="replace"))
+            self.circuit = None
+
+        raise ConnectionError("Envoi sur circuit impossible")
+
+    def send_file(self, path, debug=False):
+        """Fichier envoyé en flux de cellules sur le circuit (mémoire constante)."""
+        if self.circuit is None or self.circuit.expired:
+            self.build_circuit(debug)
+
+        link = MuxLink(self.entry)
+        try:
+            with open(path, "rb") as f:
+                count = send_stream(link, self.circuit.stream_cells(f))
+        finally:
+            link.close()
+
+        if debug:
+            print(f"[CLIENT B] Fichier envoyé : {path} ({count} cellules)")
+        return count
 
     # ===============================
     # Réception
     # ===============================
-    def listen(self):
+    def listen(self, timer=None):
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
             s.bind(("0.0.0.0", LISTEN_PORT))
             s.listen()
             print(f"[CLIENT B] En écoute sur {LISTEN_PORT}")
+            self.register_to_master()
+
+            if timer is not None:
+                timer.mark("écoute + MASTER")
+                timer.report()
 
             while True:
-                conn, _ = s.accept()
-                msg = conn.recv(4096).decode()
+                conn, addr = s.accept()
+                try:
+                    frame = recv_frame(conn)
+
+                    # Lien persistant d'un routeur de sortie : cellules de flux
+                    if frame == LINK_HELLO:
+                        threading.Thread(target=serve_link, args=(conn, self.handle_link_message),
+                                         daemon=True).start()
+                        continue
+
+                    conn.close()
+                    if frame is None:
+                        continue
+                    msg = frame.decode()
+
+                # Un expéditeur fautif (message tronqué, non UTF-8) n'arrête pas l'écoute
+                except (OSError, UnicodeDecodeError) as e:
+                    conn.close()
+                    print(f"[CLIENT B] ❌ Message invalide de {addr[0]} : {e}")
+                    continue
+
+                if msg.startswith("RECEIPT "):
+                    print(f"✔ Accusé de réception : message {msg[8:]} livré")
+                    continue
+
                 print(f"\n📩 MESSAGE FINAL REÇU : {msg}\n")
-                conn.close()
+
+    def handle_link_message(self, frame):
+        """Message reçu sur un lien : cellule de flux → "OK" une fois écrite."""
+        if not is_stream_data(frame):
+            return b"ERREUR : cellule de flux attendue"
+
+        if self.streams.feed(frame):
+            print(f"\n📁 FICHIER REÇU : {len(self.streams.completed)} flux terminé(s) dans {RECEIVE_DIR}\n")
+        return b"OK"
+
+    def open_received_file(self, stream_id):
+        os.makedirs(RECEIVE_DIR, exist_ok=True)
+        return open(os.path.join(RECEIVE_DIR, f"flux_{stream_id.hex()}.bin"), "wb")
 
 
 # ======================================================
 # FONCTIONS PUBLIQUES (POUR GUI)
 # ======================================================
+_client = None
+
+
 def send_message(message):
-    ClientB().send_message(message)   # debug désactivé pour le GUI
+    # Client partagé : le GUI réutilise le même circuit d'un message à l'autre
+    global _client
+    if _client is None:
+        _client = ClientB()
+    _client.send_message(message)   # debug désactivé pour le GUI
+
+
+def register_to_master():
+    ClientB().register_to_master()
 
 
 def listen():
@@ -94,10 +282,13 @@ if __name__ == "__main__":
         print("Usage : python clientB.py send | listen")
         sys.exit(1)
 
+    timer = StartupTimer("CLIENT B")
     client = ClientB()
+    timer.mark("client")
 
     if sys.argv[1] == "send":
+        timer.report()
         msg = input("Message à envoyer : ")
         client.send_message(msg, debug=True)  # debug UNIQUEMENT en CLI
     else:
-        client.listen()
+        client.listen(timer)
@@ -6,8 +6,10 @@ from PyQt5.QtWidgets import (
     QTextEdit, QLineEdit, QPushButton, QLabel
 )
 
-from src.client.clientA import send_message as sendA
-from src.client.clientB import send_message as sendB
+from src.client.clientA import send_message as sendA, register_to_master as registerA
+from src.client.clientB import send_message as sendB, register_to_master as registerB
+from src.common.framing import recv_frame
+from src.common.startup import StartupTimer
 
 PORTS = {"A": 9001, "B": 9100}
 
@@ -60,10 +62,21 @@ class ClientGUI(QWidget):
             s.bind(("0.0.0.0", self.port))
             s.listen()
 
+            # Adresse annoncée au MASTER pour les routeurs de sortie
+            registerA() if self.role == "A" else registerB()
+
             while True:
                 conn, _ = s.accept()
-                msg = conn.recv(4096).decode()
+                frame = recv_frame(conn)
                 conn.close()
+                if frame is None:
+                    continue
+                msg = frame.decode()
+
+                if msg.startswith("RECEIPT "):
+                    self.messages.append(f"✔ Livré ({msg[8:]})")
+                    continue
+
                 self.messages.append(f"📩 Reçu : {msg}")
 
 
@@ -72,7 +85,10 @@ if __name__ == "__main__":
         print("Usage : python -m src.client.client_gui A|B")
         sys.exit(1)
 
+    timer = StartupTimer(f"GUI CLIENT {sys.argv[1]}")
     app = QApplication(sys.argv)
     gui = ClientGUI(sys.argv[1])
     gui.show()
+    timer.mark("fenêtre")
+    timer.report()
     sys.exit(app.exec_())
@@ -0,0 +1,228 @@
+from functools import lru_cache
+
+from .crypto import TABLE_MODULUS, get_decryption_table, get_encryption_table
+from .onion import split_binary_layer, split_text_layer
+from .wire import (
+    FORMAT_TEXT, FORMAT_BINARY, HEADER, KIND_RSA_UNITS, UNIT_SIZE, is_binary, pack_header,
+)
+
+try:
+    import numpy as np
+except ImportError:     # NumPy absent : mêmes résultats, message par message
+    np = None
+
+"""
+============================================================
+    TRAITEMENT PAR LOTS (NUMPY) (SAE 302)
+------------------------------------------------------------
+Avec des clés 16 bits, chiffrer / déchiffrer = lire une table
+(voir RSAKeyTable). NumPy fait cette lecture pour TOUT un lot
+de messages en une seule opération :
+
+    table[unités de tous les messages]   → un seul "gather"
+
+- create_onion_messages : même chaîne de routeurs → chaque
+  couche de tous les messages chiffrée d'un coup
+- process_onion_layers  : même clé privée (un routeur qui vide
+  sa file) → toutes les couches RSA déchiffrées d'un coup
+
+Formats texte et binaire, clés 16 bits. Hybride, grandes clés,
+circuits ou NumPy absent → OnionRouter message par message
+(résultats identiques).
+============================================================
+"""
+
+
+def numpy_available():
+    return np is not None
+
+
+def _vectorizable(onion, keys):
+    return (np is not None and onion.wire_format in (FORMAT_TEXT, FORMAT_BINARY)
+            and all(256 <= key[1] < TABLE_MODULUS for key in keys))
+
+
+def _split(values, sizes):
+    """Tableau concaténé → un morceau par message."""
+    return np.split(values, np.cumsum(sizes)[:-1])
+
+
+# ============================================================
+#   FORMAT TEXTE "12,54,983" SANS BOUCLE PAR ENTIER
+# ============================================================
+@lru_cache(maxsize=64)
+def _decimal_table(e, n):
+    """Écriture "v," de chaque valeur chiffrée → (octets, début, longueur) par code 0..255."""
+    strings = [b"%d," % value for value in get_encryption_table((e, n)).values]
+    lengths = np.array([len(string) for string in strings], dtype=np.int64)
+    return np.frombuffer(b"".join(strings), dtype=np.uint8), np.cumsum(lengths) - lengths, lengths
+
+
+def _format_units(codes, sizes, public_key):
+    """Codes clairs de tous les messages → une couche "12,54,..." par message."""
+    digits, starts, lengths = _decimal_table(int(public_key[0]), int(public_key[1]))
+
+    # Copie de l'écriture de chaque code, bout à bout
+    lens = lengths[codes]
+    ends = np.cumsum(lens)
+    text = digits[np.repeat(starts[codes] - (ends - lens), lens) + np.arange(ends[-1])].tobytes()
+
+    # Fin de chaque message (sans sa dernière virgule)
+    bounds = ends[np.cumsum(sizes) - 1].tolist()
+    return [text[a:b - 1] for a, b in zip([0] + bounds[:-1], bounds)]
+
+
+# Chiffres au plus par entier (int64)
+MAX_DIGITS = 18
+
+
+def _parse_units(data):
+    """b"12,54,983" → entiers (int64), ou None si ce ne sont pas que des entiers simples."""
+    chars = np.frombuffer(data, dtype=np.uint8)
+    is_comma = chars == ord(",")
+    commas = np.flatnonzero(is_comma)
+
+    ends = np.append(commas, len(chars))
+    lengths = ends - np.concatenate(([0], commas + 1))
+    if not len(chars) or lengths.min() < 1 or lengths.max() > MAX_DIGITS:
+        return None
+
+    # Octets hors "0".."9" (la soustraction uint8 déborde pour eux aussi)
+    if ((chars - ord("0") > 9) & ~is_comma).any():
+        return None
+
+    # Un passage par rang de chiffre (unités, dizaines...), pour tous les entiers à la fois
+    values = np.zeros(len(ends), dtype=np.int64)
+    for rank in range(int(lengths.max())):
+        digits = chars[ends - 1 - rank].astype(np.int64) - ord("0")
+        values += np.where(lengths > rank, digits * 10 ** rank, 0)
+    return values
+
+
+# ============================================================
+#   CRÉATION D'OIGNONS (CLIENT / GÉNÉRATEUR DE CHARGE)
+# ============================================================
+def create_onion_messages(onion, batch):
+    """batch = [(message, destination, chaîne, clés publiques), ...] → couches, dans l'ordre."""
+    results = [None] * len(batch)
+
+    # Messages de même chaîne (mêmes clés) → chiffrés ensemble
+    groups = {}
+    for i, (message, destination, chain, public_keys) in enumerate(batch):
+        keys = tuple(tuple(public_keys[router]) for router in chain)
+        groups.setdefault((tuple(chain), keys), []).append(i)
+
+    for (chain, keys), indexes in groups.items():
+        layers = None
+        if _vectorizable(onion, keys):
+            try:
+                layers = _create_group(onion.wire_format, chain, keys,
+                                       [batch[i][:2] for i in indexes])
+            except UnicodeEncodeError:
+                # Caractère hors latin-1 en format texte : pow() message par message
+                layers = None
+
+        if layers is None:
+            layers = [onion.create_onion_message(*batch[i]) for i in indexes]
+
+        for i, layer in zip(indexes, layers):
+            results[i] = layer
+
+    return results
+
+
+def _create_group(wire_format, chain, keys, items):
+    text = wire_format == FORMAT_TEXT
+
+    # Texte : un caractère = un code < 256 ; binaire : un octet
+    payloads = [f"{destination}|{message}".encode("latin-1" if text else "utf-8")
+                for message, destination in items]
+
+    for i in range(len(chain) - 1, -1, -1):
+        if i < len(chain) - 1:
+            prefix = chain[i + 1].encode("latin-1" if text else "utf-8") + b"|"
+            payloads = [prefix + layer for layer in payloads]
+
+        codes = np.frombuffer(b"".join(payloads), dtype=np.uint8)
+        sizes = [len(layer) for layer in payloads]
+
+        if text:
+            payloads = _format_units(codes, sizes, keys[i])
+        else:
+            table = np.frombuffer(get_encryption_table(keys[i]).values, dtype=np.uint16)
+            header = pack_header(KIND_RSA_UNITS)
+            payloads = [header + chunk.astype(">u2").tobytes() for chunk in _split(table[codes], sizes)]
+
+    return [layer.decode() for layer in payloads] if text else payloads
+
+
+# ============================================================
+#   TRAITEMENT DE COUCHES (ROUTEUR)
+# ============================================================
+def process_onion_layers(onion, layers, private_key):
+    """
+    Couches reçues (une même clé privée) → [(next_hop, payload), ...], dans l'ordre.
+    Couche invalide → son ValueError À SA PLACE dans la liste : les autres couches
+    du lot sont quand même déchiffrées.
+    """
+    if not _vectorizable(onion, [private_key]):
+        return [_process_one(onion, layer, private_key) for layer in layers]
+
+    results = [None] * len(layers)
+    text, binary = [], []
+
+    for i, layer in enumerate(layers):
+        if not is_binary(layer):
+            text.append(i)
+        elif layer[2] == KIND_RSA_UNITS and not (len(layer) - HEADER.size) % UNIT_SIZE:
+            binary.append(i)
+        else:
+            # Hybride / circuit (un seul bloc RSA) ou corps tronqué : un par un
+            results[i] = _process_one(onion, layer, private_key)
+
+    n = private_key[1]
+    table = np.frombuffer(get_decryption_table(private_key).values, dtype=np.uint16)
+
+    if binary:
+        units = [np.frombuffer(memoryview(layers[i])[HEADER.size:], dtype=">u2") for i in binary]
+        decrypted = table[np.concatenate(units) % n]
+
+        if len(decrypted) and decrypted.max() > 255:
+            # Valeur hors octet quelque part : on repasse ce lot un par un pour isoler la couche
+            for i in binary:
+                results[i] = _process_one(onion, layers[i], private_key)
+        else:
+            for i, data in zip(binary, _split(decrypted.astype(np.uint8), [len(u) for u in units])):
+                results[i] = _split_one(split_binary_layer, data.tobytes())
+
+    if text:
+        data = [layers[i].encode() if isinstance(layers[i], str) else bytes(layers[i]) for i in text]
+        values = _parse_units(b",".join(data))
+
+        if values is None:
+            # Écriture inhabituelle (signe, espaces...) ou invalide : int() de Python tranche
+            for i in text:
+                results[i] = _process_one(onion, layers[i], private_key)
+            return results
+
+        decrypted = table[values % n].astype("<u4")
+        sizes = [layer.count(b",") + 1 for layer in data]
+        for i, chars in zip(text, _split(decrypted, sizes)):
+            results[i] = _split_one(split_text_layer, chars.tobytes().decode("utf-32-le", "surrogatepass"))
+
+    return results
+
+
+def _process_one(onion, layer, private_key):
+    """Une couche → (next_hop, payload), ou son ValueError (le lot continue)."""
+    try:
+        return onion.process_onion_layer(layer, private_key)
+    except ValueError as e:
+        return e
+
+
+def _split_one(split, data):
+    try:
+        return split(data)
+    except ValueError as e:
+        return e
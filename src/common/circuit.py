@@ -0,0 +1,196 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from .crypto import StreamCipher, block_sizes, encrypt_blocks, decrypt_blocks
+from .stream import STREAM_WINDOW, pack_delivery, stream_payloads
+from .wire import (
+    CIRCUIT_ID_SIZE, NONCE_SIZE, HEADER, KIND_CIRCUIT_CREATE, KIND_CIRCUIT_CELL, KIND_STREAM_CELL,
+    pack_units, unpack_units, unpack_header,
+    pack_create, unpack_create_body, pack_cell, unpack_cell_body,
+)
+
+"""
+============================================================
+    CIRCUITS RÉUTILISABLES (SAE 302)
+------------------------------------------------------------
+1) CREATE (une fois par circuit) : oignon hybride, chaque routeur
+   récupère sa clé de circuit (RSA payé une seule fois) et note :
+       id circuit entrant → (saut suivant, id circuit sortant, clé)
+2) CELL (chaque message) : données chiffrées en couches symétriques,
+   portant seulement l'id du circuit → aucun RSA par message
+3) STREAM_CELL (gros contenus, voir stream.py) : cellules de taille
+   fixe, relayées une à une dans la fenêtre du circuit
+============================================================
+"""
+
+# Id sortant "vide" : ce routeur est la sortie du circuit
+EXIT_CIRCUIT = bytes(CIRCUIT_ID_SIZE)
+
+# Durée de vie côté client / côté routeur (secondes)
+CIRCUIT_LIFETIME = 600
+CIRCUIT_IDLE_TIMEOUT = 900
+
+
+# ============================================================
+#   CÔTÉ CLIENT
+# ============================================================
+class Circuit:
+    """Chemin établi : une clé de session et un id de circuit par saut."""
+
+    def __init__(self, router_chain, router_public_keys, destination):
+        self.router_chain = list(router_chain)
+        self.destination = destination
+        self.public_keys = [router_public_keys[name] for name in self.router_chain]
+
+        self.circuit_ids = [os.urandom(CIRCUIT_ID_SIZE) for _ in self.router_chain]
+        self.keys = [StreamCipher.new_key() for _ in self.router_chain]
+        self.ciphers = [StreamCipher(key) for key in self.keys]
+
+        self.created_at = time.monotonic()
+
+    @property
+    def expired(self):
+        return time.monotonic() - self.created_at > CIRCUIT_LIFETIME
+
+    def create_message(self):
+        """Message CREATE à envoyer au premier routeur."""
+        inner = b""
+
+        for i in range(len(self.router_chain) - 1, -1, -1):
+            if i + 1 < len(self.router_chain):
+                next_hop, next_circuit = self.router_chain[i + 1], self.circuit_ids[i + 1]
+            else:
+                next_hop, next_circuit = self.destination, EXIT_CIRCUIT
+
+            plaintext = next_circuit + next_hop.encode() + b"|" + inner
+
+            public_key = self.public_keys[i]
+            wrapped_key = pack_units(encrypt_blocks(self.keys[i], public_key), block_sizes(public_key[1])[1])
+            inner = pack_create(self.circuit_ids[i], wrapped_key, self.ciphers[i].encrypt(plaintext))
+
+        return inner
+
+    def cell(self, message, kind=KIND_CIRCUIT_CELL):
+        """Cellule d'un message : couches symétriques uniquement."""
+        data = message.encode() if isinstance(message, str) else bytes(message)
+        nonce = os.urandom(NONCE_SIZE)
+
+        for cipher in reversed(self.ciphers):
+            data = cipher.encrypt(data, nonce)
+
+        return pack_cell(self.circuit_ids[0], nonce, data, kind)
+
+    def stream_cells(self, source, stream_id=None):
+        """Octets ou fichier → cellules de flux chiffrées, une à une (générateur)."""
+        for payload in stream_payloads(source, stream_id):
+            yield self.cell(payload, KIND_STREAM_CELL)
+
+
+# ============================================================
+#   CÔTÉ ROUTEUR
+# ============================================================
+class CircuitTable:
+    """Table id circuit → (saut suivant, id sortant, clé) d'un routeur."""
+
+    def __init__(self, idle_timeout=CIRCUIT_IDLE_TIMEOUT, window=STREAM_WINDOW):
+        self.idle_timeout = idle_timeout
+        self.window = window
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def process(self, layer, private_key):
+        """
+        Message de circuit → (next_hop, payload), comme process_onion_layer.
+        - CREATE intermédiaire : payload = CREATE du saut suivant
+        - CREATE en sortie     : payload = None (rien à livrer)
+        - CELL                 : payload = cellule suivante ou message final
+        - STREAM_CELL          : payload = cellule suivante ou STREAM_DATA (sortie)
+        """
+        kind, body = unpack_header(layer)
+
+        if kind == KIND_CIRCUIT_CREATE:
+            return self._create(body, private_key)
+        if kind in (KIND_CIRCUIT_CELL, KIND_STREAM_CELL):
+            return self._relay(body, kind)
+
+        raise ValueError(f"Type de message de circuit inconnu : {kind}")
+
+    def _create(self, body, private_key):
+        circuit_id, wrapped_key, ciphertext = unpack_create_body(body)
+
+        width = block_sizes(private_key[1])[1]
+        key = decrypt_blocks(unpack_units(wrapped_key, width), private_key)
+        cipher = StreamCipher(key)
+        plaintext = cipher.decrypt(ciphertext)
+
+        next_circuit = plaintext[:CIRCUIT_ID_SIZE]
+        next_hop, sep, inner = plaintext[CIRCUIT_ID_SIZE:].partition(b"|")
+        if not sep:
+            raise ValueError("CREATE invalide")
+
+        next_hop = next_hop.decode()
+        now = time.monotonic()
+        with self._lock:
+            # [saut suivant, id sortant, clé, dernière activité, cellules de flux en vol]
+            self._entries[circuit_id] = [next_hop, next_circuit, cipher, now, 0]
+
+        # Nettoyage occasionnel, à la création de nouveaux circuits
+        if now - self._last_sweep > self.idle_timeout / 10:
+            self._last_sweep = now
+            self.expire()
+
+        return next_hop, (inner or None)
+
+    def _relay(self, body, kind):
+        circuit_id, nonce, ciphertext = unpack_cell_body(body)
+
+        with self._lock:
+            entry = self._entries.get(circuit_id)
+            if entry is None:
+                raise ValueError("Circuit inconnu")
+            entry[3] = time.monotonic()
+
+        next_hop, next_circuit, cipher = entry[:3]
+        data = cipher.decrypt(ciphertext, nonce)
+
+        if next_circuit == EXIT_CIRCUIT:
+            if kind == KIND_STREAM_CELL:
+                return next_hop, pack_delivery(data)
+            return next_hop, data.decode()
+
+        return next_hop, pack_cell(next_circuit, nonce, data, kind)
+
+    @contextmanager
+    def stream_slot(self, layer):
+        """
+        Place dans la fenêtre du circuit, le temps de relayer une cellule de flux
+        (ValueError si 'window' cellules de ce circuit sont déjà en cours).
+        """
+        circuit_id = bytes(layer[HEADER.size:HEADER.size + CIRCUIT_ID_SIZE])
+
+        with self._lock:
+            entry = self._entries.get(circuit_id)
+            if entry is None:
+                raise ValueError("Circuit inconnu")
+            if entry[4] >= self.window:
+                raise ValueError("Fenêtre du circuit pleine")
+            entry[4] += 1
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                entry[4] -= 1
+
+    def expire(self):
+        """Oublie les circuits inactifs depuis plus de idle_timeout."""
+        limit = time.monotonic() - self.idle_timeout
+        with self._lock:
+            for circuit_id in [c for c, e in self._entries.items() if e[3] < limit]:
+                del self._entries[circuit_id]
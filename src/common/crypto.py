@@ -1,15 +1,65 @@
-import random
-import sympy
+import hashlib
+import hmac
+import os
+import secrets
+from array import array
+from functools import lru_cache
+
+# Nombre de clés dont les tables restent en mémoire (LRU)
+ENCRYPTION_TABLE_CACHE = 256
+DECRYPTION_TABLE_CACHE = 16
+
+# Les codes chiffrés sont des caractères latin-1 → 256 entrées suffisent
+PLAINTEXT_CODES = 256
+
+# Taille du module n par défaut (bits) : 16 → premiers 8 bits, un octet par bloc
+KEY_BITS = 16
+
+# Taille des clés des routeurs lancés en ligne de commande (voir key_bits_setting)
+KEY_BITS_ENV = "SAE302_KEY_BITS"
+
+# Tables précalculées seulement pour n < TABLE_MODULUS (entrées 16 bits)
+TABLE_MODULUS = 1 << 16
+
+# Remplissage des blocs de plus d'un octet : 0x80 puis des zéros
+BLOCK_PADDING = b"\x80"
+
+# Premiers précalculés jusqu'à 2**PRIME_TABLE_BITS (au-delà : Miller-Rabin)
+PRIME_TABLE_BITS = 16
+
+# Génération en masse : en dessous, un seul processus suffit
+# (clés 16 bits : quelques µs chacune ; grandes clés : coûteuses dès la première)
+PARALLEL_KEYS_MIN = 20000
+PARALLEL_BIG_KEYS_MIN = 8
+KEYS_PER_TASK = 2500
+
+# Chiffrement symétrique des couches hybrides
+SESSION_KEY_SIZE = 16
+MAC_SIZE = 16
+
+
+def key_bits_setting(value=None):
+    """Taille de clé d'un point d'entrée : argument, sinon SAE302_KEY_BITS, sinon KEY_BITS."""
+    value = value or os.environ.get(KEY_BITS_ENV)
+    return int(value) if value else KEY_BITS
+
 
 class RSAEncryption:
     """
     RSA pédagogique pour la SAE :
-    - p et q en 8 bits pour garantir val < 256
-    - Chiffrement par caractère
+    - Par défaut p et q en 8 bits pour garantir val < 256
+      (un caractère par entier, tables précalculées)
+    - key_bits = taille de n : 1024, 2048... → blocs de plusieurs octets
+    - Clé publique (e, n) ; clé privée (d, n, p, q, dp, dq, qinv)
+      → déchiffrement par les restes chinois (voir rsa_decrypt)
     - Compatible avec le routage en oignon sans erreurs Unicode
     """
 
-    def __init__(self):
+    def __init__(self, key_bits=KEY_BITS):
+        if key_bits < KEY_BITS:
+            raise ValueError(f"Clé trop petite : {key_bits} bits (minimum {KEY_BITS})")
+
+        self.key_bits = key_bits
         self.public_key = None
         self.private_key = None
         self.n = None
@@ -18,33 +68,47 @@ class RSAEncryption:
     # GÉNÉRATION DES CLÉS RSA
     # ============================================================
     def generate_keys(self):
-        """Génère p, q, n, e, d pour du RSA pédagogique."""
+        """Génère p, q, n, e, d (+ paramètres CRT) pour du RSA pédagogique."""
 
         # ⭐ Correction cruciale : 8 bits → empêche les erreurs chr()
-        p = self._generate_prime(8)
-        q = self._generate_prime(8)
-
-        self.n = p * q
-        phi = (p - 1) * (q - 1)
+        # p ≠ q et bit de poids fort forcé → n > 255 : tout octet se déchiffre
+        p_bits = self.key_bits // 2
+        q_bits = self.key_bits - p_bits
 
-        # Exposant public classique
+        # Exposant public classique (doit être premier avec phi)
         e = 65537
-        if self._gcd(e, phi) != 1:
-            e = 3
+        while True:
+            p = self._generate_prime(p_bits)
+            q = self._generate_prime(q_bits)
+            phi = (p - 1) * (q - 1)
+            if p != q and self._gcd(e, phi) == 1:
+                break
+
+        self.n = p * q
 
         # Clé privée : inverse modulaire
         d = self._modinv(e, phi)
 
+        # Restes chinois : deux exponentiations sur p et q au lieu d'une sur n
+        dp, dq, qinv = d % (p - 1), d % (q - 1), self._modinv(q, p)
+
         self.public_key = (e, self.n)
-        self.private_key = (d, self.n)
+        self.private_key = (d, self.n, p, q, dp, dq, qinv)
 
         return self.public_key, self.private_key
 
     def _generate_prime(self, bits):
-        """Génère un nombre premier de 'bits' bits."""
+        """
+        Génère un nombre premier de 'bits' bits (sans sympy).
+        Tirage par secrets (aléa du système) : random est prévisible, inutilisable pour des clés.
+        """
+        if bits <= PRIME_TABLE_BITS:
+            return secrets.choice(primes_of_size(bits))
+
+        # Deux bits de poids fort → n = p * q a exactement key_bits bits
         while True:
-            x = random.getrandbits(bits)
-            if sympy.isprime(x):
+            x = secrets.randbits(bits) | (3 << (bits - 2)) | 1
+            if is_prime(x):
                 return x
 
     def _gcd(self, a, b):
@@ -75,38 +139,334 @@ class RSAEncryption:
     # ============================================================
     def encrypt_text(self, text):
         """Chiffre un texte caractère par caractère → liste d'entiers RSA."""
-        e, n = self.public_key
-        out = []
-
-        for c in text:
-            code = ord(c)
-            enc = pow(code, e, n)
-            out.append(enc)
-
-        return out
+        return encrypt_text_blocks(text, self.public_key)
 
     def decrypt_text(self, encrypted_list):
         """Déchiffre une liste d'entiers RSA → texte."""
-        d, n = self.private_key
-        out = ""
-
-        for enc in encrypted_list:
-            code = pow(enc, d, n)
-
-            # ⭐ Garantie : code < 256 → chr() NE plante plus
-            out += chr(code)
-
-        return out
+        # ⭐ Garantie : code < 256 → chr() NE plante plus
+        return decrypt_text_blocks(encrypted_list, self.private_key)
 
     # ============================================================
     #  UTILITAIRES POUR LES TESTS
     # ============================================================
     def encrypt_number(self, number, public_key):
         """Chiffre un entier RSA."""
-        e, n = public_key
-        return pow(number, e, n)
+        return pow(number, public_key[0], public_key[1])
 
     def decrypt_number(self, encrypted_number, private_key):
         """Déchiffre un entier RSA."""
-        d, n = private_key
-        return pow(encrypted_number, d, n)
+        return rsa_decrypt(encrypted_number, private_key)
+
+
+# ============================================================
+#   NOMBRES PREMIERS (SANS SYMPY)
+# ============================================================
+@lru_cache(maxsize=1)
+def _sieve(limit):
+    """Crible d'Ératosthène : flags[x] = 1 si x est premier (x < limit)."""
+    flags = bytearray([1]) * limit
+    flags[:2] = b"\x00\x00"
+    for x in range(2, int(limit ** 0.5) + 1):
+        if flags[x]:
+            flags[x * x::x] = bytes(len(range(x * x, limit, x)))
+    return flags
+
+
+@lru_cache(maxsize=None)
+def primes_of_size(bits):
+    """Tous les premiers de exactement 'bits' bits (table, bits <= PRIME_TABLE_BITS)."""
+    flags = _sieve(1 << PRIME_TABLE_BITS)
+    return [x for x in range(1 << (bits - 1), 1 << bits) if flags[x]]
+
+
+@lru_cache(maxsize=1)
+def _small_primes():
+    """Premiers < 2000 : division d'essai avant Miller-Rabin."""
+    flags = _sieve(1 << PRIME_TABLE_BITS)
+    return [x for x in range(2, 2000) if flags[x]]
+
+
+# Bases suffisantes pour un test exact jusqu'à 3,3 * 10**24
+# (au-delà, erreur négligeable pour des candidats tirés au hasard)
+_MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def is_prime(n):
+    """Test de primalité : table pour les petits nombres, Miller-Rabin sinon."""
+    if n < (1 << PRIME_TABLE_BITS):
+        return n >= 2 and bool(_sieve(1 << PRIME_TABLE_BITS)[n])
+
+    for p in _small_primes():
+        if n % p == 0:
+            return False
+
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+
+    for a in _MILLER_RABIN_BASES:
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+# ============================================================
+#   GÉNÉRATION DE CLÉS EN MASSE
+# ============================================================
+def _generate_key_chunk(count, key_bits=KEY_BITS):
+    rsa = RSAEncryption(key_bits)
+    return [rsa.generate_keys() for _ in range(count)]
+
+
+def generate_key_pairs(count, workers=None, key_bits=KEY_BITS):
+    """
+    'count' paires (clé publique, clé privée), réparties sur 'workers' processus.
+    workers=None → un par cœur au-delà de PARALLEL_KEYS_MIN (PARALLEL_BIG_KEYS_MIN
+    pour les grandes clés), sinon ce processus seul.
+    """
+    small = key_bits <= KEY_BITS
+    if workers is None:
+        threshold = PARALLEL_KEYS_MIN if small else PARALLEL_BIG_KEYS_MIN
+        workers = (os.cpu_count() or 1) if count >= threshold else 1
+    if workers == 1:
+        return _generate_key_chunk(count, key_bits)
+
+    # Import ici : inutile (et lent) pour un routeur qui ne génère qu'une clé
+    from concurrent.futures import ProcessPoolExecutor
+
+    per_task = KEYS_PER_TASK if small else 1
+    chunks = [per_task] * (count // per_task)
+    if count % per_task:
+        chunks.append(count % per_task)
+
+    with ProcessPoolExecutor(workers) as pool:
+        results = pool.map(_generate_key_chunk, chunks, [key_bits] * len(chunks))
+        return [pair for chunk in results for pair in chunk]
+
+
+class RSAKeyTable:
+    """
+    Clé RSA (exposant, n) avec sa table précalculée :
+    - values[x] = pow(x, exposant, n) pour tout x < size
+    - Une couche devient une suite de lectures de table, sans pow()
+    - Clé publique  → size = 256 (codes des caractères)
+    - Clé privée    → size = n   (toutes les valeurs chiffrées possibles)
+    """
+
+    def __init__(self, exponent, n, size):
+        self.exponent = exponent
+        self.n = n
+
+        # n < 65536 avec des premiers 8 bits → 2 octets par entrée
+        self.values = array("H", [pow(x, exponent, n) for x in range(size)])
+        self.chars = "".join(map(chr, self.values))
+
+    @classmethod
+    def from_values(cls, exponent, n, values):
+        """Table déjà calculée ailleurs (ex. reçue par un worker) : aucun pow()."""
+        table = cls.__new__(cls)
+        table.exponent = exponent
+        table.n = n
+        table.values = array("H", values)
+        table.chars = "".join(map(chr, table.values))
+        return table
+
+    def apply(self, x):
+        """pow(x, exposant, n) pour un seul entier (hors table si besoin)."""
+        if x < len(self.values):
+            return self.values[x]
+        return pow(x, self.exponent, self.n)
+
+    def encrypt_text(self, text):
+        """Texte → liste d'entiers chiffrés."""
+        values = self.values
+        try:
+            return [values[ord(c)] for c in text]
+        except IndexError:
+            # Caractère hors latin-1 : on retombe sur pow()
+            return [self.apply(ord(c)) for c in text]
+
+    def encrypt_bytes(self, data):
+        """Octets → array('H') d'entiers chiffrés (format binaire)."""
+        return array("H", map(self.values.__getitem__, data))
+
+    def decrypt_bytes(self, encrypted_units):
+        """Entiers chiffrés → octets (ValueError si une valeur dépasse 255)."""
+        try:
+            return bytes(map(self.values.__getitem__, encrypted_units))
+        except IndexError:
+            return bytes([self.apply(enc % self.n) for enc in encrypted_units])
+
+    def decrypt_text(self, encrypted_list):
+        """Liste d'entiers chiffrés → texte."""
+        chars = self.chars
+        try:
+            return "".join([chars[enc] for enc in encrypted_list])
+        except IndexError:
+            # Valeur >= n : même résultat que pow(enc, d, n)
+            return "".join([chr(self.apply(enc % self.n)) for enc in encrypted_list])
+
+
+# ============================================================
+#   BLOCS RSA (AUSSI GROS QUE LE MODULE LE PERMET)
+# ============================================================
+def block_sizes(n):
+    """(octets clairs par bloc, octets par bloc chiffré) pour le module n."""
+    return max(1, (n.bit_length() - 1) // 8), (n.bit_length() + 7) // 8
+
+
+def rsa_decrypt(value, private_key):
+    """
+    pow(value, d, n) ; par les restes chinois si la clé contient p, q, dp, dq, qinv :
+    deux exponentiations sur des nombres deux fois plus petits (≈ 3-4x plus rapide).
+    """
+    if len(private_key) < 7:
+        return pow(value, private_key[0], private_key[1])
+
+    p, q, dp, dq, qinv = private_key[2:7]
+    m1 = pow(value, dp, p)
+    m2 = pow(value, dq, q)
+    return m2 + (qinv * (m1 - m2) % p) * q
+
+
+def encrypt_blocks(data, public_key):
+    """
+    Octets → entiers chiffrés, un par bloc.
+    - n < TABLE_MODULUS : un octet par bloc, lu dans la table (comme avant)
+    - sinon : blocs de block_sizes(n)[0] octets, remplissage 0x80 puis zéros
+    """
+    e, n = public_key[0], public_key[1]
+    if n < TABLE_MODULUS:
+        return get_encryption_table(public_key).encrypt_bytes(data)
+
+    size = block_sizes(n)[0]
+    data = bytes(data) + BLOCK_PADDING
+    data += bytes(-len(data) % size)
+    return [pow(int.from_bytes(data[i:i + size], "big"), e, n) for i in range(0, len(data), size)]
+
+
+def decrypt_blocks(values, private_key, unpad=True):
+    """
+    Entiers chiffrés → octets (ValueError si un bloc ou le remplissage est invalide).
+    unpad=False : blocs bruts, remplissage compris (morceau d'une couche, voir remove_padding).
+    """
+    n = private_key[1]
+    if n < TABLE_MODULUS:
+        return get_decryption_table(private_key).decrypt_bytes(values)
+
+    size = block_sizes(n)[0]
+    try:
+        data = b"".join(rsa_decrypt(value, private_key).to_bytes(size, "big") for value in values)
+    except OverflowError:
+        raise ValueError("Bloc RSA invalide") from None
+
+    return remove_padding(data) if unpad else data
+
+
+def remove_padding(data):
+    """Blocs déchiffrés → octets clairs (retire 0x80 puis les zéros)."""
+    data = data.rstrip(b"\x00")
+    if not data.endswith(BLOCK_PADDING):
+        raise ValueError("Remplissage de bloc invalide")
+    return data[:-len(BLOCK_PADDING)]
+
+
+def encrypt_text_blocks(text, public_key):
+    """Texte → entiers chiffrés (un par caractère en 16 bits, blocs UTF-8 sinon)."""
+    if public_key[1] < TABLE_MODULUS:
+        return get_encryption_table(public_key).encrypt_text(text)
+    return encrypt_blocks(text.encode(), public_key)
+
+
+def decrypt_text_blocks(values, private_key):
+    """Inverse de encrypt_text_blocks."""
+    if private_key[1] < TABLE_MODULUS:
+        return get_decryption_table(private_key).decrypt_text(values)
+    return decrypt_blocks(values, private_key).decode()
+
+
+@lru_cache(maxsize=ENCRYPTION_TABLE_CACHE)
+def _encryption_table(e, n):
+    return RSAKeyTable(e, n, PLAINTEXT_CODES)
+
+
+# (d, n) → RSAKeyTable installée par preload_decryption_table
+_preloaded_tables = {}
+
+
+@lru_cache(maxsize=DECRYPTION_TABLE_CACHE)
+def _decryption_table(d, n):
+    return RSAKeyTable(d, n, n)
+
+
+def get_encryption_table(public_key):
+    """Table de chiffrement (mise en cache) pour une clé publique (e, n), n < TABLE_MODULUS."""
+    return _encryption_table(int(public_key[0]), int(public_key[1]))
+
+
+def get_decryption_table(private_key):
+    """Table de déchiffrement (mise en cache) pour une clé privée (d, n, ...), n < TABLE_MODULUS."""
+    key = (int(private_key[0]), int(private_key[1]))
+    table = _preloaded_tables.get(key)
+    return table if table is not None else _decryption_table(*key)
+
+
+def preload_decryption_table(table):
+    """Table reçue toute faite (worker d'un pool de processus) : jamais recalculée ici."""
+    _preloaded_tables[(table.exponent, table.n)] = table
+
+
+# ============================================================
+#   CHIFFREMENT SYMÉTRIQUE (COUCHES HYBRIDES)
+# ============================================================
+class StreamCipher:
+    """
+    Chiffrement à flot basé sur hashlib (stdlib uniquement) :
+    - flot de clé = SHAKE-256(clé_chiffrement || nonce)
+    - chiffré     = message XOR flot
+    - intégrité   = BLAKE2b à clé sur le chiffré (MAC de 16 octets)
+    Coût linéaire en taille, sans aucun pow() par caractère.
+    """
+
+    def __init__(self, key):
+        self.enc_key = hashlib.blake2b(key, digest_size=32, person=b"sae302-enc").digest()
+        self.mac_key = hashlib.blake2b(key, digest_size=32, person=b"sae302-mac").digest()
+
+    @staticmethod
+    def new_key():
+        """Clé de session aléatoire."""
+        return os.urandom(SESSION_KEY_SIZE)
+
+    def _xor(self, data, nonce):
+        if not data:
+            return b""
+        stream = hashlib.shake_256(self.enc_key + nonce).digest(len(data))
+        mixed = int.from_bytes(data, "big") ^ int.from_bytes(stream, "big")
+        return mixed.to_bytes(len(data), "big")
+
+    def _tag(self, ciphertext, nonce):
+        return hashlib.blake2b(nonce + ciphertext, key=self.mac_key, digest_size=MAC_SIZE).digest()
+
+    def encrypt(self, plaintext, nonce=b""):
+        """Octets clairs → chiffré + MAC."""
+        ciphertext = self._xor(plaintext, nonce)
+        return ciphertext + self._tag(ciphertext, nonce)
+
+    def decrypt(self, data, nonce=b""):
+        """Chiffré + MAC → octets clairs (ValueError si altéré)."""
+        if len(data) < MAC_SIZE:
+            raise ValueError("Chiffré trop court")
+
+        data = bytes(data)
+        ciphertext, tag = data[:-MAC_SIZE], data[-MAC_SIZE:]
+        if not hmac.compare_digest(tag, self._tag(ciphertext, nonce)):
+            raise ValueError("MAC invalide : couche altérée ou mauvaise clé")
+
+        return self._xor(ciphertext, nonce)
@@ -1,109 +1,241 @@
 import mariadb
 import sys
+import time
+from contextlib import contextmanager
+
+from src.common.log_writer import LogWriter
+
+# Connexions ouvertes en permanence dans le pool
+DB_POOL_SIZE = 5
+
+# Attente max d'une connexion libre (secondes)
+DB_POOL_TIMEOUT = 5.0
 
 
 class DatabaseManager:
     """
     Classe permettant de gérer toutes les opérations avec MariaDB.
-    Utilisée par le Master.
+    Utilisée par le Master (threads de requêtes) et le GUI.
+
+    Les connexions viennent d'un pool : chaque opération emprunte une
+    connexion (with db.cursor() as cur: ...) puis la rend, ce qui permet
+    à plusieurs threads de travailler en même temps.
     """
 
-    def __init__(self, host="localhost", user="root", password="1234", database="onion_network"):
+    def __init__(self, host="localhost", user="root", password="1234", database="onion_network",
+                 pool_size=DB_POOL_SIZE, pool_name=None):
 
         self.host = host
         self.user = user
         self.password = password
         self.database = database
 
-        # Connexion sans base pour la créer si besoin
+        # Connexion sans base pour la créer si besoin (fermée ensuite)
         try:
-            self.conn = mariadb.connect(
+            conn = mariadb.connect(
                 host=self.host,
                 user=self.user,
                 password=self.password
             )
-            self.cursor = self.conn.cursor()
         except mariadb.Error as e:
             print(f"[ERREUR] Connexion MariaDB impossible : {e}")
             sys.exit(1)
 
-        self._create_database()
+        self._create_database(conn)
+        conn.close()
 
-        # Reconnexion avec la base sélectionnée
+        # Pool de connexions sur la base sélectionnée.
+        # Pas de reset au retour dans le pool : les requêtes préparées restent valides.
         try:
-            self.conn = mariadb.connect(
+            self.pool = mariadb.ConnectionPool(
+                pool_name=pool_name or f"sae302_{id(self)}",
+                pool_size=pool_size,
+                pool_reset_connection=False,
                 host=self.host,
                 user=self.user,
                 password=self.password,
                 database=self.database
             )
-            self.cursor = self.conn.cursor()
         except mariadb.Error as e:
             print(f"[ERREUR] Sélection de la base impossible : {e}")
             sys.exit(1)
 
+        # Curseurs préparés par (connexion, requête)
+        self._prepared = {}
+
         self._create_tables()
 
+        # Logs écrits par lots en arrière-plan (voir log_writer.py)
+        self.log_writer = LogWriter(self._write_logs)
+
+    # ============================================================
+    # POOL DE CONNEXIONS
+    # ============================================================
+    def _borrow(self, timeout=DB_POOL_TIMEOUT):
+        """Connexion libre du pool (attend si toutes sont utilisées)."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self.pool.get_connection()
+            except mariadb.PoolError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.01)
+
+    @contextmanager
+    def connection(self):
+        """with db.connection() as conn : connexion rendue au pool à la sortie."""
+        conn = self._borrow()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def cursor(self, commit=False):
+        """with db.cursor(commit=True) as cur : commit si tout s'est bien passé."""
+        with self.connection() as conn:
+            cur = conn.cursor()
+            try:
+                yield cur
+                if commit:
+                    conn.commit()
+            except mariadb.Error:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+
+    @contextmanager
+    def statement(self, sql, commit=False):
+        """
+        Curseur préparé pour 'sql', réutilisé à chaque emprunt de la même
+        connexion (la requête n'est préparée qu'une fois par connexion).
+        """
+        with self.connection() as conn:
+            key = (id(conn), sql)
+            cur = self._prepared.get(key)
+            if cur is None:
+                cur = self._prepared[key] = conn.cursor(prepared=True)
+            try:
+                yield cur
+                if commit:
+                    conn.commit()
+            except mariadb.Error:
+                conn.rollback()
+                raise
+
     # ============================================================
     # CRÉATION BASE + TABLES
     # ============================================================
-    def _create_database(self):
+    def _create_database(self, conn):
         try:
-            self.cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.database}")
+            cur = conn.cursor()
+            cur.execute(f"CREATE DATABASE IF NOT EXISTS {self.database}")
+            cur.close()
         except mariadb.Error as e:
             print(f"[ERREUR] Création base impossible : {e}")
             sys.exit(1)
 
     def _create_tables(self):
         try:
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS routers (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    name VARCHAR(50),
-                    ip VARCHAR(50),
-                    port INT,
-                    public_e LONGTEXT,
-                    public_n LONGTEXT
-                )
-            """)
+            with self.cursor() as cur:
+                # Un seul enregistrement par nom (clé unique) ; e entier,
+                # n en décimal (1024 / 2048 bits : trop grand pour un BIGINT)
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS routers (
+                        id INT AUTO_INCREMENT PRIMARY KEY,
+                        name VARCHAR(50) NOT NULL,
+                        ip VARCHAR(50),
+                        port INT,
+                        public_e BIGINT UNSIGNED,
+                        public_n TEXT,
+                        UNIQUE KEY uniq_router_name (name)
+                    )
+                """)
 
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS logs (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    message TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS logs (
+                        id INT AUTO_INCREMENT PRIMARY KEY,
+                        message TEXT,
+                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
         except mariadb.Error as e:
             print(f"[ERREUR] Création tables impossible : {e}")
 
+        self._migrate_routers()
+
+    def _migrate_routers(self):
+        """
+        Ancienne table (clés LONGTEXT, pas d'index sur name) :
+        suppression des doublons (on garde la ligne la plus récente),
+        puis e en BIGINT, n en TEXT et clé unique sur name.
+        Table intermédiaire (n en BIGINT) : n passe en TEXT (valeurs conservées).
+        """
+        try:
+            with self.cursor(commit=True) as cur:
+                cur.execute(
+                    "SELECT COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS "
+                    "WHERE TABLE_SCHEMA = ? AND TABLE_NAME = 'routers' "
+                    "AND COLUMN_NAME IN ('public_e', 'public_n')",
+                    (self.database,)
+                )
+                types = {column: data_type.lower() for column, data_type in cur.fetchall()}
+                if not types:
+                    return
+
+                if types["public_e"] == "bigint":
+                    if types["public_n"] == "bigint":
+                        print("[DB] Migration de la table routers (grandes clés)...")
+                        cur.execute("ALTER TABLE routers MODIFY public_n TEXT")
+                    return
+
+                print("[DB] Migration de la table routers...")
+                cur.execute("""
+                    DELETE old FROM routers old
+                    JOIN routers newer ON old.name = newer.name AND old.id < newer.id
+                """)
+                cur.execute("""
+                    ALTER TABLE routers
+                        MODIFY name VARCHAR(50) NOT NULL,
+                        MODIFY public_e BIGINT UNSIGNED,
+                        MODIFY public_n TEXT,
+                        ADD UNIQUE KEY uniq_router_name (name)
+                """)
+        except mariadb.Error as e:
+            print(f"[ERREUR] Migration table routers impossible : {e}")
+
     # ============================================================
     # ROUTEURS
     # ============================================================
     def remove_router(self, name):
         """
-        Supprime toutes les entrées d'un routeur par son nom.
-        Utilisé pour éviter les doublons.
+        Supprime un routeur par son nom.
         """
+        sql = "DELETE FROM routers WHERE name = ?"
         try:
-            self.cursor.execute("DELETE FROM routers WHERE name = ?", (name,))
-            self.conn.commit()
+            with self.statement(sql, commit=True) as cur:
+                cur.execute(sql, (name,))
         except mariadb.Error as e:
             print(f"[ERREUR] Suppression routeur impossible : {e}")
 
     def add_router(self, name, ip, port, public_key):
         """
-        Ajoute un routeur dans la base.
+        Ajoute un routeur dans la base, ou met à jour celui de même nom
+        (une seule requête atomique, pas de DELETE préalable).
         public_key = (e, n)
         """
         e, n = public_key
+        sql = (
+            "INSERT INTO routers (name, ip, port, public_e, public_n) VALUES (?, ?, ?, ?, ?) "
+            "ON DUPLICATE KEY UPDATE ip = VALUES(ip), port = VALUES(port), "
+            "public_e = VALUES(public_e), public_n = VALUES(public_n)"
+        )
         try:
-            self.cursor.execute(
-                "INSERT INTO routers (name, ip, port, public_e, public_n) VALUES (?, ?, ?, ?, ?)",
-                (name, ip, port, str(e), str(n))
-            )
-            self.conn.commit()
-            print(f"[DB] Routeur {name} ajouté.")
+            with self.statement(sql, commit=True) as cur:
+                cur.execute(sql, (name, ip, port, e, str(n)))
+            print(f"[DB] Routeur {name} enregistré.")
         except mariadb.Error as e:
             print(f"[ERREUR] Ajout routeur impossible : {e}")
 
@@ -112,8 +244,9 @@ class DatabaseManager:
         Retourne la liste des routeurs.
         """
         try:
-            self.cursor.execute("SELECT name, ip, port, public_e, public_n FROM routers")
-            rows = self.cursor.fetchall()
+            with self.cursor() as cur:
+                cur.execute("SELECT name, ip, port, public_e, public_n FROM routers")
+                rows = cur.fetchall()
 
             routers = []
             for row in rows:
@@ -121,7 +254,7 @@ class DatabaseManager:
                     "name": row[0],
                     "ip": row[1],
                     "port": row[2],
-                    "public_key": (int(row[3]), int(row[4]))
+                    "public_key": (row[3], int(row[4]))
                 })
 
             return routers
@@ -134,12 +267,46 @@ class DatabaseManager:
     # LOGS
     # ============================================================
     def add_log(self, message):
+        """Dépose le log dans la file (écrit plus tard, par lots)."""
+        self.log_writer.log(message)
+
+    def _write_logs(self, batch):
+        """Un lot de (message, horodatage) : un executemany + un commit."""
+        sql = "INSERT INTO logs (message, timestamp) VALUES (?, ?)"
+        with self.statement(sql, commit=True) as cur:
+            cur.executemany(sql, batch)
+
+    def get_logs(self, limit=20):
+        """Derniers logs (message, horodatage), du plus récent au plus ancien."""
         try:
-            self.cursor.execute("INSERT INTO logs (message) VALUES (?)", (message,))
-            self.conn.commit()
+            with self.cursor() as cur:
+                cur.execute("SELECT message, timestamp FROM logs ORDER BY id DESC LIMIT ?", (limit,))
+                return cur.fetchall()
         except mariadb.Error as e:
-            print(f"[ERREUR] Ajout log impossible : {e}")
+            print(f"[ERREUR] Récupération logs impossible : {e}")
+            return []
+
+    def get_logs_since(self, last_id=0, limit=200):
+        """
+        Logs plus récents que last_id : [(id, message, horodatage)] par id croissant
+        (au plus les 'limit' derniers). Utilisé pour les mises à jour incrémentales.
+        """
+        try:
+            with self.cursor() as cur:
+                cur.execute(
+                    "SELECT id, message, timestamp FROM ("
+                    "SELECT id, message, timestamp FROM logs WHERE id > ? ORDER BY id DESC LIMIT ?"
+                    ") AS recent ORDER BY id",
+                    (last_id, limit)
+                )
+                return cur.fetchall()
+        except mariadb.Error as e:
+            print(f"[ERREUR] Récupération logs impossible : {e}")
+            return []
 
     def close(self):
-        self.cursor.close()
-        self.conn.close()
+        self.log_writer.close()
+        for cur in self._prepared.values():
+            cur.close()
+        self._prepared.clear()
+        self.pool.close()
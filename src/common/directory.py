@@ -0,0 +1,388 @@
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from collections import deque
+
+"""
+============================================================
+    ANNUAIRE DES ROUTEURS VERSIONNÉ (SAE 302)
+------------------------------------------------------------
+MASTER  : annuaire en mémoire (RouterRegistry) ; chaque enregistrement /
+          suppression incrémente une version et reste dans un journal
+          (borné) des changements. Le JSON n'est refait qu'après un changement.
+CLIENT  : garde une copie locale + sa version, avec un TTL
+          → "GET_ROUTERS <epoch> <version>"
+          ← pas de changement / delta (ajouts + suppressions) / liste complète
+
+L'epoch change à chaque démarrage du MASTER : une version d'un
+ancien MASTER n'est jamais interprétée comme un delta.
+
+L'annuaire contient aussi les clients (role = "client", sans clé) :
+les routeurs y trouvent l'adresse de chaque nom (AddressBook).
+
+Chaque routeur peut porter sa charge ("load" : file, messages/s, CPU),
+envoyée par ses heartbeats : le client choisit son chemin en
+favorisant les routeurs les moins chargés (select_path).
+La charge change à chaque heartbeat : elle est gardée HORS du journal
+versionné et jointe à chaque réponse ("loads" : nom → charge), sinon
+le journal déborderait et tous les clients rechargeraient tout.
+============================================================
+"""
+
+# Durée pendant laquelle le client ne contacte pas du tout le MASTER
+DIRECTORY_TTL = 30.0
+
+# Nombre de changements gardés pour calculer les deltas
+MAX_CHANGES = 1000
+
+# Nom inconnu de l'AddressBook : au plus un rafraîchissement par intervalle (secondes)
+MISS_REFRESH_INTERVAL = 2.0
+
+# Type d'entrée de l'annuaire (absent = routeur)
+ROLE_ROUTER = "router"
+ROLE_CLIENT = "client"
+
+# Charge qui divise par deux le poids d'un routeur
+QUEUE_WEIGHT = 100      # messages en attente
+RATE_WEIGHT = 100.0     # messages / seconde
+
+
+# ============================================================
+#   CÔTÉ MASTER : JOURNAL DES CHANGEMENTS
+# ============================================================
+class DirectoryChanges:
+    """Version courante de l'annuaire + journal des derniers changements."""
+
+    def __init__(self, max_changes=MAX_CHANGES):
+        self.epoch = os.urandom(4).hex()
+        self.version = 0
+        self._changes = deque(maxlen=max_changes)
+        self._lock = threading.Lock()
+
+    def record_add(self, router):
+        """Routeur ajouté ou mis à jour (dict complet)."""
+        with self._lock:
+            self.version += 1
+            self._changes.append((self.version, router["name"], router))
+            return self.version
+
+    def record_remove(self, name):
+        with self._lock:
+            self.version += 1
+            self._changes.append((self.version, name, None))
+            return self.version
+
+    def delta_since(self, epoch, version):
+        """
+        (version courante, (ajoutés, supprimés) depuis 'version'), ou
+        (version courante, None) si le journal ne remonte pas assez loin
+        (le client doit tout recharger). La version est lue sous le même
+        verrou que le journal : le delta mène exactement à elle.
+        """
+        with self._lock:
+            current = self.version
+            if epoch != self.epoch or version > current:
+                return current, None
+
+            if version < current:
+                oldest = self._changes[0][0] if self._changes else current + 1
+                if oldest > version + 1:
+                    return current, None
+
+            # Le dernier changement d'un routeur l'emporte
+            latest = {}
+            for change_version, name, router in self._changes:
+                if change_version > version:
+                    latest[name] = router
+
+        added = [router for router in latest.values() if router is not None]
+        removed = [name for name, router in latest.items() if router is None]
+        return current, (added, removed)
+
+    def response(self, request_args, full_routers, loads=None):
+        """
+        Réponse JSON à "GET_ROUTERS <epoch> <version>".
+        full_routers() n'est appelé que si le client doit tout recharger ;
+        loads = charges des routeurs, jointes à toute réponse.
+        """
+        if len(request_args) == 2 and request_args[1].isdigit():
+            version, delta = self.delta_since(request_args[0], int(request_args[1]))
+        else:
+            version, delta = self.version, None
+
+        # Liste complète : lue après 'version', elle peut contenir des changements
+        # plus récents, que le client réappliquera sans effet au prochain delta
+        answer = {"epoch": self.epoch, "version": version}
+
+        if delta is None:
+            answer["routers"] = full_routers()
+        elif not delta[0] and not delta[1]:
+            answer["not_modified"] = True
+        else:
+            answer["added"], answer["removed"] = delta
+
+        if loads is not None:
+            answer["loads"] = loads
+
+        return json.dumps(answer)
+
+
+# ============================================================
+#   CÔTÉ MASTER : ANNUAIRE EN MÉMOIRE
+# ============================================================
+class RouterRegistry:
+    """
+    Routeurs connus du MASTER, en mémoire (la base n'est plus lue par requête).
+    Les réponses sérialisées (JSON, JSON compressé) sont gardées jusqu'au
+    prochain changement.
+    """
+
+    def __init__(self, routers=(), max_changes=MAX_CHANGES):
+        self.changes = DirectoryChanges(max_changes)
+        self._routers = {router["name"]: router for router in routers}
+        self._lock = threading.Lock()
+        self._cache = {}
+
+        # Charges publiées par les heartbeats (hors versions)
+        self._loads = {}
+
+    def __len__(self):
+        return len(self._routers)
+
+    @property
+    def version(self):
+        return self.changes.version
+
+    def add(self, router):
+        with self._lock:
+            self._routers[router["name"]] = router
+            self.changes.record_add(router)
+            self._cache.clear()
+
+    def remove(self, name):
+        with self._lock:
+            self._loads.pop(name, None)
+            if self._routers.pop(name, None) is None:
+                return
+            self.changes.record_remove(name)
+            self._cache.clear()
+
+    def set_load(self, name, load):
+        """Charge d'un routeur connu : ni nouvelle version, ni événement du journal."""
+        with self._lock:
+            if name not in self._routers or self._loads.get(name) == load:
+                return
+            self._loads[name] = load
+
+            # Seule la réponse "not_modified" (qui porte les charges) est à refaire
+            for key in [k for k in self._cache if k[0] == "not_modified"]:
+                del self._cache[key]
+
+    def loads(self):
+        with self._lock:
+            return dict(self._loads)
+
+    def get(self, name):
+        return self._routers.get(name)
+
+    def routers(self):
+        with self._lock:
+            return list(self._routers.values())
+
+    def _cached(self, key, build):
+        # Clé liée à la version : un changement pendant build() ne laisse
+        # jamais une réponse périmée dans le cache
+        with self._lock:
+            key = (key, self.changes.version)
+            value = self._cache.get(key)
+        if value is None:
+            value = build()
+            with self._lock:
+                if key[1] == self.changes.version:
+                    self._cache[key] = value
+        return value
+
+    def snapshot_json(self):
+        """
+        Liste complète (réponse à "GET_ROUTERS"), en octets.
+        Routeurs seulement : un ancien client choisirait sinon un client (sans clé) comme saut.
+        """
+        return self._cached("json", lambda: json.dumps([
+            router for router in self.routers() if router.get("role", ROLE_ROUTER) == ROLE_ROUTER
+        ]).encode())
+
+    def snapshot_zlib(self):
+        """Même liste compressée (réponse à "GET_ROUTERS_ZLIB")."""
+        return self._cached("zlib", lambda: zlib.compress(self.snapshot_json()))
+
+    def response(self, request_args):
+        """Réponse à "GET_ROUTERS <epoch> <version>" (voir DirectoryChanges)."""
+        # Cas le plus fréquent : client à jour → réponse déjà prête
+        if request_args == [self.changes.epoch, str(self.changes.version)]:
+            return self._cached("not_modified", lambda: self.changes.response(
+                request_args, self.routers, self.loads()).encode())
+
+        return self.changes.response(request_args, self.routers, self.loads()).encode()
+
+
+# ============================================================
+#   CÔTÉ CLIENT : CACHE LOCAL
+# ============================================================
+class DirectoryCache:
+    """
+    Copie locale de l'annuaire.
+    fetch(requête) → réponse texte du MASTER (une connexion).
+    """
+
+    def __init__(self, fetch, ttl=DIRECTORY_TTL):
+        self.fetch = fetch
+        self.ttl = ttl
+
+        self.epoch = None
+        self.version = 0
+        self._routers = {}
+        self._loads = {}
+        self._fetched_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def fresh(self):
+        return self._fetched_at is not None and time.monotonic() - self._fetched_at < self.ttl
+
+    def entries(self):
+        """Tout l'annuaire, nom → entrée (le MASTER n'est contacté qu'après le TTL)."""
+        with self._lock:
+            if not self.fresh:
+                self._refresh()
+            return dict(self._routers)
+
+    def routers(self):
+        """Liste des routeurs utilisables dans un chemin (sans les clients), avec leur charge."""
+        entries, loads = self.entries(), self._loads
+        return [dict(entry, load=loads[name]) if name in loads else entry
+                for name, entry in entries.items()
+                if entry.get("role", ROLE_ROUTER) == ROLE_ROUTER]
+
+    def refresh(self):
+        """Force une mise à jour (par ex. après un routeur injoignable)."""
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        if self.epoch is None:
+            request = "GET_ROUTERS 0 0"
+        else:
+            request = f"GET_ROUTERS {self.epoch} {self.version}"
+
+        self.apply(json.loads(self.fetch(request)))
+        self._fetched_at = time.monotonic()
+
+    def apply(self, answer):
+        """Applique une réponse du MASTER (complète, delta ou inchangée)."""
+        if "routers" in answer:
+            self._routers = {router["name"]: router for router in answer["routers"]}
+        else:
+            for router in answer.get("added", []):
+                self._routers[router["name"]] = router
+            for name in answer.get("removed", []):
+                self._routers.pop(name, None)
+
+        if "loads" in answer:
+            self._loads = answer["loads"]
+
+        self.epoch = answer["epoch"]
+        self.version = answer["version"]
+
+
+# ============================================================
+#   CÔTÉ ROUTEUR : RÉSOLUTION NOM → (IP, PORT)
+# ============================================================
+class AddressBook:
+    """
+    Table locale nom → (ip, port), tenue à jour depuis l'annuaire.
+    Aucune requête au MASTER par message : seulement au rafraîchissement
+    périodique, ou quand un nom inconnu apparaît (au plus une fois par
+    miss_interval, même si des messages vers des noms inventés affluent).
+    """
+
+    def __init__(self, directory, default_clients=None, miss_interval=MISS_REFRESH_INTERVAL):
+        self.directory = directory
+        self.default_clients = dict(default_clients or {})
+        self.miss_interval = miss_interval
+
+        # Dernier rafraîchissement causé par un nom inconnu
+        self._miss_refreshed_at = None
+        self._miss_lock = threading.Lock()
+
+        # Dictionnaires modifiés sur place : ils peuvent être partagés
+        self.routers = {}
+        self.clients = dict(self.default_clients)
+
+    def refresh(self):
+        self.directory.refresh()
+
+        routers, clients = {}, dict(self.default_clients)
+        for name, entry in self.directory.entries().items():
+            table = clients if entry.get("role") == ROLE_CLIENT else routers
+            table[name] = (entry["ip"], entry["port"])
+
+        _replace(self.routers, routers)
+        _replace(self.clients, clients)
+
+    def router(self, name):
+        address = self.routers.get(name)
+        if address is None:
+            # Nouveau routeur (ou jamais rafraîchi) : une mise à jour puis abandon
+            self._refresh_on_miss()
+            address = self.routers.get(name)
+            if address is None:
+                raise ValueError(f"Routeur inconnu dans l'annuaire : {name}")
+        return address
+
+    def _refresh_on_miss(self):
+        with self._miss_lock:
+            now = time.monotonic()
+            if self._miss_refreshed_at is not None and now - self._miss_refreshed_at < self.miss_interval:
+                return
+
+            # Compté même si le MASTER ne répond pas : pas de rafale de connexions
+            self._miss_refreshed_at = now
+            self.refresh()
+
+
+def _replace(table, new):
+    """Met table à jour sur place, sans instant où elle serait vide."""
+    table.update(new)
+    for name in [n for n in table if n not in new]:
+        del table[name]
+
+
+# ============================================================
+#   CÔTÉ CLIENT : CHOIX DU CHEMIN SELON LA CHARGE
+# ============================================================
+def router_weight(router):
+    """Capacité libre estimée d'un routeur (1.0 = inactif ou charge inconnue)."""
+    load = router.get("load")
+    if not load:
+        return 1.0
+
+    spare_cpu = max(0.05, 1.0 - load.get("cpu", 0.0))
+    busy = load.get("queue", 0) / QUEUE_WEIGHT + load.get("rate", 0.0) / RATE_WEIGHT
+    return spare_cpu / (1.0 + busy)
+
+
+def select_path(routers, hops=3, rng=random):
+    """Tirage de 'hops' routeurs distincts, pondéré par la capacité libre."""
+    candidates = list(routers)
+    if len(candidates) < hops:
+        raise ValueError(f"{len(candidates)} routeurs disponibles, {hops} nécessaires")
+
+    path = []
+    for _ in range(hops):
+        weights = [router_weight(router) for router in candidates]
+        index = rng.choices(range(len(candidates)), weights)[0]
+        path.append(candidates.pop(index))
+    return path
@@ -0,0 +1,83 @@
+import queue
+import threading
+
+"""
+============================================================
+    FLUX DE CHANGEMENTS DU MASTER (SAE 302)
+------------------------------------------------------------
+Le MASTER publie chaque changement (routeur enregistré /
+supprimé, nouveau log) ; un abonné (MasterGUI) reçoit :
+    "SUBSCRIBE" →  [{"type": "snapshot", ...}]       (1er message)
+                ←  [événement, événement, ...]        (par lots)
+                ←  []                                 (rien de neuf)
+Un abonné trop lent (file pleine) est déconnecté : il se
+réabonne et repart d'un nouvel instantané.
+============================================================
+"""
+
+FEED_QUEUE_SIZE = 10000
+
+# Message vide envoyé si rien ne se passe (détection d'un abonné parti)
+FEED_HEARTBEAT = 15.0
+
+# Nombre max d'événements envoyés dans un seul message
+FEED_BATCH = 500
+
+
+class Subscription:
+    """File d'événements d'un abonné."""
+
+    def __init__(self, maxsize=FEED_QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get_batch(self, timeout=FEED_HEARTBEAT, limit=FEED_BATCH):
+        """Attend un événement puis prend tous ceux déjà arrivés (liste, vide si délai)."""
+        try:
+            events = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+
+        while len(events) < limit:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+
+class ChangeFeed:
+    """Diffusion des événements du MASTER à tous les abonnés."""
+
+    def __init__(self, maxsize=FEED_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        subscription = Subscription(self.maxsize)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event):
+        # Sans abonné (cas normal), publier ne coûte presque rien
+        if not self._subscribers:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(event)
@@ -0,0 +1,136 @@
+import struct
+
+from .startup import lazy_import
+
+# Importé au premier usage : les routeurs / clients synchrones ne chargent pas asyncio
+asyncio = lazy_import("asyncio")
+
+"""
+============================================================
+    DÉCOUPAGE DES MESSAGES SUR TCP (SAE 302)
+------------------------------------------------------------
+Chaque message = [longueur 4 octets big-endian][données]
+
+- On lit jusqu'à avoir le message COMPLET (plus de recv(4096) tronqué)
+- Taille maximale configurable → protège contre un en-tête corrompu
+- Réception directe dans un tampon préalloué (recv_into)
+- Versions asyncio (read_frame / write_frame) pour les serveurs async
+============================================================
+"""
+
+FRAME_HEADER = struct.Struct(">I")
+
+# Taille maximale d'un message accepté (64 Mo par défaut)
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+# En dessous : en-tête + données en un seul envoi (évite Nagle)
+_SMALL_FRAME = 64 * 1024
+
+
+class FrameError(ConnectionError):
+    """Message tronqué ou trop volumineux."""
+
+
+# ============================================================
+#   ENVOI
+# ============================================================
+def send_frame(sock, data, prefix=b""):
+    """
+    Envoie un message complet (str, bytes ou bytearray).
+    prefix : petit en-tête applicatif collé devant data (sans copier data).
+    """
+    if isinstance(data, str):
+        data = data.encode()
+
+    header = FRAME_HEADER.pack(len(prefix) + len(data)) + prefix
+
+    if len(data) <= _SMALL_FRAME:
+        sock.sendall(header + data)
+    else:
+        # Gros message : pas de copie pour coller l'en-tête
+        sock.sendall(header)
+        sock.sendall(data)
+
+
+# ============================================================
+#   RÉCEPTION
+# ============================================================
+def recv_exact(sock, size):
+    """Lit exactement 'size' octets (bytearray) ou lève FrameError."""
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise FrameError(f"Connexion fermée après {received}/{size} octets")
+        received += n
+
+    return buf
+
+
+def recv_frame(sock, max_size=MAX_FRAME_SIZE):
+    """
+    Lit un message complet.
+    Retourne None si la connexion est fermée proprement avant un nouveau message.
+    """
+    first = sock.recv(FRAME_HEADER.size)
+    if not first:
+        return None
+
+    if len(first) < FRAME_HEADER.size:
+        first += recv_exact(sock, FRAME_HEADER.size - len(first))
+
+    (size,) = FRAME_HEADER.unpack(first)
+    if size > max_size:
+        raise FrameError(f"Message de {size} octets > limite {max_size}")
+
+    return recv_exact(sock, size)
+
+
+def request(sock, data, max_size=MAX_FRAME_SIZE):
+    """Envoie un message puis attend la réponse complète."""
+    send_frame(sock, data)
+    reply = recv_frame(sock, max_size)
+    if reply is None:
+        raise FrameError("Connexion fermée sans réponse")
+    return reply
+
+
+# ============================================================
+#   VERSIONS ASYNCIO (StreamReader / StreamWriter)
+# ============================================================
+async def read_frame(reader, max_size=MAX_FRAME_SIZE):
+    """Équivalent asyncio de recv_frame (None si fermeture propre)."""
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise FrameError("En-tête de message tronqué") from e
+
+    (size,) = FRAME_HEADER.unpack(header)
+    if size > max_size:
+        raise FrameError(f"Message de {size} octets > limite {max_size}")
+
+    try:
+        return await reader.readexactly(size)
+    except asyncio.IncompleteReadError as e:
+        raise FrameError(f"Connexion fermée après {len(e.partial)}/{size} octets") from e
+
+
+async def write_frame(writer, data, prefix=b""):
+    """Équivalent asyncio de send_frame."""
+    if isinstance(data, str):
+        data = data.encode()
+
+    header = FRAME_HEADER.pack(len(prefix) + len(data)) + prefix
+
+    if len(data) <= _SMALL_FRAME:
+        writer.write(header + data)
+    else:
+        writer.write(header)
+        writer.write(data)
+
+    await writer.drain()
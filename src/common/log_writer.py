@@ -0,0 +1,133 @@
+import queue
+import threading
+import time
+
+"""
+============================================================
+    ÉCRITURE DES LOGS PAR LOTS (SAE 302)
+------------------------------------------------------------
+log(message) ne touche pas la base : le message part dans une
+file mémoire bornée. Un thread vide la file par lots
+(un executemany + un seul commit par lot) :
+- dès que le lot atteint batch_size messages
+- ou au plus tard flush_interval secondes après le 1er message
+- file pleine : message abandonné (compté) ou attente (block=True)
+- close() écrit ce qui reste avant de rendre la main
+============================================================
+"""
+
+LOG_BATCH_SIZE = 200
+LOG_FLUSH_INTERVAL = 1.0
+LOG_QUEUE_SIZE = 10000
+
+# Marqueur de fin dans la file
+_CLOSE = object()
+
+
+class LogWriter:
+    """
+    write_batch(lignes) reçoit une liste de (message, horodatage)
+    et l'écrit en une fois (levée d'exception = lot perdu, affiché).
+    """
+
+    def __init__(self, write_batch, batch_size=LOG_BATCH_SIZE,
+                 flush_interval=LOG_FLUSH_INTERVAL, maxsize=LOG_QUEUE_SIZE, block=False):
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block = block
+
+        self._queue = queue.Queue(maxsize)
+        self.closed = False
+
+        # Statistiques
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def log(self, message):
+        """Ajoute une ligne ; ne bloque jamais sauf si block=True."""
+        if self.closed:
+            return False
+
+        entry = (message, time.strftime("%Y-%m-%d %H:%M:%S"))
+        try:
+            self._queue.put(entry, block=self.block)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout=None):
+        """Attend que tout ce qui a été déposé soit écrit (après close() : rien à attendre)."""
+        if self.closed:
+            # close() écrit les lignes restantes avant d'arrêter le thread
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=None):
+        """Écrit les lignes restantes puis arrête le thread."""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.put(_CLOSE)
+        self._thread.join(timeout)
+
+    # ============================================================
+    #   THREAD D'ÉCRITURE
+    # ============================================================
+    def _run(self):
+        batch = []
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None   # délai écoulé
+
+            if isinstance(item, tuple):
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(batch) < self.batch_size:
+                    continue
+
+            # Lot plein, délai écoulé, flush() ou close()
+            if batch:
+                self._write(batch)
+                batch = []
+            deadline = None
+
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is _CLOSE:
+                self._release_flushes()
+                return
+
+    def _release_flushes(self):
+        """flush() appelé pendant close() : son marqueur est derrière _CLOSE."""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def _write(self, batch):
+        try:
+            self.write_batch(batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.dropped += len(batch)
+            print(f"[LOG] ❌ Lot de {len(batch)} logs perdu : {e}")
@@ -1,4 +1,73 @@
-from .crypto import RSAEncryption
+import base64
+
+from .crypto import (
+    RSAEncryption, StreamCipher, block_sizes, encrypt_blocks, decrypt_blocks,
+    encrypt_text_blocks, decrypt_text_blocks,
+)
+from .wire import (
+    FORMAT_TEXT, FORMAT_BINARY, FORMAT_HYBRID, KIND_RSA_UNITS, KIND_HYBRID,
+    is_binary, pack_layer, pack_units, unpack_units, unpack_header,
+    pack_hybrid_layer, unpack_hybrid_body,
+)
+
+# Destination finale avec accusé de réception :
+#   "clientB;receipt=<oignon de retour, base64>;via=<1er routeur du retour>"
+# L'oignon de retour est construit par l'expéditeur (chemin de retour choisi
+# par lui, message final "RECEIPT <jeton>") : la sortie le remet au premier
+# routeur du retour sans savoir à qui il revient.
+RECEIPT_FIELD = "receipt"
+VIA_FIELD = "via"
+
+
+def receipt_destination(destination, reply_hop, reply_onion):
+    """Destination demandant à la sortie d'envoyer 'reply_onion' à 'reply_hop' après livraison."""
+    if isinstance(reply_onion, str):
+        reply_onion = reply_onion.encode()
+    encoded = base64.b64encode(reply_onion).decode()
+    return f"{destination};{RECEIPT_FIELD}={encoded};{VIA_FIELD}={reply_hop}"
+
+
+def split_destination(next_hop):
+    """Sépare "clientB;receipt=...;via=router4" → ("clientB", ("router4", oignon de retour))."""
+    name, sep, options = next_hop.partition(";")
+    if not sep:
+        return next_hop, None
+
+    fields = dict(option.partition("=")[::2] for option in options.split(";"))
+    if RECEIPT_FIELD in fields and VIA_FIELD in fields:
+        try:
+            return name, (fields[VIA_FIELD], base64.b64decode(fields[RECEIPT_FIELD], validate=True))
+        except ValueError:
+            return name, None
+    return name, None
+
+
+def split_text_layer(decrypted_text):
+    """Couche texte déchiffrée → (next_hop, payload) ; couche finale → (None, message)."""
+    # "router4|15,82,123,..." OU "clientB|Bonjour"
+    parts = decrypted_text.split("|", 1)
+
+    if len(parts) == 2:
+        return parts[0], parts[1]   # next_hop, couche suivante
+
+    # Couche finale → pas de next hop
+    return None, decrypted_text
+
+
+def split_binary_layer(decrypted):
+    """
+    Couche binaire déchiffrée → (next_hop, payload)
+    - payload = couche binaire suivante (bytes)
+    - ou message final (texte) si ce n'est plus une couche
+    """
+    next_hop, sep, payload = decrypted.partition(b"|")
+    if not sep:
+        return None, decrypted.decode()
+
+    if not is_binary(payload):
+        payload = payload.decode()
+
+    return next_hop.decode(), payload
 
 
 class OnionRouter:
@@ -10,10 +79,21 @@ class OnionRouter:
     - Les routeurs NE convertissent PAS en base64
     - Les couches intermédiaires restent des LISTES d'entiers RSA
     - Seule la couche FINALE vers clientB est du texte clair
+
+    Format des couches (wire_format) :
+    - "text"   : entiers séparés par des virgules (historique)
+    - "binary" : en-tête versionné + unités 16 bits (voir wire.py)
+    - "hybrid" : RSA ne chiffre qu'une clé de session par couche,
+                 les données passent par StreamCipher → surcoût
+                 constant par saut (chaînes de 5 à 7 routeurs)
     """
 
-    def __init__(self):
+    def __init__(self, wire_format=FORMAT_TEXT):
+        if wire_format not in (FORMAT_TEXT, FORMAT_BINARY, FORMAT_HYBRID):
+            raise ValueError(f"Format inconnu : {wire_format}")
+
         self.crypto = RSAEncryption()
+        self.wire_format = wire_format
 
     # ============================================================
     #   CRÉATION DU MESSAGE EN OIGNON (CÔTÉ CLIENT)
@@ -26,8 +106,12 @@ class OnionRouter:
             next_hop|liste_chiffrée
         
         Le premier routeur reçoit la liste chiffrée la plus externe.
+        En format binaire / hybride, le résultat est en octets (bytes).
         """
 
+        if self.wire_format != FORMAT_TEXT:
+            return self._create_binary_onion(message, destination, router_chain, router_public_keys)
+
         final_payload = f"{destination}|{message}"
         current_layer = None
 
@@ -52,6 +136,55 @@ class OnionRouter:
 
         return current_layer
 
+    def create_onion_messages(self, batch):
+        """
+        Plusieurs oignons d'un coup : batch = [(message, destination, chaîne, clés), ...].
+        Vectorisé avec NumPy s'il est installé (voir batch.py), sinon un par un.
+        """
+        from .batch import create_onion_messages
+        return create_onion_messages(self, batch)
+
+    def _create_binary_onion(self, message, destination, router_chain, router_public_keys):
+        """Même construction, mais chaque couche = en-tête + octets chiffrés."""
+
+        current_layer = f"{destination}|{message}".encode()
+
+        for i in range(len(router_chain) - 1, -1, -1):
+            pub_key = router_public_keys[router_chain[i]]
+
+            if i < len(router_chain) - 1:
+                current_layer = router_chain[i + 1].encode() + b"|" + current_layer
+
+            current_layer = self._seal_layer(current_layer, pub_key)
+
+        return current_layer
+
+    def _seal_layer(self, data, public_key):
+        """Octets clairs → couche binaire (blocs RSA ou hybride)."""
+        width = block_sizes(public_key[1])[1]
+
+        if self.wire_format == FORMAT_HYBRID:
+            session_key = StreamCipher.new_key()
+            wrapped_key = pack_units(encrypt_blocks(session_key, public_key), width)
+            return pack_hybrid_layer(wrapped_key, StreamCipher(session_key).encrypt(data))
+
+        return pack_layer(encrypt_blocks(data, public_key), width)
+
+    def _open_layer(self, layer, private_key):
+        """Couche binaire (tout type) → octets clairs."""
+        width = block_sizes(private_key[1])[1]
+        kind, body = unpack_header(layer)
+
+        if kind == KIND_RSA_UNITS:
+            return decrypt_blocks(unpack_units(body, width), private_key)
+
+        if kind == KIND_HYBRID:
+            wrapped_key, ciphertext = unpack_hybrid_body(body)
+            session_key = decrypt_blocks(unpack_units(wrapped_key, width), private_key)
+            return StreamCipher(session_key).decrypt(ciphertext)
+
+        raise ValueError(f"Type de couche inconnu : {kind}")
+
     # ============================================================
     #   TRAITEMENT D’UNE COUCHE (CÔTÉ ROUTEUR)
     # ============================================================
@@ -61,22 +194,31 @@ class OnionRouter:
         Il doit :
             1) Déchiffrer RSA → obtenir "next_hop|payload"
             2) Retourner (next_hop, payload)
+
+        Une couche binaire (bytes) est détectée automatiquement.
         """
 
+        if is_binary(encrypted_layer_str):
+            return self._process_binary_layer(encrypted_layer_str, private_key)
+
+        if isinstance(encrypted_layer_str, (bytes, bytearray)):
+            encrypted_layer_str = encrypted_layer_str.decode()
+
         # Convertir "12,54,98" → [12,54,98]
         encrypted_list = [int(x) for x in encrypted_layer_str.split(",")]
 
         # RSA → texte clair
         decrypted_text = self._decrypt_layer(encrypted_list, private_key)
+        return split_text_layer(decrypted_text)
 
-        # "router4|15,82,123,..." OU "clientB|Bonjour"
-        parts = decrypted_text.split("|", 1)
-
-        if len(parts) == 2:
-            return parts[0], parts[1]   # next_hop, couche suivante
+    def process_onion_layers(self, layers, private_key):
+        """Plusieurs couches pour la même clé → [(next_hop, payload) ou ValueError, ...] (voir batch.py)."""
+        from .batch import process_onion_layers
+        return process_onion_layers(self, layers, private_key)
 
-        # Couche finale → pas de next hop
-        return None, decrypted_text
+    def _process_binary_layer(self, layer, private_key):
+        """Couche binaire → (next_hop, payload), voir split_binary_layer."""
+        return split_binary_layer(self._open_layer(layer, private_key))
 
     # ============================================================
     #       CHIFFREMENT INTERNE (RSA → LISTE D’ENTIERS)
@@ -84,14 +226,10 @@ class OnionRouter:
     def _encrypt_layer(self, text, public_key):
         """
         Chiffre chaque caractère du texte → entier RSA.
+        (Lecture dans la table précalculée de la clé, sans pow() ;
+        grandes clés : un entier par bloc, voir crypto.encrypt_blocks.)
         """
-        e, n = public_key
-        encrypted = []
-
-        for c in text:
-            encrypted.append(pow(ord(c), e, n))
-
-        return encrypted
+        return encrypt_text_blocks(text, public_key)
 
     # ============================================================
     #       DÉCHIFFREMENT INTERNE (RSA → TEXTE)
@@ -102,11 +240,5 @@ class OnionRouter:
         
         (Cette version ne fait PLUS aucune conversion en base64.)
         """
-        d, n = private_key
-        out = ""
-
-        for enc in encrypted_list:
-            val = pow(enc, d, n)
-            out += chr(val)   # OK car payload reste texte ASCII simple
-
-        return out
+        # OK car payload reste texte ASCII simple
+        return decrypt_text_blocks(encrypted_list, private_key)
@@ -0,0 +1,461 @@
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from .framing import MAX_FRAME_SIZE, recv_frame, send_frame, read_frame, write_frame
+from .startup import lazy_import
+
+# Importé au premier usage : le routeur synchrone ne charge pas asyncio
+asyncio = lazy_import("asyncio")
+
+"""
+============================================================
+    LIENS PERSISTANTS ENTRE ROUTEURS (SAE 302)
+------------------------------------------------------------
+Au lieu d'une connexion TCP par message :
+- Un pool de liens longue durée par saut suivant (ip, port)
+- Plusieurs messages multiplexés sur un même lien :
+      1er message du lien : LINK_HELLO
+      ensuite            : [id flux 4 octets][données]
+      réponse            : [même id flux][réponse]
+- Vérification de santé (ping = message vide) et fermeture
+  des liens inactifs
+- Toute requête a un délai (REQUEST_TIMEOUT) : un pair qui
+  accepte un message sans jamais répondre ne bloque plus un
+  worker ; côté récepteur, au plus LINK_WORKERS messages d'un
+  lien traités en même temps
+- Versions asyncio (AsyncMuxLink / AsyncLinkPool) pour AsyncRouterServer
+============================================================
+"""
+
+LINK_HELLO = b"LINK/1"
+STREAM_ID = struct.Struct(">I")
+
+# Attente maximale d'une réponse sur un lien (secondes)
+REQUEST_TIMEOUT = 30.0
+
+# Messages d'un même lien traités en parallèle par le récepteur
+LINK_WORKERS = 32
+
+
+class LinkError(ConnectionError):
+    """Lien indisponible ou perdu."""
+
+
+class LinkSendError(LinkError):
+    """Le message n'a pas été envoyé : on peut réessayer sur un autre lien."""
+
+
+# ============================================================
+#   UN LIEN MULTIPLEXÉ (CÔTÉ ÉMETTEUR)
+# ============================================================
+class MuxLink:
+    """Connexion TCP persistante transportant plusieurs flux en parallèle."""
+
+    def __init__(self, address, connect_timeout=5.0, max_frame=MAX_FRAME_SIZE):
+        self.address = address
+        self.max_frame = max_frame
+
+        self.sock = socket.create_connection(address, timeout=connect_timeout)
+        self.sock.settimeout(None)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        send_frame(self.sock, LINK_HELLO)
+
+        self._lock = threading.Lock()          # flux en attente
+        self._write_lock = threading.Lock()    # un seul envoi à la fois
+        self._pending = {}
+        self._next_id = 1
+
+        # last_used : dernier vrai message (pings exclus) → éviction des liens inactifs
+        # last_sent : dernier envoi, ping compris → un ping au plus par health_interval
+        self.closed = False
+        self.last_used = self.last_sent = time.monotonic()
+
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+    @property
+    def in_flight(self):
+        """Nombre de messages envoyés qui attendent leur réponse."""
+        return len(self._pending)
+
+    def submit(self, data):
+        """
+        Envoie un message → (id flux, Future de la réponse).
+        LinkSendError = rien n'a été envoyé (on peut réessayer ailleurs).
+        """
+        future = Future()
+
+        with self._lock:
+            if self.closed:
+                raise LinkSendError(f"Lien {self.address} fermé")
+            stream_id = self._next_id
+            self._next_id = self._next_id % 0xFFFFFFFF + 1
+            self._pending[stream_id] = future
+
+        try:
+            with self._write_lock:
+                send_frame(self.sock, data, STREAM_ID.pack(stream_id))
+        except OSError as e:
+            self._fail(e)
+            raise LinkSendError(f"Envoi impossible sur {self.address} : {e}") from e
+
+        self.last_sent = time.monotonic()
+        if data:
+            self.last_used = self.last_sent
+        return stream_id, future
+
+    def wait(self, stream_id, future, timeout=REQUEST_TIMEOUT):
+        """Attend la réponse d'un flux (bytearray)."""
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            with self._lock:
+                self._pending.pop(stream_id, None)
+            raise
+
+    def request(self, data, timeout=REQUEST_TIMEOUT):
+        stream_id, future = self.submit(data)
+        return self.wait(stream_id, future, timeout)
+
+    def ping(self, timeout=2.0):
+        """Vérifie que le pair répond encore (message vide, ne compte pas comme trafic)."""
+        try:
+            self.request(b"", timeout)
+            return True
+        except (OSError, FutureTimeout):
+            return False
+
+    def _read_loop(self):
+        try:
+            while True:
+                frame = recv_frame(self.sock, self.max_frame)
+                if frame is None:
+                    raise LinkError("fermé par le pair")
+
+                (stream_id,) = STREAM_ID.unpack_from(frame)
+                del frame[:STREAM_ID.size]
+
+                with self._lock:
+                    future = self._pending.pop(stream_id, None)
+                if future is not None:
+                    future.set_result(frame)
+
+        except (OSError, struct.error) as e:
+            self._fail(e)
+
+    def _fail(self, error):
+        with self._lock:
+            if self.closed and not self._pending:
+                return
+            self.closed = True
+            pending, self._pending = self._pending, {}
+
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(LinkError(f"Lien {self.address} perdu : {error}"))
+
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+    def close(self):
+        self._fail("fermeture")
+
+
+# ============================================================
+#   POOL DE LIENS PAR SAUT SUIVANT
+# ============================================================
+class LinkPool:
+    """
+    Liens persistants indexés par (ip, port) du saut suivant.
+    - max_links   : liens ouverts au maximum par saut
+    - max_streams : au-delà, on ouvre un lien de plus (si possible)
+    - idle_timeout: un lien sans vrai message depuis plus longtemps est fermé
+                    (les pings de santé ne le maintiennent pas ouvert)
+    """
+
+    def __init__(self, max_links=2, max_streams=32, idle_timeout=60.0,
+                 health_interval=10.0, connect_timeout=5.0, max_frame=MAX_FRAME_SIZE):
+        self.max_links = max_links
+        self.max_streams = max_streams
+        self.idle_timeout = idle_timeout
+        self.health_interval = health_interval
+        self.connect_timeout = connect_timeout
+        self.max_frame = max_frame
+
+        self._links = {}
+        self._connecting = {}
+        self._lock = threading.Lock()
+        self._janitor = None
+
+    def request(self, address, data, timeout=REQUEST_TIMEOUT):
+        """Envoie data au saut 'address' et retourne sa réponse (TimeoutError après 'timeout')."""
+        address = tuple(address)
+
+        # Un lien mort découvert à l'envoi → un seul nouvel essai
+        for attempt in range(2):
+            link = self._acquire(address)
+            try:
+                stream_id, future = link.submit(data)
+            except LinkSendError:
+                if attempt:
+                    raise
+                continue
+            return link.wait(stream_id, future, timeout)
+
+    def _acquire(self, address):
+        with self._lock:
+            self._start_janitor()
+            link = self._pick(address)
+            if link is not None:
+                return link
+            connect_lock = self._connecting.setdefault(address, threading.Lock())
+
+        # Une seule ouverture de lien à la fois par saut
+        with connect_lock:
+            with self._lock:
+                link = self._pick(address)
+                if link is not None:
+                    return link
+
+            link = MuxLink(address, self.connect_timeout, self.max_frame)
+            with self._lock:
+                self._links.setdefault(address, []).append(link)
+            return link
+
+    def _pick(self, address):
+        """Lien le moins chargé, ou None s'il faut en ouvrir un (verrou tenu)."""
+        links = [link for link in self._links.get(address, []) if not link.closed]
+        self._links[address] = links
+
+        best = min(links, key=lambda link: link.in_flight, default=None)
+        if best is not None and (best.in_flight < self.max_streams
+                                 or len(links) >= self.max_links):
+            return best
+        return None
+
+    # ============================================================
+    #   SANTÉ + ÉVICTION DES LIENS INACTIFS
+    # ============================================================
+    def _start_janitor(self):
+        if self._janitor is None:
+            self._janitor = threading.Thread(target=self._janitor_loop, daemon=True)
+            self._janitor.start()
+
+    def _janitor_loop(self):
+        while True:
+            time.sleep(self.health_interval)
+            self.check_links()
+
+    def check_links(self):
+        """Ferme les liens morts ou inactifs, ping les liens au repos."""
+        now = time.monotonic()
+
+        with self._lock:
+            links = [link for group in self._links.values() for link in group]
+
+        for link in links:
+            if link.closed or link.in_flight:
+                continue
+            if now - link.last_used > self.idle_timeout:
+                link.close()
+            elif now - link.last_sent > self.health_interval and not link.ping():
+                link.close()
+
+        with self._lock:
+            for address in list(self._links):
+                alive = [link for link in self._links[address] if not link.closed]
+                if alive:
+                    self._links[address] = alive
+                else:
+                    del self._links[address]
+
+    def close(self):
+        with self._lock:
+            links = [link for group in self._links.values() for link in group]
+            self._links.clear()
+        for link in links:
+            link.close()
+
+
+# ============================================================
+#   VERSIONS ASYNCIO
+# ============================================================
+class AsyncMuxLink:
+    """Équivalent asyncio de MuxLink (une tâche de lecture par lien)."""
+
+    def __init__(self, address, max_frame=MAX_FRAME_SIZE):
+        self.address = address
+        self.max_frame = max_frame
+        self.reader = None
+        self.writer = None
+
+        self._write_lock = asyncio.Lock()
+        self._pending = {}
+        self._next_id = 1
+        self._reader_task = None
+
+        self.closed = False
+        self.last_used = time.monotonic()
+
+    async def connect(self, connect_timeout=5.0):
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(*self.address), connect_timeout
+        )
+        await write_frame(self.writer, LINK_HELLO)
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    @property
+    def in_flight(self):
+        return len(self._pending)
+
+    async def request(self, data, timeout=REQUEST_TIMEOUT):
+        if self.closed:
+            raise LinkSendError(f"Lien {self.address} fermé")
+
+        stream_id = self._next_id
+        self._next_id = self._next_id % 0xFFFFFFFF + 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[stream_id] = future
+
+        try:
+            async with self._write_lock:
+                await write_frame(self.writer, data, STREAM_ID.pack(stream_id))
+        except OSError as e:
+            self._pending.pop(stream_id, None)
+            self._fail(e)
+            raise LinkSendError(f"Envoi impossible sur {self.address} : {e}") from e
+
+        self.last_used = time.monotonic()
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(stream_id, None)
+
+    async def _read_loop(self):
+        try:
+            while True:
+                frame = await read_frame(self.reader, self.max_frame)
+                if frame is None:
+                    raise LinkError("fermé par le pair")
+
+                (stream_id,) = STREAM_ID.unpack_from(frame)
+                future = self._pending.pop(stream_id, None)
+                if future is not None and not future.done():
+                    future.set_result(frame[STREAM_ID.size:])
+
+        except (OSError, struct.error) as e:
+            self._fail(e)
+
+    def _fail(self, error):
+        self.closed = True
+        pending, self._pending = self._pending, {}
+
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(LinkError(f"Lien {self.address} perdu : {error}"))
+
+        if self.writer is not None:
+            self.writer.close()
+
+    def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        self._fail("fermeture")
+
+
+class AsyncLinkPool:
+    """
+    Un lien asyncio multiplexé par saut suivant, rouvert s'il tombe.
+    Ni ping de santé ni éviction des liens inactifs (contrairement à LinkPool) :
+    un lien mort n'est découvert qu'au prochain envoi, et reste ouvert sinon.
+    """
+
+    def __init__(self, connect_timeout=5.0, max_frame=MAX_FRAME_SIZE):
+        self.connect_timeout = connect_timeout
+        self.max_frame = max_frame
+        self._links = {}
+        self._connecting = {}
+
+    async def request(self, address, data, timeout=REQUEST_TIMEOUT):
+        address = tuple(address)
+
+        for attempt in range(2):
+            link = await self._acquire(address)
+            try:
+                return await link.request(data, timeout)
+            except LinkSendError:
+                # Lien mort avant l'envoi → un seul nouvel essai
+                if attempt:
+                    raise
+
+    async def _acquire(self, address):
+        link = self._links.get(address)
+        if link is not None and not link.closed:
+            return link
+
+        lock = self._connecting.setdefault(address, asyncio.Lock())
+        async with lock:
+            link = self._links.get(address)
+            if link is None or link.closed:
+                link = AsyncMuxLink(address, self.max_frame)
+                await link.connect(self.connect_timeout)
+                self._links[address] = link
+        return link
+
+    def close(self):
+        for link in self._links.values():
+            link.close()
+        self._links.clear()
+
+
+# ============================================================
+#   CÔTÉ RÉCEPTEUR : SERVIR UN LIEN MULTIPLEXÉ
+# ============================================================
+def serve_link(conn, handler, max_frame=MAX_FRAME_SIZE, workers=LINK_WORKERS):
+    """
+    Lit les flux d'un lien (après LINK_HELLO) et répond à chacun.
+    handler(données) → réponse ; au plus 'workers' flux traités en même temps
+    (au-delà, on arrête de lire : TCP freine l'émetteur).
+    """
+    write_lock = threading.Lock()
+    slots = threading.BoundedSemaphore(workers)
+    executor = ThreadPoolExecutor(workers)
+
+    def answer(stream_id, body):
+        try:
+            # Message vide = ping
+            reply = handler(body) if body else b""
+        except Exception as e:
+            reply = f"ERREUR : {e}".encode()
+        finally:
+            slots.release()
+
+        with write_lock:
+            try:
+                send_frame(conn, reply, STREAM_ID.pack(stream_id))
+            except OSError:
+                pass
+
+    try:
+        while True:
+            frame = recv_frame(conn, max_frame)
+            if frame is None:
+                break
+
+            (stream_id,) = STREAM_ID.unpack_from(frame)
+            del frame[:STREAM_ID.size]
+
+            slots.acquire()
+            executor.submit(answer, stream_id, frame)
+
+    except (OSError, struct.error) as e:
+        print(f"[LINK] Lien interrompu : {e}")
+
+    finally:
+        executor.shutdown(wait=False)
+        conn.close()
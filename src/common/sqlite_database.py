@@ -0,0 +1,203 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from src.common.log_writer import LogWriter
+
+"""
+============================================================
+    BASE EMBARQUÉE SQLITE (SAE 302)
+------------------------------------------------------------
+Même API que DatabaseManager (MariaDB), sans serveur :
+- un fichier, mode WAL (lectures pendant les écritures)
+- une connexion par thread (les connexions SQLite ne se partagent pas)
+- clé unique sur name → enregistrement = une seule requête (upsert)
+- logs écrits par lots, une transaction par lot
+============================================================
+"""
+
+DB_PATH = "onion_network.db"
+
+# Attente max d'un verrou d'écriture (secondes)
+SQLITE_TIMEOUT = 5.0
+
+# n en décimal (TEXT) : un INTEGER SQLite s'arrête à 64 bits
+ROUTERS_TABLE = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE,
+        ip TEXT,
+        port INTEGER,
+        public_e INTEGER,
+        public_n TEXT
+    )
+"""
+
+
+class SQLiteDatabase:
+    """Stockage du MASTER dans un fichier SQLite local."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+        self._create_tables()
+
+        # Logs écrits par lots en arrière-plan (voir log_writer.py)
+        self.log_writer = LogWriter(self._write_logs)
+
+    # ============================================================
+    # CONNEXIONS (UNE PAR THREAD)
+    # ============================================================
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        yield self._connection()
+
+    @contextmanager
+    def cursor(self, commit=False):
+        """Même usage que DatabaseManager.cursor()."""
+        conn = self._connection()
+        cur = conn.cursor()
+        try:
+            yield cur
+            if commit:
+                conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+    # ============================================================
+    # CRÉATION TABLES + INDEX
+    # ============================================================
+    def _create_tables(self):
+        with self.cursor(commit=True) as cur:
+            cur.execute(ROUTERS_TABLE.format(name="routers"))
+
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    message TEXT,
+                    timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs (timestamp)")
+
+        self._migrate_routers()
+
+    def _migrate_routers(self):
+        """Ancien fichier (n en INTEGER) : table recopiée avec n en TEXT."""
+        with self.cursor(commit=True) as cur:
+            cur.execute("SELECT type FROM pragma_table_info('routers') WHERE name = 'public_n'")
+            row = cur.fetchone()
+            if row is None or row[0].upper() == "TEXT":
+                return
+
+            print("[DB] Migration de la table routers (grandes clés)...")
+            cur.execute(ROUTERS_TABLE.format(name="routers_new"))
+            cur.execute(
+                "INSERT INTO routers_new (id, name, ip, port, public_e, public_n) "
+                "SELECT id, name, ip, port, public_e, CAST(public_n AS TEXT) FROM routers"
+            )
+            cur.execute("DROP TABLE routers")
+            cur.execute("ALTER TABLE routers_new RENAME TO routers")
+
+    # ============================================================
+    # ROUTEURS
+    # ============================================================
+    def remove_router(self, name):
+        try:
+            with self.cursor(commit=True) as cur:
+                cur.execute("DELETE FROM routers WHERE name = ?", (name,))
+        except sqlite3.Error as e:
+            print(f"[ERREUR] Suppression routeur impossible : {e}")
+
+    def add_router(self, name, ip, port, public_key):
+        """Ajoute ou met à jour un routeur (public_key = (e, n))."""
+        e, n = public_key
+        try:
+            with self.cursor(commit=True) as cur:
+                cur.execute(
+                    "INSERT INTO routers (name, ip, port, public_e, public_n) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET ip = excluded.ip, port = excluded.port, "
+                    "public_e = excluded.public_e, public_n = excluded.public_n",
+                    (name, ip, port, e, str(n))
+                )
+            print(f"[DB] Routeur {name} enregistré.")
+        except sqlite3.Error as e:
+            print(f"[ERREUR] Ajout routeur impossible : {e}")
+
+    def get_routers(self):
+        try:
+            with self.cursor() as cur:
+                cur.execute("SELECT name, ip, port, public_e, public_n FROM routers")
+                rows = cur.fetchall()
+
+            return [
+                {"name": row[0], "ip": row[1], "port": row[2], "public_key": (row[3], int(row[4]))}
+                for row in rows
+            ]
+
+        except sqlite3.Error as e:
+            print(f"[ERREUR] Récupération routeurs impossible : {e}")
+            return []
+
+    # ============================================================
+    # LOGS
+    # ============================================================
+    def add_log(self, message):
+        """Dépose le log dans la file (écrit plus tard, par lots)."""
+        self.log_writer.log(message)
+
+    def _write_logs(self, batch):
+        """Un lot de (message, horodatage) : une seule transaction."""
+        with self.cursor(commit=True) as cur:
+            cur.executemany("INSERT INTO logs (message, timestamp) VALUES (?, ?)", batch)
+
+    def get_logs(self, limit=20):
+        try:
+            with self.cursor() as cur:
+                cur.execute("SELECT message, timestamp FROM logs ORDER BY id DESC LIMIT ?", (limit,))
+                return cur.fetchall()
+        except sqlite3.Error as e:
+            print(f"[ERREUR] Récupération logs impossible : {e}")
+            return []
+
+    def get_logs_since(self, last_id=0, limit=200):
+        """
+        Logs plus récents que last_id : [(id, message, horodatage)] par id croissant
+        (au plus les 'limit' derniers). Utilisé pour les mises à jour incrémentales.
+        """
+        try:
+            with self.cursor() as cur:
+                cur.execute(
+                    "SELECT id, message, timestamp FROM ("
+                    "SELECT id, message, timestamp FROM logs WHERE id > ? ORDER BY id DESC LIMIT ?"
+                    ") AS recent ORDER BY id",
+                    (last_id, limit)
+                )
+                return cur.fetchall()
+        except sqlite3.Error as e:
+            print(f"[ERREUR] Récupération logs impossible : {e}")
+            return []
+
+    def close(self):
+        self.log_writer.close()
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
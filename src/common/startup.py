@@ -0,0 +1,154 @@
+import errno
+import importlib
+import os
+import socket
+import time
+
+"""
+============================================================
+    DÉMARRAGE RAPIDE (SAE 302)
+------------------------------------------------------------
+- bind_listener : on tente le bind tout de suite (SO_REUSEADDR :
+  un ancien port en TIME_WAIT ne bloque plus). Seulement si le
+  port est VRAIMENT pris, on cherche le processus qui l'occupe
+  (psutil, importé à ce moment-là) et on réessaie.
+- StartupTimer : durée de chaque étape du démarrage, affichée
+  en une ligne par les points d'entrée (routeur, hôte, MASTER,
+  clients). Créé dans le __main__ : l'étape "imports" est le
+  temps CPU du processus jusque-là, quel que soit l'ordre des imports.
+- lazy_import : module lourd (asyncio...) importé seulement au
+  premier attribut utilisé.
+============================================================
+"""
+
+# Nouvelles tentatives de bind après avoir libéré le port
+BIND_RETRIES = 20
+BIND_RETRY_DELAY = 0.05
+
+
+# ============================================================
+#   PORT D'ÉCOUTE
+# ============================================================
+def bind_listener(host, port, name="", backlog=128):
+    """Socket TCP en écoute sur (host, port) ; port 0 → choisi par le système."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+    # Sous Windows, SO_REUSEADDR permettrait de voler un port déjà en écoute
+    if os.name != "nt":
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+    try:
+        try:
+            sock.bind((host, port))
+        except OSError as e:
+            if e.errno != errno.EADDRINUSE:
+                raise
+
+            print(f"[{name}] ⚠ Port {port} occupé, arrêt du processus qui l'utilise...")
+            free_port(port, name)
+            _bind_retry(sock, host, port)
+
+        sock.listen(backlog)
+        return sock
+
+    except OSError:
+        sock.close()
+        raise
+
+
+def _bind_retry(sock, host, port):
+    for _ in range(BIND_RETRIES):
+        time.sleep(BIND_RETRY_DELAY)
+        try:
+            sock.bind((host, port))
+            return
+        except OSError as e:
+            if e.errno != errno.EADDRINUSE:
+                raise
+    sock.bind((host, port))
+
+
+def free_port(port, name=""):
+    """Arrête le(s) processus en écoute sur 'port' (dernier recours : psutil)."""
+    import psutil
+
+    for pid in _listening_pids(psutil, port):
+        if pid == os.getpid():
+            continue
+        try:
+            print(f"[{name}] ⚠ Port {port} occupé, arrêt PID {pid}")
+            psutil.Process(pid).kill()
+        except psutil.Error as e:
+            print(f"[{name}] ❌ Arrêt de PID {pid} impossible : {e}")
+
+
+def _listening_pids(psutil, port):
+    try:
+        # Une seule lecture de la table des connexions du système
+        return {conn.pid for conn in psutil.net_connections(kind="inet")
+                if conn.pid and conn.laddr and conn.laddr.port == port
+                and conn.status == psutil.CONN_LISTEN}
+
+    except psutil.AccessDenied:
+        # Sans droits (macOS) : processus par processus
+        pids = set()
+        for proc in psutil.process_iter(["pid"]):
+            try:
+                if any(conn.laddr.port == port and conn.status == psutil.CONN_LISTEN
+                       for conn in proc.net_connections(kind="inet")):
+                    pids.add(proc.pid)
+            except psutil.Error:
+                continue
+        return pids
+
+
+# ============================================================
+#   TEMPS DE DÉMARRAGE
+# ============================================================
+class StartupTimer:
+    """
+    timer = StartupTimer("router1")   → étape "imports" déjà comptée
+    timer.mark("clés")                → durée depuis l'étape précédente
+    timer.report()                    → une ligne avec toutes les étapes
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+        # Lancement de Python + imports : temps CPU consommé avant le __main__
+        self.steps = [("imports", time.process_time())]
+        self._last = time.perf_counter()
+
+    def mark(self, step):
+        now = time.perf_counter()
+        self.steps.append((step, now - self._last))
+        self._last = now
+
+    def total(self):
+        return sum(duration for _, duration in self.steps)
+
+    def report(self):
+        details = " | ".join(f"{step} {duration * 1000:.1f} ms" for step, duration in self.steps)
+        print(f"[DÉMARRAGE {self.name}] {details} | total {self.total() * 1000:.1f} ms")
+
+
+# ============================================================
+#   IMPORTS PARESSEUX
+# ============================================================
+class _LazyModule:
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        # Appelé seulement pour un attribut pas encore copié ici
+        value = getattr(importlib.import_module(self._name), attr)
+        setattr(self, attr, value)
+        return value
+
+
+def lazy_import(name):
+    """
+    asyncio = lazy_import("asyncio") en tête de module : rien n'est importé
+    avant le premier asyncio.xxx (un routeur synchrone ne le charge jamais).
+    """
+    return _LazyModule(name)
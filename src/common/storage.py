@@ -0,0 +1,37 @@
+import os
+
+"""
+============================================================
+    CHOIX DU STOCKAGE DU MASTER (SAE 302)
+------------------------------------------------------------
+backend = "mariadb" (serveur, par défaut) ou "sqlite" (fichier local)
+Choix par argument ou par variable d'environnement :
+    SAE302_DB_BACKEND=sqlite SAE302_DB_PATH=/tmp/onion.db python -m src.master.master_server
+Les deux backends ont la même API (add_router, get_routers, add_log...).
+============================================================
+"""
+
+BACKEND_MARIADB = "mariadb"
+BACKEND_SQLITE = "sqlite"
+
+DEFAULT_BACKEND = BACKEND_MARIADB
+
+
+def open_database(backend=None, path=None, **mariadb_options):
+    """
+    Ouvre la base du MASTER.
+    - path           : fichier SQLite (ignoré pour MariaDB)
+    - mariadb_options: host, user, password, database, pool_size (ignorés pour SQLite)
+    """
+    backend = backend or os.environ.get("SAE302_DB_BACKEND", DEFAULT_BACKEND)
+
+    # Import à la demande : SQLite ne nécessite pas le module mariadb
+    if backend == BACKEND_SQLITE:
+        from src.common.sqlite_database import SQLiteDatabase, DB_PATH
+        return SQLiteDatabase(path or os.environ.get("SAE302_DB_PATH", DB_PATH))
+
+    if backend == BACKEND_MARIADB:
+        from src.common.database import DatabaseManager
+        return DatabaseManager(**mariadb_options)
+
+    raise ValueError(f"Backend de base inconnu : {backend}")
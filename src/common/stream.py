@@ -0,0 +1,221 @@
+import os
+import struct
+import threading
+import time
+from collections import deque
+
+from .pool import REQUEST_TIMEOUT
+from .wire import HEADER, KIND_STREAM_DATA, is_binary, pack_header
+
+"""
+============================================================
+    FLUX DE CELLULES (GROS FICHIERS) (SAE 302)
+------------------------------------------------------------
+Un gros contenu ne voyage plus en un seul message : il est
+découpé en cellules de taille fixe envoyées sur un circuit.
+
+    contenu clair d'une cellule (CELL_SIZE octets) :
+    [id flux 4][numéro 4][drapeaux 1][longueur 2][données, complétées par des zéros]
+
+- Client : fichier lu morceau par morceau (générateurs), au plus
+  STREAM_WINDOW cellules envoyées sans réponse sur un lien multiplexé
+- Routeurs : chaque cellule est déchiffrée et relayée aussitôt,
+  et acquittée seulement quand le saut suivant l'a acceptée ;
+  au plus STREAM_WINDOW cellules en vol par circuit (fenêtre)
+- Sortie : contenu clair remis au client (STREAM_DATA), qui
+  remet les cellules dans l'ordre et écrit au fur et à mesure
+
+Mémoire par circuit bornée par la fenêtre, quelle que soit la
+taille du fichier.
+============================================================
+"""
+
+# Contenu clair d'une cellule, en-tête de flux compris (octets)
+CELL_SIZE = 4096
+
+STREAM_HEADER = struct.Struct(">4sIBH")
+CELL_DATA_SIZE = CELL_SIZE - STREAM_HEADER.size
+STREAM_ID_SIZE = 4
+
+# Drapeau : dernière cellule du flux
+FLAG_END = 1
+
+# Cellules en vol par circuit (client) et relayées en même temps (chaque routeur)
+STREAM_WINDOW = 32
+
+# Réception : flux sans cellule depuis STREAM_IDLE secondes → abandonné (fichier fermé),
+# au plus MAX_STREAMS flux en cours à la fois
+STREAM_IDLE = 120.0
+MAX_STREAMS = 64
+
+
+# ============================================================
+#   CELLULES
+# ============================================================
+def iter_chunks(source, size=CELL_DATA_SIZE):
+    """Octets ou fichier ouvert en binaire → morceaux de 'size' octets (générateur)."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for i in range(0, len(view), size):
+            yield bytes(view[i:i + size])
+        return
+
+    while True:
+        chunk = source.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def pack_stream_data(stream_id, seq, data, end=False):
+    """Contenu clair d'une cellule : en-tête + données complétées à CELL_DATA_SIZE."""
+    header = STREAM_HEADER.pack(stream_id, seq, FLAG_END if end else 0, len(data))
+    return header + data + bytes(CELL_DATA_SIZE - len(data))
+
+
+def unpack_stream_data(cell):
+    """Contenu clair → (id flux, numéro, fin ?, données) ; ValueError si invalide."""
+    if len(cell) != CELL_SIZE:
+        raise ValueError("Cellule de flux de taille invalide")
+
+    stream_id, seq, flags, length = STREAM_HEADER.unpack_from(cell)
+    if length > CELL_DATA_SIZE:
+        raise ValueError("Cellule de flux invalide")
+
+    start = STREAM_HEADER.size
+    return stream_id, seq, bool(flags & FLAG_END), bytes(cell[start:start + length])
+
+
+def stream_payloads(source, stream_id=None):
+    """Source → contenus clairs des cellules, la dernière marquée FLAG_END (générateur)."""
+    stream_id = stream_id or os.urandom(STREAM_ID_SIZE)
+    chunks = iter_chunks(source)
+
+    # Un morceau d'avance : on sait lequel est le dernier
+    current, seq = next(chunks, b""), 0
+    for following in chunks:
+        yield pack_stream_data(stream_id, seq, current)
+        current, seq = following, seq + 1
+
+    yield pack_stream_data(stream_id, seq, current, end=True)
+
+
+def pack_delivery(cell):
+    """Cellule en clair remise par la sortie au client."""
+    return pack_header(KIND_STREAM_DATA) + cell
+
+
+def is_stream_data(frame):
+    return is_binary(frame) and frame[2] == KIND_STREAM_DATA
+
+
+# ============================================================
+#   ENVOI (CLIENT)
+# ============================================================
+def send_stream(link, cells, window=STREAM_WINDOW, timeout=REQUEST_TIMEOUT):
+    """
+    Envoie des cellules sur un MuxLink, au plus 'window' sans réponse.
+    → nombre de cellules envoyées ; ConnectionError si un saut refuse une cellule.
+    """
+    in_flight = deque()
+    sent = 0
+
+    for cell in cells:
+        if len(in_flight) >= window:
+            _check_reply(link.wait(*in_flight.popleft(), timeout))
+        in_flight.append(link.submit(cell))
+        sent += 1
+
+    while in_flight:
+        _check_reply(link.wait(*in_flight.popleft(), timeout))
+
+    return sent
+
+
+def _check_reply(reply):
+    if reply != b"OK":
+        raise ConnectionError(f"Cellule refusée : {bytes(reply).decode(errors='replace')}")
+
+
+# ============================================================
+#   RÉCEPTION (CLIENT)
+# ============================================================
+class StreamReceiver:
+    """
+    Remet les cellules dans l'ordre et écrit les données au fur et à mesure.
+    open_sink(id flux) → fichier ouvert en écriture binaire (fermé en fin de flux,
+    ou quand le flux est abandonné : rien reçu depuis idle_timeout secondes).
+    """
+
+    def __init__(self, open_sink, window=STREAM_WINDOW, idle_timeout=STREAM_IDLE,
+                 max_streams=MAX_STREAMS):
+        self.open_sink = open_sink
+        self.window = window
+        self.idle_timeout = idle_timeout
+        self.max_streams = max_streams
+
+        # id flux → [fichier, numéro attendu, cellules arrivées en avance, octets écrits,
+        #            instant de la dernière cellule]
+        self._streams = {}
+        self._lock = threading.Lock()
+
+        # Flux terminés : id → octets reçus ; flux abandonnés : id → octets écrits
+        self.completed = {}
+        self.expired = {}
+
+    def feed(self, frame):
+        """
+        Une cellule STREAM_DATA → True si elle termine son flux.
+        ValueError si elle est hors fenêtre, ou ouvre un flux de trop.
+        """
+        stream_id, seq, end, data = unpack_stream_data(memoryview(frame)[HEADER.size:])
+        now = time.monotonic()
+
+        with self._lock:
+            # Flux interrompus (émetteur parti) : fichiers fermés avant d'en ouvrir d'autres
+            self._expire(now)
+
+            state = self._streams.get(stream_id)
+            if state is None:
+                if len(self._streams) >= self.max_streams:
+                    raise ValueError(f"Trop de flux en cours (max {self.max_streams})")
+                state = self._streams[stream_id] = [self.open_sink(stream_id), 0, {}, 0, now]
+            state[4] = now
+            sink, expected, early, _, _ = state
+
+            if seq < expected or seq in early:
+                return False    # doublon
+            if seq - expected >= self.window:
+                raise ValueError("Cellule hors fenêtre")
+
+            early[seq] = (data, end)
+
+            # Tout ce qui est maintenant dans l'ordre part sur le disque
+            while expected in early:
+                data, end = early.pop(expected)
+                sink.write(data)
+                state[3] += len(data)
+                expected += 1
+
+                if end:
+                    sink.close()
+                    del self._streams[stream_id]
+                    self.completed[stream_id] = state[3]
+                    return True
+
+            state[1] = expected
+            return False
+
+    def expire_idle(self):
+        """Ferme et oublie les flux inactifs → nombre de flux abandonnés."""
+        with self._lock:
+            return self._expire(time.monotonic())
+
+    def _expire(self, now):
+        idle = [stream_id for stream_id, state in self._streams.items()
+                if now - state[4] >= self.idle_timeout]
+        for stream_id in idle:
+            state = self._streams.pop(stream_id)
+            state[0].close()
+            self.expired[stream_id] = state[3]
+        return len(idle)
@@ -0,0 +1,197 @@
+import struct
+import sys
+from array import array
+
+"""
+============================================================
+    FORMAT BINAIRE DES COUCHES D'OIGNON (SAE 302)
+------------------------------------------------------------
+Couche binaire = en-tête + unités chiffrées :
+
+    [magic 1 octet][version 1 octet][type 1 octet][unités ...]
+
+- magic = 0xA7 : jamais le 1er octet d'un texte UTF-8 valide,
+  on distingue donc sans ambiguïté binaire / texte "12,54,..."
+- Chaque unité est un entier RSA < n, big-endian, sur autant
+  d'octets que n (2 pour les clés 16 bits, 128 pour 1024 bits) :
+  le récepteur connaît son n, donc la taille des unités
+
+Couche hybride (type 2) :
+
+    [en-tête][taille clé 2 octets][clé de session chiffrée RSA][données + MAC]
+
+- RSA ne chiffre que la clé de session (taille constante)
+- Les données sont chiffrées avec StreamCipher (coût linéaire)
+
+Circuits (types 3 et 4, voir circuit.py) :
+
+    CREATE : [en-tête][id circuit 8 octets][corps hybride]
+    CELL   : [en-tête][id circuit 8 octets][nonce 12 octets][données + MACs]
+
+Flux (types 5 et 6, voir stream.py) :
+
+    STREAM_CELL : même forme que CELL, contenu clair de taille fixe
+    STREAM_DATA : [en-tête][contenu clair] → remis par la sortie au client
+============================================================
+"""
+
+WIRE_MAGIC = 0xA7
+WIRE_VERSION = 1
+
+# Types de couche
+KIND_RSA_UNITS = 1
+KIND_HYBRID = 2
+KIND_CIRCUIT_CREATE = 3
+KIND_CIRCUIT_CELL = 4
+KIND_STREAM_CELL = 5
+KIND_STREAM_DATA = 6
+
+# Formats proposés par OnionRouter
+FORMAT_TEXT = "text"
+FORMAT_BINARY = "binary"
+FORMAT_HYBRID = "hybrid"
+
+HEADER = struct.Struct(">BBB")
+KEY_LENGTH = struct.Struct(">H")
+
+# Taille d'une unité pour les clés 16 bits (octets)
+UNIT_SIZE = 2
+
+CIRCUIT_ID_SIZE = 8
+NONCE_SIZE = 12
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def is_binary(data):
+    """True si data est une couche au format binaire."""
+    return (
+        isinstance(data, (bytes, bytearray, memoryview))
+        and len(data) >= HEADER.size
+        and data[0] == WIRE_MAGIC
+    )
+
+
+def to_bytes(payload):
+    """Texte ou binaire → octets prêts à être envoyés."""
+    if isinstance(payload, str):
+        return payload.encode()
+    return bytes(payload)
+
+
+# ============================================================
+#   EN-TÊTE
+# ============================================================
+def pack_header(kind):
+    return HEADER.pack(WIRE_MAGIC, WIRE_VERSION, kind)
+
+
+def unpack_header(data):
+    """Retourne (type, corps) ou lève ValueError si l'en-tête est invalide."""
+    if not is_binary(data):
+        raise ValueError("Couche binaire invalide (magic absent)")
+
+    magic, version, kind = HEADER.unpack_from(data)
+    if version != WIRE_VERSION:
+        raise ValueError(f"Version de format inconnue : {version}")
+
+    return kind, memoryview(data)[HEADER.size:]
+
+
+# ============================================================
+#   UNITÉS (16 BITS OU TAILLE DU MODULE)
+# ============================================================
+def pack_units(values, width=UNIT_SIZE):
+    """Liste d'entiers → octets big-endian, 'width' octets par entier."""
+    if width != UNIT_SIZE:
+        return b"".join(value.to_bytes(width, "big") for value in values)
+
+    units = array("H", values)
+    if _LITTLE_ENDIAN:
+        units.byteswap()
+    return units.tobytes()
+
+
+def unpack_units(body, width=UNIT_SIZE):
+    """Octets big-endian → entiers (array('H') pour des unités de 2 octets)."""
+    if len(body) % width:
+        raise ValueError("Corps de couche tronqué")
+
+    if width != UNIT_SIZE:
+        return [int.from_bytes(body[i:i + width], "big") for i in range(0, len(body), width)]
+
+    units = array("H")
+    units.frombytes(body)
+    if _LITTLE_ENDIAN:
+        units.byteswap()
+    return units
+
+
+def pack_layer(values, width=UNIT_SIZE):
+    """Couche RSA complète : en-tête + unités."""
+    return pack_header(KIND_RSA_UNITS) + pack_units(values, width)
+
+
+def unpack_layer(data, width=UNIT_SIZE):
+    """Couche RSA complète → unités chiffrées."""
+    kind, body = unpack_header(data)
+    if kind != KIND_RSA_UNITS:
+        raise ValueError(f"Type de couche inattendu : {kind}")
+    return unpack_units(body, width)
+
+
+# ============================================================
+#   COUCHE HYBRIDE
+# ============================================================
+def pack_hybrid_layer(wrapped_key, ciphertext):
+    """en-tête + clé de session chiffrée (octets) + données chiffrées."""
+    return (pack_header(KIND_HYBRID) + KEY_LENGTH.pack(len(wrapped_key))
+            + wrapped_key + ciphertext)
+
+
+def unpack_hybrid_body(body):
+    """Corps d'une couche hybride → (clé chiffrée, données chiffrées)."""
+    if len(body) < KEY_LENGTH.size:
+        raise ValueError("Couche hybride tronquée")
+
+    (key_length,) = KEY_LENGTH.unpack_from(body)
+    end = KEY_LENGTH.size + key_length
+    if len(body) < end:
+        raise ValueError("Couche hybride tronquée")
+
+    return body[KEY_LENGTH.size:end], body[end:]
+
+
+# ============================================================
+#   CIRCUITS
+# ============================================================
+def circuit_kind(data):
+    """Type de couche si c'est un message de circuit, sinon None."""
+    if is_binary(data) and data[2] in (KIND_CIRCUIT_CREATE, KIND_CIRCUIT_CELL, KIND_STREAM_CELL):
+        return data[2]
+    return None
+
+
+def pack_create(circuit_id, wrapped_key, ciphertext):
+    return (pack_header(KIND_CIRCUIT_CREATE) + circuit_id + KEY_LENGTH.pack(len(wrapped_key))
+            + wrapped_key + ciphertext)
+
+
+def unpack_create_body(body):
+    """→ (id circuit, clé chiffrée, données chiffrées)."""
+    if len(body) < CIRCUIT_ID_SIZE:
+        raise ValueError("CREATE tronqué")
+    wrapped_key, ciphertext = unpack_hybrid_body(body[CIRCUIT_ID_SIZE:])
+    return bytes(body[:CIRCUIT_ID_SIZE]), wrapped_key, ciphertext
+
+
+def pack_cell(circuit_id, nonce, ciphertext, kind=KIND_CIRCUIT_CELL):
+    return pack_header(kind) + circuit_id + nonce + ciphertext
+
+
+def unpack_cell_body(body):
+    """→ (id circuit, nonce, données chiffrées)."""
+    if len(body) < CIRCUIT_ID_SIZE + NONCE_SIZE:
+        raise ValueError("Cellule tronquée")
+    end = CIRCUIT_ID_SIZE + NONCE_SIZE
+    return bytes(body[:CIRCUIT_ID_SIZE]), bytes(body[CIRCUIT_ID_SIZE:end]), body[end:]
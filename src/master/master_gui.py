@@ -1,11 +1,18 @@
 import sys
-import mariadb
+import json
+import socket
+import threading
+import time
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout,
     QLabel, QPushButton, QTextEdit, QTableWidget,
     QTableWidgetItem
 )
-from PyQt5.QtCore import QTimer
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from src.common.framing import recv_frame, send_frame, request
+from src.common.startup import StartupTimer
+from src.common.storage import open_database
 
 
 DB_CONFIG = {
@@ -15,13 +22,59 @@ DB_CONFIG = {
     "database": "onion_network"
 }
 
+MASTER_IP = "192.168.200.2"
+MASTER_PORT = 9000
+
+# Attente avant de se réabonner au MASTER (secondes)
+RESUBSCRIBE_DELAY = 5
+
+# Lignes de logs gardées à l'écran
+MAX_LOG_LINES = 500
+
+
+class FeedListener(QObject):
+    """
+    Abonnement au flux de changements du MASTER ("SUBSCRIBE", voir feed.py).
+    Tourne dans un thread ; les événements arrivent au GUI par signal.
+    """
+
+    events = pyqtSignal(list)
+    lost = pyqtSignal()
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        while True:
+            try:
+                with socket.create_connection((MASTER_IP, MASTER_PORT), timeout=5) as s:
+                    s.settimeout(None)
+                    send_frame(s, b"SUBSCRIBE")
+
+                    while True:
+                        frame = recv_frame(s)
+                        if frame is None:
+                            break
+                        batch = json.loads(frame)
+                        if batch:   # [] = rien de neuf
+                            self.events.emit(batch)
+
+            except (OSError, ValueError):
+                pass
+
+            self.lost.emit()
+            time.sleep(RESUBSCRIBE_DELAY)
+
 
 class MasterGUI(QWidget):
     """
     Interface graphique du MASTER (SAE 302)
     - Affiche les routeurs enregistrés
     - Affiche les logs
-    - Lecture directe depuis MariaDB (cohérent SAE)
+    - Mises à jour poussées par le MASTER (SUBSCRIBE) : rien à faire
+      tant que rien ne change, une ligne modifiée à la fois sinon
+    - MASTER injoignable : relecture incrémentale toutes les 3 secondes
+      (delta de l'annuaire par version, logs après le dernier id vu)
     """
 
     def __init__(self):
@@ -29,6 +82,15 @@ class MasterGUI(QWidget):
         self.setWindowTitle("MASTER TOR - SAE 302")
         self.setGeometry(200, 200, 700, 500)
 
+        # Deux connexions suffisent : routeurs + logs
+        self.db = open_database(pool_size=2, **DB_CONFIG)
+
+        # État connu du GUI
+        self.rows = {}              # nom du routeur → ligne du tableau
+        self.last_log_id = 0        # dernier log lu en base
+        self.epoch = None           # version de l'annuaire du MASTER
+        self.version = 0
+
         self.layout = QVBoxLayout()
 
         self.label = QLabel("📡 Routeurs enregistrés")
@@ -46,6 +108,7 @@ class MasterGUI(QWidget):
 
         self.logs = QTextEdit()
         self.logs.setReadOnly(True)
+        self.logs.document().setMaximumBlockCount(MAX_LOG_LINES)
         self.layout.addWidget(self.logs)
 
         # Bouton refresh
@@ -55,69 +118,129 @@ class MasterGUI(QWidget):
 
         self.setLayout(self.layout)
 
-        # Timer auto-refresh (toutes les 3 secondes)
+        # Relecture incrémentale, seulement sans flux du MASTER
         self.timer = QTimer()
         self.timer.timeout.connect(self.refresh_data)
-        self.timer.start(3000)
 
         self.refresh_data()
 
+        # Flux poussé par le MASTER
+        self.feed = FeedListener()
+        self.feed.events.connect(self.apply_events)
+        self.feed.lost.connect(self.feed_lost)
+        self.feed.start()
+
     # ======================================================
-    # Connexion BDD
+    # Flux poussé par le MASTER
     # ======================================================
-    def get_connection(self):
-        return mariadb.connect(**DB_CONFIG)
+    def apply_events(self, events):
+        self.timer.stop()
+
+        self.table.setUpdatesEnabled(False)
+        for event in events:
+            if event["type"] == "snapshot":
+                self.reset_routers(event["routers"])
+            elif event["type"] == "router":
+                self.set_router(event["router"])
+            elif event["type"] == "client":
+                self.set_router(event["client"])
+            elif event["type"] == "removed":
+                self.remove_router(event["name"])
+            elif event["type"] == "log":
+                self.logs.append(f"[{event['timestamp']}] {event['message']}")
+        self.table.setUpdatesEnabled(True)
+
+    def feed_lost(self):
+        if self.timer.isActive():
+            return
+
+        # Les logs poussés sont déjà affichés : on repart du dernier en base
+        latest = self.db.get_logs_since(self.last_log_id, limit=1)
+        if latest:
+            self.last_log_id = latest[-1][0]
+
+        self.epoch = None
+        self.timer.start(3000)
 
     # ======================================================
-    # Rafraîchissement
+    # Relecture incrémentale
     # ======================================================
     def refresh_data(self):
         self.load_routers()
         self.load_logs()
 
+    def master_request(self, req):
+        with socket.create_connection((MASTER_IP, MASTER_PORT), timeout=5) as s:
+            return json.loads(request(s, req.encode()))
+
     # ======================================================
     # Routeurs
     # ======================================================
     def load_routers(self):
         try:
-            conn = self.get_connection()
-            cur = conn.cursor()
-            cur.execute("SELECT name, ip, port, public_e, public_n FROM routers")
-            rows = cur.fetchall()
+            # Annuaire du MASTER : rien, un delta, ou tout si version inconnue
+            answer = self.master_request(f"GET_ROUTERS {self.epoch or 0} {self.version}")
+            self.epoch, self.version = answer["epoch"], answer["version"]
+        except OSError:
+            # MASTER injoignable : lecture en base, seules les lignes changées sont réécrites
+            answer = {"routers": self.db.get_routers()}
+        except Exception as e:
+            self.logs.append(f"❌ Erreur routeurs : {e}")
+            return
 
-            self.table.setRowCount(len(rows))
+        self.table.setUpdatesEnabled(False)
+        if "routers" in answer:
+            self.reset_routers(answer["routers"])
+        for router in answer.get("added", []):
+            self.set_router(router)
+        for name in answer.get("removed", []):
+            self.remove_router(name)
+        self.table.setUpdatesEnabled(True)
 
-            for i, row in enumerate(rows):
-                self.table.setItem(i, 0, QTableWidgetItem(row[0]))
-                self.table.setItem(i, 1, QTableWidgetItem(row[1]))
-                self.table.setItem(i, 2, QTableWidgetItem(str(row[2])))
-                self.table.setItem(
-                    i, 3,
-                    QTableWidgetItem(f"({row[3]}, {row[4]})")
-                )
+    def reset_routers(self, routers):
+        names = {router["name"] for router in routers}
+        for name in [n for n in self.rows if n not in names]:
+            self.remove_router(name)
+        for router in routers:
+            self.set_router(router)
 
-            cur.close()
-            conn.close()
+    def set_router(self, router):
+        row = self.rows.get(router["name"])
+        if row is None:
+            row = self.rows[router["name"]] = self.table.rowCount()
+            self.table.insertRow(row)
 
-        except Exception as e:
-            self.logs.append(f"❌ Erreur routeurs : {e}")
+        # Les clients sont aussi dans l'annuaire (pas de clé publique)
+        key = router.get("public_key")
+        key_text = f"({key[0]}, {key[1]})" if key else router.get("role", "")
+        values = [router["name"], router["ip"], str(router["port"]), key_text]
+
+        for col, value in enumerate(values):
+            item = self.table.item(row, col)
+            if item is None:
+                self.table.setItem(row, col, QTableWidgetItem(value))
+            elif item.text() != value:
+                item.setText(value)
+
+    def remove_router(self, name):
+        row = self.rows.pop(name, None)
+        if row is None:
+            return
+        self.table.removeRow(row)
+        for other, other_row in self.rows.items():
+            if other_row > row:
+                self.rows[other] = other_row - 1
 
     # ======================================================
     # Logs
     # ======================================================
     def load_logs(self):
         try:
-            conn = self.get_connection()
-            cur = conn.cursor()
-            cur.execute("SELECT message, timestamp FROM logs ORDER BY id DESC LIMIT 20")
-            rows = cur.fetchall()
-
-            self.logs.clear()
-            for msg, ts in rows:
+            # Premier affichage : les 20 derniers ; ensuite seulement les nouveaux
+            limit = 200 if self.last_log_id else 20
+            for log_id, msg, ts in self.db.get_logs_since(self.last_log_id, limit):
                 self.logs.append(f"[{ts}] {msg}")
-
-            cur.close()
-            conn.close()
+                self.last_log_id = log_id
 
         except Exception as e:
             self.logs.append(f"❌ Erreur logs : {e}")
@@ -127,7 +250,10 @@ class MasterGUI(QWidget):
 # Lancement
 # ======================================================
 if __name__ == "__main__":
+    timer = StartupTimer("GUI MASTER")
     app = QApplication(sys.argv)
     gui = MasterGUI()
     gui.show()
+    timer.mark("fenêtre")
+    timer.report()
     sys.exit(app.exec_())
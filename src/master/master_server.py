@@ -1,8 +1,16 @@
-import socket
 import json
-import psutil
+import queue
+import threading
 import time
-from src.common.database import DatabaseManager
+from src.common.startup import StartupTimer, bind_listener
+from src.common.storage import open_database
+from src.common.directory import RouterRegistry, ROLE_CLIENT
+from src.common.feed import ChangeFeed
+from src.common.framing import MAX_FRAME_SIZE, recv_frame, send_frame
+
+# Routeur sans heartbeat depuis ROUTER_TTL secondes → retiré de l'annuaire
+ROUTER_TTL = 15.0
+EXPIRE_INTERVAL = 5.0
 
 
 class MasterServer:
@@ -10,43 +18,134 @@ class MasterServer:
     MASTER SERVER (SAE 302)
     """
 
-    def __init__(self, host="0.0.0.0", port=9000):
+    def __init__(self, host="0.0.0.0", port=9000, max_frame=MAX_FRAME_SIZE, db_backend=None, db_path=None):
         self.host = host
         self.port = port
-        self.db = DatabaseManager()
+        self.max_frame = max_frame
+
+        # MariaDB ou SQLite (voir storage.py ; db_path = fichier SQLite)
+        self.db = open_database(db_backend, db_path)
+
+        # Annuaire en mémoire, chargé une fois depuis la base.
+        # La base reste la copie durable, écrite en arrière-plan.
+        self.registry = RouterRegistry(self.db.get_routers())
+        self._db_queue = queue.Queue()
+        threading.Thread(target=self._db_writer, daemon=True).start()
+
+        # Changements poussés aux abonnés (MasterGUI)
+        self.feed = ChangeFeed()
+
+        # Dernier signe de vie de chaque routeur (délai de grâce pour ceux lus en base).
+        # _lock : heartbeat / enregistrement / expiration d'un même routeur ne se croisent pas
+        self._lock = threading.Lock()
+        now = time.monotonic()
+        self.last_seen = {router["name"]: now for router in self.registry.routers()}
+        threading.Thread(target=self._expire_loop, daemon=True).start()
 
     # ============================================================
-    # LIBÉRATION DU PORT
+    # ÉCRITURE DIFFÉRÉE EN BASE
     # ============================================================
-    def free_port(self):
-        for proc in psutil.process_iter(["pid"]):
-            try:
-                for conn in proc.connections(kind="inet"):
-                    if conn.laddr.port == self.port:
-                        proc.kill()
-                        time.sleep(1)
-                        return
-            except Exception:
-                pass
+    def _db_writer(self):
+        """Seul thread qui écrit dans MariaDB (les requêtes ne l'attendent pas)."""
+        while True:
+            # (db.add_router, args) : insertion ou mise à jour en une requête
+            # (db.remove_router, args) : routeur expiré
+            operation, args = self._db_queue.get()
+            operation(*args)
+            self._db_queue.task_done()
+
+    # ============================================================
+    # EXPIRATION DES ROUTEURS MUETS
+    # ============================================================
+    def _expire_loop(self):
+        while True:
+            time.sleep(EXPIRE_INTERVAL)
+            self.expire_routers()
+
+    def expire_routers(self, ttl=ROUTER_TTL):
+        limit = time.monotonic() - ttl
+        with self._lock:
+            expired = [name for name, seen in self.last_seen.items() if seen < limit]
+            for name in expired:
+                del self.last_seen[name]
+                self.registry.remove(name)
+
+        for name in expired:
+            self._db_queue.put((self.db.remove_router, (name,)))
+            self.feed.publish({"type": "removed", "name": name})
+
+            print(f"[MASTER] ⚠ Routeur {name} expiré (pas de heartbeat).")
+            self.log(f"Routeur {name} expiré (pas de heartbeat)")
+
+    # ============================================================
+    # LOGS (BASE + ABONNÉS)
+    # ============================================================
+    def log(self, message):
+        self.db.add_log(message)
+        self.feed.publish({
+            "type": "log", "message": message, "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        })
 
     # ============================================================
     # DÉMARRAGE
     # ============================================================
-    def start(self):
+    def start(self, timer=None):
         print(f"[MASTER] Démarrage sur {self.host}:{self.port}")
-        self.free_port()
 
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
-            server.bind((self.host, self.port))
-            server.listen()
+        # Bind direct ; le port n'est libéré (psutil) que s'il est vraiment pris
+        with bind_listener(self.host, self.port, "MASTER") as server:
             print("[MASTER] En attente des clients / routeurs...")
 
+            if timer is not None:
+                timer.mark("écoute")
+                timer.report()
+
             while True:
                 conn, addr = server.accept()
-                req = conn.recv(8192).decode()
-                response = self.process_request(req)
-                conn.sendall(response.encode())
-                conn.close()
+
+                # Une requête = un thread (la base est accédée via le pool)
+                threading.Thread(
+                    target=self.handle_connection, args=(conn, addr), daemon=True
+                ).start()
+
+    def handle_connection(self, conn, addr):
+        try:
+            req = recv_frame(conn, self.max_frame)
+            if req is None:
+                return
+
+            # Abonnement : la connexion reste ouverte (voir feed.py)
+            if req == b"SUBSCRIBE":
+                self.serve_subscriber(conn)
+                return
+
+            response = self.process_request(req.decode())
+            send_frame(conn, response)
+        except ConnectionError as e:
+            print(f"[MASTER] ❌ Requête incomplète de {addr} : {e}")
+            self.log(f"Requête incomplète de {addr[0]} : {e}")
+        finally:
+            conn.close()
+
+    def serve_subscriber(self, conn):
+        """Instantané de l'annuaire, puis les changements au fil de l'eau."""
+        subscription = self.feed.subscribe()
+        try:
+            # Abonné AVANT l'instantané : aucun changement ne peut se perdre entre les deux
+            send_frame(conn, json.dumps([{
+                "type": "snapshot",
+                "version": self.registry.version,
+                "routers": self.registry.routers()
+            }]))
+
+            while not subscription.overflowed:
+                send_frame(conn, json.dumps(subscription.get_batch()))
+
+        except OSError:
+            pass
+
+        finally:
+            self.feed.unsubscribe(subscription)
 
     # ============================================================
     # TRAITEMENT DES REQUÊTES
@@ -63,24 +162,98 @@ class MasterServer:
                 port = data["port"]
                 public_key = tuple(data["public_key"])
 
-                # ⭐ SUPPRESSION AUTOMATIQUE AVANT AJOUT
-                self.db.remove_router(name)
-                self.db.add_router(name, ip, port, public_key)
+                router = {"name": name, "ip": ip, "port": port, "public_key": public_key}
+                with self._lock:
+                    self.registry.add(router)
+                    self.last_seen[name] = time.monotonic()
+                self._db_queue.put((self.db.add_router, (name, ip, port, public_key)))
+                self.feed.publish({"type": "router", "router": router})
 
                 print(f"[MASTER] ✔ Routeur {name} enregistré (mise à jour).")
+                self.log(f"Routeur {name} enregistré ({ip}:{port})")
                 return "OK"
 
             except Exception as e:
+                self.log(f"Erreur REGISTER : {e}")
                 return f"[MASTER] ERREUR REGISTER : {e}"
 
+        # CLIENT → MASTER : adresse de réception (pour les routeurs de sortie)
+        if req.startswith("REGISTER_CLIENT "):
+            try:
+                data = json.loads(req[len("REGISTER_CLIENT "):])
+                client = {"name": data["name"], "ip": data["ip"], "port": data["port"], "role": ROLE_CLIENT}
+                with self._lock:
+                    self.registry.add(client)
+                self.feed.publish({"type": "client", "client": client})
+
+                self.log(f"Client {client['name']} enregistré ({client['ip']}:{client['port']})")
+                return "OK"
+
+            except Exception as e:
+                return f"[MASTER] ERREUR REGISTER_CLIENT : {e}"
+
+        # ROUTEUR → MASTER : preuve de vie + charge
+        if req.startswith("HEARTBEAT "):
+            try:
+                return self.heartbeat(json.loads(req[len("HEARTBEAT "):]))
+
+            except Exception as e:
+                self.log(f"Erreur HEARTBEAT : {e}")
+                return f"[MASTER] ERREUR HEARTBEAT : {e}"
+
+        # HÔTE DE ROUTEURS → MASTER : tous ses heartbeats en une requête
+        # (voir router_host.py) ; réponse = routeurs à réenregistrer
+        if req.startswith("HEARTBEATS "):
+            try:
+                batch = json.loads(req[len("HEARTBEATS "):])
+            except ValueError as e:
+                self.log(f"Erreur HEARTBEATS : {e}")
+                return f"[MASTER] ERREUR HEARTBEATS : {e}"
+
+            unknown = []
+            for data in batch:
+                # Entrée invalide : ignorée, les autres heartbeats du lot comptent
+                try:
+                    if self.heartbeat(data) == "UNKNOWN":
+                        unknown.append(data["name"])
+                except Exception as e:
+                    self.log(f"Heartbeat ignoré : {e}")
+            return json.dumps(unknown)
+
         # CLIENT A → MASTER
         if req == "GET_ROUTERS":
-            routers = self.db.get_routers()
-            print(f"[MASTER] {len(routers)} routeurs envoyés.")
-            return json.dumps(routers)
+            print(f"[MASTER] {len(self.registry)} routeurs envoyés.")
+            return self.registry.snapshot_json()
+
+        # Même liste, compressée (zlib)
+        if req == "GET_ROUTERS_ZLIB":
+            return self.registry.snapshot_zlib()
 
+        # CLIENT → MASTER : "GET_ROUTERS <epoch> <version>" (cache client)
+        if req.startswith("GET_ROUTERS "):
+            return self.registry.response(req.split()[1:])
+
+        self.log(f"Commande inconnue : {req[:50]}")
         return "[MASTER] ERREUR : Commande inconnue."
 
+    def heartbeat(self, data):
+        """Met à jour la charge publiée ; UNKNOWN → le routeur doit se réenregistrer."""
+        # KeyError avant toute mise à jour si le heartbeat est incomplet
+        name, load = data["name"], data["load"]
+        with self._lock:
+            if self.registry.get(name) is None:
+                return "UNKNOWN"
+
+            self.last_seen[name] = time.monotonic()
+
+            # Charge hors du journal versionné : l'annuaire ne change pas de version
+            self.registry.set_load(name, load)
+
+        return "OK"
+
 
 if __name__ == "__main__":
-    MasterServer().start()
+    timer = StartupTimer("MASTER")
+    master = MasterServer()
+    timer.mark("base + annuaire")
+    master.start(timer)
@@ -0,0 +1,274 @@
+import sys
+import asyncio
+
+from src.common.startup import StartupTimer, bind_listener
+from src.common.crypto import key_bits_setting
+from src.common.framing import read_frame, write_frame
+from src.common.onion import split_destination
+from src.common.pool import LINK_HELLO, STREAM_ID, AsyncLinkPool
+from src.common.stream import is_stream_data
+from src.common.wire import KIND_STREAM_CELL, circuit_kind
+from src.router.forwarding import AsyncForwardQueues
+from src.router.router_server import RouterServer
+from src.router.supervisor import notify_ready
+
+
+class AsyncRouterServer(RouterServer):
+    """
+    ROUTEUR TOR ASYNCIO (SAE 302)
+    --------------------------------------
+    Même rôle que RouterServer, mais :
+    - Plusieurs connexions traitées en parallèle (une tâche par connexion)
+    - L'attente du saut suivant ne bloque plus la boucle d'acceptation
+    - Le déchiffrement (CPU) part dans un executor
+    - Files sortantes asyncio + un lien multiplexé par saut suivant
+    """
+
+    def __init__(self, name, host, port, executor=None, **kwargs):
+        super().__init__(name, host, port, **kwargs)
+
+        # None → ThreadPoolExecutor par défaut de la boucle
+        self.executor = executor
+
+        self.async_links = AsyncLinkPool(max_frame=self.max_frame)
+        self.async_forwarding = AsyncForwardQueues(self.deliver_async, name=name)
+
+        # Routeurs du même processus (voir router_host.py) : nom → routeur,
+        # une couche pour l'un d'eux lui est passée directement, sans socket
+        self.local_peers = {}
+
+    # ============================================================
+    #  DÉMARRAGE DU ROUTEUR
+    # ============================================================
+    def start(self, timer=None):
+        self.start_heartbeat()
+        try:
+            asyncio.run(self.serve(timer))
+        finally:
+            self.close()
+
+    def queue_depth(self):
+        return self.forwarding.depth() + self.async_forwarding.depth()
+
+    async def serve(self, timer=None):
+        server = await self.open_server()
+
+        if timer is not None:
+            timer.mark("écoute")
+            timer.report()
+
+        async with server:
+            await server.serve_forever()
+
+    async def open_server(self):
+        """Ouvre le port d'écoute (port 0 → port choisi par le système)."""
+        # Bind direct ; le port n'est libéré (psutil) que s'il est vraiment pris
+        sock = bind_listener(self.host, self.port, f"ROUTER {self.name}")
+        server = await asyncio.start_server(self.handle_connection, sock=sock)
+        loop = asyncio.get_running_loop()
+
+        port = sock.getsockname()[1]
+        if port != self.port:
+            # Port choisi par le système : le MASTER doit connaître le vrai
+            self.port = port
+            self.registered = await loop.run_in_executor(None, self.register_to_master)
+
+        print(f"[ROUTER {self.name}] (async) En écoute sur {self.host}:{self.port}")
+
+        await loop.run_in_executor(None, notify_ready, self.name, self.port, self.registered)
+        return server
+
+    # ============================================================
+    #  UNE CONNEXION = UNE TÂCHE
+    # ============================================================
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                data = await read_frame(reader, self.max_frame)
+                if data is None:
+                    break
+
+                # Lien persistant d'un autre routeur (voir pool.py)
+                if data == LINK_HELLO:
+                    await self.serve_link(reader, writer)
+                    break
+
+                reply = await self.handle_layer(data)
+                await write_frame(writer, reply)
+
+        except ConnectionError as e:
+            print(f"[{self.name}] ❌ Connexion interrompue : {e}")
+
+        finally:
+            writer.close()
+
+    async def serve_link(self, reader, writer):
+        """Flux multiplexés : chaque message est traité dans sa propre tâche."""
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(stream_id, body):
+            # Message vide = ping
+            reply = await self.handle_layer(body) if body else b""
+            async with write_lock:
+                try:
+                    await write_frame(writer, reply, STREAM_ID.pack(stream_id))
+                except ConnectionError:
+                    pass
+
+        while True:
+            frame = await read_frame(reader, self.max_frame)
+            if frame is None:
+                break
+
+            (stream_id,) = STREAM_ID.unpack_from(frame)
+            task = asyncio.create_task(answer(stream_id, frame[STREAM_ID.size:]))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    async def handle_layer(self, data):
+        """Déchiffre une couche puis la transmet → réponse pour l'amont."""
+        if circuit_kind(data) == KIND_STREAM_CELL:
+            return await self.relay_stream_cell_async(data)
+
+        print(f"[{self.name}] Couche reçue : {data[:80]}...")
+        self.messages += 1
+
+        loop = asyncio.get_running_loop()
+        try:
+            next_hop, payload = await loop.run_in_executor(self.executor, self.open_layer, data)
+        except (ValueError, UnicodeDecodeError) as e:
+            print(f"[{self.name}] ❌ Couche invalide : {e}")
+            return f"[{self.name}] ERREUR : couche invalide ({e})".encode()
+
+        print(f"[{self.name}] next_hop = {next_hop}")
+
+        # Fin d'un CREATE : circuit établi jusqu'à la sortie
+        if payload is None:
+            return b"OK"
+
+        if next_hop is None:
+            print(f"[{self.name}] ❌ next_hop invalide, abandon.")
+            return f"[{self.name}] ERREUR : next_hop invalide".encode()
+
+        destination, receipt = split_destination(next_hop)
+
+        # =============================
+        # STOCKER PUIS TRANSMETTRE
+        # =============================
+        # (sauf messages de circuit, voir RouterServer.handle_layer)
+        if self.store_and_forward and not circuit_kind(data):
+            try:
+                await self.check_destination_async(destination)
+            except (OSError, ValueError) as e:
+                print(f"[{self.name}] ❌ Destination refusée : {e}")
+                return f"[{self.name}] ERREUR : {e}".encode()
+
+            if not await self.async_forwarding.put(destination, (payload, receipt)):
+                print(f"[{self.name}] ❌ File vers {destination} pleine, message refusé.")
+                return f"[{self.name}] ERREUR : file vers {destination} pleine".encode()
+            return b"OK"
+
+        try:
+            return await self.deliver_async(destination, (payload, receipt))
+        except Exception as e:
+            return f"[{self.name}] ERREUR : {e}".encode()
+
+    async def relay_stream_cell_async(self, data):
+        """Équivalent asyncio de RouterServer.relay_stream_cell."""
+        self.messages += 1
+        loop = asyncio.get_running_loop()
+        try:
+            with self.circuits.stream_slot(data):
+                next_hop, payload = await loop.run_in_executor(self.executor, self.open_layer, data)
+                return await self.deliver_async(next_hop, (payload, None))
+        except Exception as e:
+            return f"[{self.name}] ERREUR : {e}".encode()
+
+    # ============================================================
+    #  TRANSMISSION (SANS BLOQUER LA BOUCLE)
+    # ============================================================
+    async def resolve_async(self, next_name):
+        """Comme router_address ; un nom inconnu est cherché hors de la boucle."""
+        address = self.address_book.routers.get(next_name)
+        if address is None:
+            loop = asyncio.get_running_loop()
+            address = await loop.run_in_executor(self.executor, self.router_address, next_name)
+        return address
+
+    async def check_destination_async(self, destination):
+        """Comme check_destination (les routeurs du même processus sont connus)."""
+        if destination not in self.client_addresses and destination not in self.local_peers:
+            await self.resolve_async(destination)
+
+    async def forward_async(self, next_name, payload):
+        try:
+            return await self.async_links.request(await self.resolve_async(next_name), payload)
+        except (OSError, ValueError) as e:
+            return f"[{self.name}] ERREUR : {e}".encode()
+
+    async def deliver_async(self, destination, item):
+        """Équivalent asyncio de RouterServer.deliver."""
+        payload, receipt = item
+
+        if destination in self.client_addresses and is_stream_data(payload):
+            reply = await self.async_links.request(self.client_addresses[destination], payload)
+            if reply != b"OK":
+                raise ConnectionError(reply.decode(errors="replace"))
+            return reply
+
+        if destination in self.client_addresses:
+            print(f"[{self.name}] Envoi au destinataire final ({destination}).")
+            try:
+                await self.send_to_client_async(destination, payload)
+            except OSError:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(self.executor, self.refresh_addresses)
+                raise
+
+            # Accusé de bout en bout : oignon de retour (voir RouterServer.deliver)
+            if receipt is not None:
+                reply_hop, reply_onion = receipt
+                try:
+                    await self.deliver_async(reply_hop, (reply_onion, None))
+                except (OSError, ValueError) as e:
+                    print(f"[{self.name}] ⚠ Accusé non envoyé vers {reply_hop} : {e}")
+            return b"OK"
+
+        peer = self.local_peers.get(destination)
+        if peer is not None:
+            reply = await peer.handle_layer(payload)
+        else:
+            reply = await self.async_links.request(await self.resolve_async(destination), payload)
+        if reply != b"OK":
+            raise ConnectionError(reply.decode(errors="replace"))
+        return reply
+
+    async def send_to_client_async(self, client_name, msg):
+        reader, writer = await asyncio.open_connection(*self.client_addresses[client_name])
+        try:
+            await write_frame(writer, msg)
+        finally:
+            writer.close()
+
+
+# ============================================================
+#  LANCEMENT DU ROUTEUR
+# ============================================================
+if __name__ == "__main__":
+    """
+    Usage :
+    python -m src.router.async_router_server router1 127.0.0.1 8001 [workers_déchiffrement] [bits_clé]
+    (bits_clé absent → variable SAE302_KEY_BITS, sinon 16)
+    """
+
+    name = sys.argv[1]
+    host = sys.argv[2]
+    port = int(sys.argv[3])
+    decrypt_workers = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+    key_bits = key_bits_setting(sys.argv[5] if len(sys.argv) > 5 else None)
+
+    timer = StartupTimer(name)
+    router = AsyncRouterServer(name, host, port, key_bits=key_bits, decrypt_workers=decrypt_workers)
+    timer.mark("clés + MASTER")
+    router.start(timer)
@@ -0,0 +1,173 @@
+import os
+import threading
+
+from src.common.crypto import (
+    TABLE_MODULUS, RSAKeyTable, block_sizes, decrypt_blocks, get_decryption_table,
+    preload_decryption_table, remove_padding,
+)
+from src.common.onion import OnionRouter, split_binary_layer, split_text_layer
+from src.common.wire import HEADER, KIND_RSA_UNITS, is_binary, unpack_units
+
+"""
+============================================================
+    DÉCHIFFREMENT SUR PLUSIEURS CŒURS (SAE 302)
+------------------------------------------------------------
+À cause du GIL, un routeur ne déchiffre que sur UN cœur,
+même avec un thread par connexion. DecryptionPool répartit
+le travail sur un pool de processus :
+
+- la clé privée et la table de déchiffrement sont envoyées
+  UNE fois à chaque worker (initializer), jamais par tâche
+- messages indépendants → un worker chacun
+- grosse couche RSA (texte ou binaire) → découpée en morceaux
+  déchiffrés en parallèle, recollés dans le routeur
+  (les blocs RSA sont indépendants les uns des autres)
+- couches hybrides : un seul bloc RSA (la clé de session),
+  tout le message part dans un seul worker
+- les circuits restent dans le routeur (table des circuits)
+
+Optionnel : RouterServer(..., decrypt_workers=N).
+============================================================
+"""
+
+# Unités par morceau : lecture de table (clés 16 bits) / exponentiation (grandes clés)
+CHUNK_UNITS = 65536
+CHUNK_BLOCKS = 16
+
+# État d'un worker, fixé une fois par _init_worker
+_key = None
+_width = None
+_onion = None
+
+
+# ============================================================
+#   CÔTÉ WORKER
+# ============================================================
+def _init_worker(private_key, table_values):
+    global _key, _width, _onion
+
+    # Table reçue toute faite : le worker ne refait pas les n pow()
+    if table_values is not None:
+        preload_decryption_table(RSAKeyTable.from_values(private_key[0], private_key[1], table_values))
+
+    _key = private_key
+    _width = block_sizes(private_key[1])[1]
+    _onion = OnionRouter()
+
+
+def _worker_pid(_):
+    return os.getpid()
+
+
+def _process_layer(layer):
+    return _onion.process_onion_layer(layer, _key)
+
+
+def _decrypt_units(body):
+    """Morceau du corps d'une couche binaire → octets (remplissage non retiré)."""
+    return decrypt_blocks(unpack_units(body, _width), _key, unpad=False)
+
+
+def _decrypt_text_units(text):
+    """Morceau "12,54,..." d'une couche texte → texte (16 bits) ou octets bruts."""
+    values = [int(x) for x in text.split(b"," if isinstance(text, bytes) else ",")]
+    if _key[1] < TABLE_MODULUS:
+        return get_decryption_table(_key).decrypt_text(values)
+    return decrypt_blocks(values, _key, unpad=False)
+
+
+# ============================================================
+#   CÔTÉ ROUTEUR
+# ============================================================
+class DecryptionPool:
+    """
+    pool = DecryptionPool(private_key, workers=16)
+    pool.process(couche)   → (next_hop, payload), comme OnionRouter.process_onion_layer
+    pool.submit(couche)    → Future (plusieurs messages en parallèle)
+    """
+
+    def __init__(self, private_key, workers=None, chunk_units=None):
+        from concurrent.futures import ProcessPoolExecutor
+
+        n = private_key[1]
+        table = get_decryption_table(private_key).values if n < TABLE_MODULUS else None
+
+        self.private_key = private_key
+        self.padded = table is None
+        self.width = block_sizes(n)[1]
+        self.chunk_units = chunk_units or (CHUNK_BLOCKS if self.padded else CHUNK_UNITS)
+        self.workers = workers or os.cpu_count() or 1
+
+        self.pool = ProcessPoolExecutor(
+            self.workers, initializer=_init_worker, initargs=(tuple(private_key), table)
+        )
+
+        # Couches traitées / découpées en morceaux (incrémentées par plusieurs threads)
+        self.layers = 0
+        self.chunked = 0
+        self._lock = threading.Lock()
+
+        # Workers lancés (et initialisés) dès maintenant, pas au premier message
+        # (pids : ceux qui ont répondu, un même worker peut prendre deux tâches)
+        self.pids = set(self.pool.map(_worker_pid, range(self.workers)))
+
+    def submit(self, layer):
+        """Couche entière dans un worker → Future de (next_hop, payload)."""
+        with self._lock:
+            self.layers += 1
+        return self.pool.submit(_process_layer, bytes(layer))
+
+    def process(self, layer):
+        """Déchiffre une couche (en morceaux si elle est grosse) → (next_hop, payload)."""
+        chunks = self._split(layer)
+        if chunks is None:
+            return self.submit(layer).result()
+
+        with self._lock:
+            self.layers += 1
+            self.chunked += 1
+
+        if is_binary(layer):
+            data = b"".join(self.pool.map(_decrypt_units, chunks))
+            return split_binary_layer(remove_padding(data) if self.padded else data)
+
+        parts = list(self.pool.map(_decrypt_text_units, chunks))
+        if self.padded:
+            return split_text_layer(remove_padding(b"".join(parts)).decode())
+        return split_text_layer("".join(parts))
+
+    def close(self):
+        """Arrête les processus workers (à l'arrêt du routeur)."""
+        self.pool.shutdown()
+
+    # ============================================================
+    #   DÉCOUPAGE D'UNE GROSSE COUCHE
+    # ============================================================
+    def _split(self, layer):
+        """Morceaux à déchiffrer en parallèle, ou None (couche petite / non découpable)."""
+        if is_binary(layer):
+            body = memoryview(layer)[HEADER.size:]
+            if layer[2] != KIND_RSA_UNITS or len(body) % self.width:
+                return None
+
+            step = self.chunk_units * self.width
+            if len(body) < 2 * step:
+                return None
+            return [bytes(body[i:i + step]) for i in range(0, len(body), step)]
+
+        sep = b"," if isinstance(layer, (bytes, bytearray)) else ","
+        count = layer.count(sep) + 1
+        if count < 2 * self.chunk_units:
+            return None
+
+        # Coupe sur des virgules, sans convertir la couche en entiers ici
+        pieces = -(-count // self.chunk_units)
+        step = len(layer) // pieces
+        chunks, start = [], 0
+        while start < len(layer):
+            end = layer.find(sep, start + step)
+            if end < 0:
+                end = len(layer)
+            chunks.append(layer[start:end])
+            start = end + 1
+        return chunks
@@ -0,0 +1,203 @@
+import queue
+import threading
+import time
+
+from src.common.startup import lazy_import
+
+# Importé au premier usage : le routeur synchrone ne charge pas asyncio
+asyncio = lazy_import("asyncio")
+
+"""
+============================================================
+    STOCKER PUIS TRANSMETTRE (SAE 302)
+------------------------------------------------------------
+Un routeur n'attend plus toute la chaîne avant de répondre :
+- La couche déchiffrée est déposée dans une file bornée
+  (une file par saut suivant)
+- Le routeur acquitte tout de suite SON saut ("OK")
+- Des workers vident chaque file vers le saut suivant,
+  avec quelques nouvelles tentatives en cas d'échec
+- Une file restée vide QUEUE_IDLE secondes est supprimée
+  avec ses workers (le routeur vérifie le saut avant put())
+============================================================
+"""
+
+# Taille maximale d'une file par saut suivant
+QUEUE_SIZE = 1000
+
+# Workers par saut suivant (threads ou tâches asyncio)
+WORKERS_PER_HOP = 4
+
+# Nouvelles tentatives avant abandon d'un message
+RETRIES = 3
+RETRY_DELAY = 0.2
+
+# Attente max pour déposer dans une file pleine (secondes)
+PUT_TIMEOUT = 1.0
+
+# File sans aucun dépôt depuis plus longtemps → supprimée (bien plus que PUT_TIMEOUT :
+# un put() en cours empêche toujours la suppression de sa file)
+QUEUE_IDLE = 60.0
+
+
+class ForwardQueues:
+    """
+    Files sortantes (version threads).
+    send(saut, données) doit lever une exception en cas d'échec.
+    """
+
+    def __init__(self, send, name="", maxsize=QUEUE_SIZE, workers=WORKERS_PER_HOP,
+                 retries=RETRIES, put_timeout=PUT_TIMEOUT, idle_timeout=QUEUE_IDLE):
+        self.send = send
+        self.name = name
+        self.maxsize = maxsize
+        self.workers = workers
+        self.retries = retries
+        self.put_timeout = put_timeout
+        self.idle_timeout = idle_timeout
+
+        # saut suivant → file, et instant du dernier dépôt
+        self._queues = {}
+        self._used = {}
+        self._lock = threading.Lock()
+
+        # Statistiques (messages transmis / abandonnés)
+        self.sent = 0
+        self.dropped = 0
+
+    def put(self, next_hop, payload):
+        """Dépose un message ; False si la file reste pleine (à refuser)."""
+        try:
+            self._queue(next_hop).put(payload, timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            return False
+
+    def depth(self):
+        """Nombre total de messages en attente."""
+        return sum(q.qsize() for q in list(self._queues.values()))
+
+    def _queue(self, next_hop):
+        with self._lock:
+            self._used[next_hop] = time.monotonic()
+            q = self._queues.get(next_hop)
+            if q is None:
+                q = self._queues[next_hop] = queue.Queue(self.maxsize)
+                for _ in range(self.workers):
+                    threading.Thread(target=self._worker, args=(next_hop, q), daemon=True).start()
+            return q
+
+    def _retire(self, next_hop, q):
+        """True si le worker doit s'arrêter (file supprimée car inutilisée)."""
+        with self._lock:
+            return _retire_idle(self._queues, self._used, next_hop, q, self.idle_timeout)
+
+    def _worker(self, next_hop, q):
+        while True:
+            try:
+                payload = q.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                if self._retire(next_hop, q):
+                    return
+                continue
+
+            for attempt in range(self.retries + 1):
+                try:
+                    self.send(next_hop, payload)
+                    self.sent += 1
+                    break
+                except Exception as e:
+                    error = e
+                    time.sleep(RETRY_DELAY * (2 ** attempt))
+            else:
+                self.dropped += 1
+                print(f"[{self.name}] ❌ Message vers {next_hop} abandonné : {error}")
+
+            q.task_done()
+
+    def join(self):
+        """Attend que toutes les files soient vides (tests / arrêt propre)."""
+        for q in list(self._queues.values()):
+            q.join()
+
+
+class AsyncForwardQueues:
+    """Files sortantes (version asyncio) : send est une coroutine."""
+
+    def __init__(self, send, name="", maxsize=QUEUE_SIZE, workers=WORKERS_PER_HOP,
+                 retries=RETRIES, put_timeout=PUT_TIMEOUT, idle_timeout=QUEUE_IDLE):
+        self.send = send
+        self.name = name
+        self.maxsize = maxsize
+        self.workers = workers
+        self.retries = retries
+        self.put_timeout = put_timeout
+        self.idle_timeout = idle_timeout
+
+        self._queues = {}
+        self._used = {}
+        self._tasks = set()
+
+        self.sent = 0
+        self.dropped = 0
+
+    async def put(self, next_hop, payload):
+        try:
+            await asyncio.wait_for(self._queue(next_hop).put(payload), self.put_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def depth(self):
+        return sum(q.qsize() for q in self._queues.values())
+
+    def _queue(self, next_hop):
+        self._used[next_hop] = time.monotonic()
+        q = self._queues.get(next_hop)
+        if q is None:
+            q = self._queues[next_hop] = asyncio.Queue(self.maxsize)
+            for _ in range(self.workers):
+                task = asyncio.create_task(self._worker(next_hop, q))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        return q
+
+    async def _worker(self, next_hop, q):
+        while True:
+            try:
+                payload = await asyncio.wait_for(q.get(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                # Une seule boucle : pas de verrou nécessaire
+                if _retire_idle(self._queues, self._used, next_hop, q, self.idle_timeout):
+                    return
+                continue
+
+            for attempt in range(self.retries + 1):
+                try:
+                    await self.send(next_hop, payload)
+                    self.sent += 1
+                    break
+                except Exception as e:
+                    error = e
+                    await asyncio.sleep(RETRY_DELAY * (2 ** attempt))
+            else:
+                self.dropped += 1
+                print(f"[{self.name}] ❌ Message vers {next_hop} abandonné : {error}")
+
+            q.task_done()
+
+    async def join(self):
+        for q in list(self._queues.values()):
+            await q.join()
+
+
+def _retire_idle(queues, used, next_hop, q, idle_timeout):
+    """Supprime la file de next_hop si elle est vide et sans dépôt récent → True si q est retirée."""
+    if queues.get(next_hop) is not q:
+        return True
+
+    if q.empty() and time.monotonic() - used[next_hop] >= idle_timeout:
+        del queues[next_hop]
+        del used[next_hop]
+        return True
+    return False
@@ -1,72 +1,56 @@
-import os
-import time
-import platform
+import sys
+
+from src.router.supervisor import RouterSupervisor
 
 """
 ============================================================
     LANCEUR AUTOMATIQUE DE ROUTEURS (SAE 302)
 ------------------------------------------------------------
-✔ Compatible Windows ET Linux
-✔ Lance tous les routeurs automatiquement
-✔ Chaque routeur a son port
-✔ Le dernier routeur envoie vers clientB
+✔ Compatible Windows ET Linux (processus fils Python)
+✔ Lance tous les routeurs EN PARALLÈLE, puis attend qu'ils
+  soient prêts (port ouvert + enregistrés auprès du MASTER)
+✔ Chaque routeur a son port (routerN → 8000 + N)
+✔ Un routeur qui plante est relancé
+✔ Nombre de routeurs modifiable à chaud : taper un nombre
 ============================================================
+
+Usage :
+    python -m src.router.launch_routers [N] [async] [bits=64]
 """
 
-# ------------------------------------------------------------
-# Liste des routeurs
-# Format : (nom, port, is_last)
-# ------------------------------------------------------------
-ROUTERS = [
-    ("router1", 8001, False),
-    ("router2", 8002, False),
-    ("router3", 8003, False),
-    ("router4", 8004, False),
-    ("router5", 8005, True),   # dernier routeur → clientB
-]
+# Nombre de routeurs par défaut
+N = 5
 
-IS_WINDOWS = platform.system().lower().startswith("win")
 
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else N
+    module = "src.router.async_router_server" if "async" in sys.argv[2:] else "src.router.router_server"
+    # Taille des clés : bits=N, sinon SAE302_KEY_BITS (héritée par les routeurs)
+    key_bits = next((int(arg[5:]) for arg in sys.argv[2:] if arg.startswith("bits=")), None)
 
-def launch_router(name, port, is_last):
-    print(f"Lancement de {name} sur le port {port}...")
+    print(f"=== Lancement de {count} routeurs TOR (SAE 302) ===\n")
 
-    if IS_WINDOWS:
-        # =========================
-        # WINDOWS
-        # =========================
-        if is_last:
-            os.system(
-                f'start cmd /k python -m src.router.router_server {name} 127.0.0.1 {port} clientB'
-            )
-        else:
-            os.system(
-                f'start cmd /k python -m src.router.router_server {name} 127.0.0.1 {port}'
-            )
-    else:
-        # =========================
-        # LINUX
-        # =========================
-        if is_last:
-            os.system(
-                f'python3 -m src.router.router_server {name} 0.0.0.0 {port} clientB &'
-            )
-        else:
-            os.system(
-                f'python3 -m src.router.router_server {name} 0.0.0.0 {port} &'
-            )
+    supervisor = RouterSupervisor(host="0.0.0.0", module=module, key_bits=key_bits)
+    late = supervisor.start(count)
+    if late:
+        print(f"⚠ Routeurs pas encore prêts : {', '.join(late)}")
 
-    # Pause pour éviter les conflits
-    time.sleep(0.4)
+    print("\n=== Routeurs lancés : entrer un nombre pour changer leur nombre, q pour arrêter ===")
 
+    try:
+        for line in sys.stdin:
+            line = line.strip()
+            if line == "q":
+                break
+            if line.isdigit():
+                supervisor.scale(int(line))
+                print(f"→ {len(supervisor.running)} routeurs actifs")
+    except KeyboardInterrupt:
+        pass
 
-# ============================================================
-# LANCEMENT GLOBAL
-# ============================================================
-if __name__ == "__main__":
-    print("=== Lancement des routeurs TOR (SAE 302) ===\n")
+    supervisor.stop_all()
+    print("=== Routeurs arrêtés ===")
 
-    for name, port, is_last in ROUTERS:
-        launch_router(name, port, is_last)
 
-    print("\n=== Tous les routeurs sont lancés ===")
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,12 @@ import threading
 
 from src.common.crypto import RSAEncryption
 from src.common.onion import OnionRouter
+from src.common.directory import AddressBook, DirectoryCache
+from src.common.framing import recv_frame, request
+from src.common.pool import LINK_HELLO, LinkPool, serve_link
+
+MASTER_IP = "192.168.200.2"
+MASTER_PORT = 9000
 
 
 class Router:
@@ -27,6 +33,16 @@ class Router:
         # Génération des clés RSA
         self.public_key, self.private_key = self.crypto.generate_keys()
 
+        # Liens persistants vers les routeurs suivants
+        self.links = LinkPool()
+
+        # Routeurs suivants : nom → (ip, port) d'après l'annuaire du MASTER
+        self.address_book = AddressBook(DirectoryCache(self.master_request))
+
+    def master_request(self, msg):
+        with socket.create_connection((MASTER_IP, MASTER_PORT)) as s:
+            return request(s, msg).decode()
+
     # ===============================================================
     #                   SERVEUR ROUTEUR (ÉCOUTE)
     # ===============================================================
@@ -54,7 +70,20 @@ class Router:
     # ===============================================================
     def handle_connection(self, client_socket):
 
-        received = client_socket.recv(10000).decode()
+        received = recv_frame(client_socket)
+        if received is None:
+            client_socket.close()
+            return
+
+        # Lien persistant d'un autre routeur : plusieurs messages à la suite
+        if received == LINK_HELLO:
+            serve_link(client_socket, self.process_message)
+            return
+
+        self.process_message(received)
+        client_socket.close()
+
+    def process_message(self, received):
         print(f"[{self.name}] Message reçu : {received[:80]}...")
 
         # Déchiffrer UNE couche d’oignon
@@ -65,20 +94,14 @@ class Router:
         if next_hop is None:
             # Dernière couche → message final
             print(f"[{self.name}] Message final reçu : {payload}")
-            client_socket.close()
-            return
+            return b"OK"
 
         # ============================================================
         #               ENVOI AU ROUTEUR SUIVANT
         # ============================================================
-        next_host = "127.0.0.1"
-        next_port = int(next_hop.replace("router", "80"))  # ex : router2 → port 802
+        next_host, next_port = self.address_book.router(next_hop)
 
         print(f"[{self.name}] Transmission vers {next_hop} ({next_host}:{next_port})")
 
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.connect((next_host, next_port))
-        sock.send(payload.encode())
-        sock.close()
-
-        client_socket.close()
+        # Lien persistant réutilisé d'un message à l'autre
+        return self.links.request((next_host, next_port), payload)
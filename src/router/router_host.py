@@ -0,0 +1,187 @@
+import sys
+import json
+import socket
+import time
+import asyncio
+import threading
+
+from src.common.startup import StartupTimer
+from src.common.crypto import key_bits_setting
+from src.common.directory import AddressBook, DirectoryCache
+from src.common.framing import request
+from src.router import router_server
+from src.router.async_router_server import AsyncRouterServer
+from src.router.supervisor import BASE_PORT
+
+"""
+============================================================
+    HÔTE DE ROUTEURS VIRTUELS (SAE 302)
+------------------------------------------------------------
+Des centaines de routeurs dans UN SEUL processus :
+- chaque routeur garde son nom, ses clés RSA et son port
+- une seule boucle asyncio accepte les connexions de tous
+- un seul executor pour le déchiffrement
+- un seul annuaire local, partagé
+- un seul thread de heartbeat : tous les routeurs en une
+  requête "HEARTBEATS [...]" au MASTER
+- couche destinée à un routeur du même hôte → appel direct,
+  sans socket (voir AsyncRouterServer.local_peers)
+
+Un routeur "virtuel" ne coûte que ses objets (clés, files,
+circuits) : ni interpréteur, ni thread, ni boucle à lui.
+============================================================
+
+Usage :
+    python -m src.router.router_host N [premier] [hôte] [bits_clé]
+    → router<premier>..router<premier+N-1> sur BASE_PORT + numéro
+"""
+
+# Heartbeat groupé vers le MASTER (secondes)
+HEARTBEAT_INTERVAL = router_server.HEARTBEAT_INTERVAL
+
+
+def raise_fd_limit():
+    """Un port d'écoute par routeur : on monte la limite de fichiers ouverts au maximum."""
+    try:
+        import resource
+    except ImportError:     # Windows : pas de limite à changer
+        return
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError) as e:
+            print(f"[HÔTE] ⚠ Limite de fichiers ouverts inchangée ({soft}) : {e}")
+
+
+class RouterHost:
+    """
+    Plusieurs AsyncRouterServer dans une même boucle.
+    Options des routeurs (store_and_forward, max_frame...) : router_options.
+    """
+
+    def __init__(self, host="0.0.0.0", executor=None, **router_options):
+        self.host = host
+        self.executor = executor
+        self.router_options = router_options
+
+        # nom → AsyncRouterServer
+        self.routers = {}
+
+        # Annuaire commun : une seule mise à jour pour tous les routeurs
+        self.address_book = AddressBook(
+            DirectoryCache(self.master_request), router_server.CLIENT_ADDRESSES
+        )
+
+        # Tous les ports ouverts
+        self.ready = threading.Event()
+
+    # ============================================================
+    #  ROUTEURS HÉBERGÉS
+    # ============================================================
+    def add(self, name, port, **options):
+        """
+        Crée un routeur (clés + enregistrement auprès du MASTER) ; à appeler avant serve().
+        options (key_bits...) : complètent router_options pour ce routeur.
+        """
+        options = dict(self.router_options, **options)
+        router = AsyncRouterServer(name, self.host, port, executor=self.executor, **options)
+
+        router.address_book = self.address_book
+        router.client_addresses = self.address_book.clients
+        router.local_peers = self.routers
+
+        self.routers[name] = router
+        return router
+
+    def add_range(self, count, first=1, base_port=BASE_PORT, **options):
+        """router<first>..router<first+count-1>, routerN sur base_port + N (options : voir add)."""
+        for i in range(first, first + count):
+            self.add(f"router{i}", base_port + i, **options)
+
+    # ============================================================
+    #  MASTER : ANNUAIRE + HEARTBEATS GROUPÉS
+    # ============================================================
+    def master_request(self, msg):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.connect((router_server.MASTER_IP, router_server.MASTER_PORT))
+            return request(s, msg).decode()
+
+    def heartbeat(self, loads):
+        """Un seul heartbeat pour tous (loads = nom → charge) ; réenregistre les oubliés."""
+        batch = [{"name": name, "load": load} for name, load in loads.items()]
+        unknown = json.loads(self.master_request("HEARTBEATS " + json.dumps(batch)))
+
+        for name in unknown:
+            router = self.routers[name]
+            router.registered = router.register_to_master()
+
+    def start_heartbeat(self, interval=HEARTBEAT_INTERVAL):
+        threading.Thread(target=self._heartbeat_loop, args=(interval,), daemon=True).start()
+
+    def _heartbeat_loop(self, interval):
+        try:
+            self.address_book.refresh()
+        except (OSError, ValueError) as e:
+            print(f"[HÔTE] ⚠ Annuaire indisponible : {e}")
+
+        samples = {name: (time.monotonic(), router.messages, time.process_time())
+                   for name, router in self.routers.items()}
+        while True:
+            time.sleep(interval)
+
+            loads = {}
+            for name, router in list(self.routers.items()):
+                loads[name], samples[name] = router.load_report(samples[name])
+
+            try:
+                self.heartbeat(loads)
+                self.address_book.refresh()
+            except (OSError, ValueError) as e:
+                print(f"[HÔTE] ⚠ Heartbeat impossible : {e}")
+
+    # ============================================================
+    #  DÉMARRAGE : TOUS LES PORTS DANS UNE BOUCLE
+    # ============================================================
+    def start(self, timer=None):
+        raise_fd_limit()
+        self.start_heartbeat()
+        try:
+            asyncio.run(self.serve(timer))
+        finally:
+            for router in self.routers.values():
+                router.close()
+
+    async def serve(self, timer=None):
+        servers = [await router.open_server() for router in self.routers.values()]
+
+        print(f"[HÔTE] {len(servers)} routeurs en écoute dans un seul processus.")
+        self.ready.set()
+
+        if timer is not None:
+            timer.mark("écoute")
+            timer.report()
+
+        try:
+            await asyncio.gather(*(server.serve_forever() for server in servers))
+        finally:
+            for server in servers:
+                server.close()
+
+
+# ============================================================
+#  LANCEMENT DE L'HÔTE
+# ============================================================
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    first = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    host = sys.argv[3] if len(sys.argv) > 3 else "0.0.0.0"
+    key_bits = key_bits_setting(sys.argv[4] if len(sys.argv) > 4 else None)
+
+    timer = StartupTimer(f"HÔTE {count} routeurs")
+    router_host = RouterHost(host)
+    router_host.add_range(count, first, key_bits=key_bits)
+    timer.mark("clés + MASTER")
+
+    router_host.start(timer)
@@ -1,13 +1,33 @@
 import sys
 import socket
 import json
-import psutil
-from src.common.crypto import RSAEncryption
-from src.common.onion import OnionRouter
+import threading
+import time
+from src.common.startup import StartupTimer, bind_listener
+from src.common.crypto import KEY_BITS, RSAEncryption, key_bits_setting
+from src.common.onion import OnionRouter, split_destination
+from src.common.circuit import CircuitTable
+from src.common.directory import AddressBook, DirectoryCache
+from src.common.wire import KIND_STREAM_CELL, circuit_kind
+from src.common.stream import is_stream_data
+from src.common.framing import MAX_FRAME_SIZE, recv_frame, send_frame, request
+from src.common.pool import LINK_HELLO, LinkPool, serve_link
+from src.router.forwarding import ForwardQueues
+from src.router.supervisor import notify_ready
 
 MASTER_IP = "192.168.200.2"
 MASTER_PORT = 9000
 
+# Heartbeat vers le MASTER (secondes) : charge du routeur + preuve de vie
+HEARTBEAT_INTERVAL = 5.0
+
+# Adresses des clients tant que le MASTER ne les a pas annoncées
+# (les routeurs, eux, sont toujours résolus par l'annuaire)
+CLIENT_ADDRESSES = {
+    "clientA": ("127.0.0.1", 9001),
+    "clientB": ("127.0.0.1", 9100),
+}
+
 
 class RouterServer:
     """
@@ -16,41 +36,67 @@ class RouterServer:
     - Génère ses clés RSA
     - S’enregistre auprès du MASTER
     - Déchiffre UNE couche d’oignon
-    - Transmet au prochain saut
+    - Transmet au prochain saut (file d'attente par saut suivant)
     - Ou envoie au client final (A ou B)
+    - Envoie un heartbeat périodique au MASTER (file, messages/s, CPU)
     """
 
-    def __init__(self, name, host, port):
+    def __init__(self, name, host, port, max_frame=MAX_FRAME_SIZE, store_and_forward=True,
+                 key_bits=KEY_BITS, decrypt_workers=0):
         self.name = name
         self.host = host
         self.port = port
 
-        # Génération des clés RSA
-        rsa = RSAEncryption()
+        # True  → acquittement immédiat + transmission par les workers
+        # False → on attend la réponse de toute la chaîne (historique)
+        self.store_and_forward = store_and_forward
+
+        # Taille maximale d'une couche reçue (octets)
+        self.max_frame = max_frame
+
+        # Génération des clés RSA (key_bits = taille du module n)
+        rsa = RSAEncryption(key_bits)
         self.public_key, self.private_key = rsa.generate_keys()
 
         self.onion = OnionRouter()
 
-        # Enregistrement automatique auprès du MASTER
-        self.register_to_master()
+        # decrypt_workers > 0 → déchiffrement des oignons sur plusieurs cœurs
+        # (pool de processus, importé seulement s'il est demandé)
+        self.decryption = None
+        if decrypt_workers:
+            from src.router.decryption_pool import DecryptionPool
+            self.decryption = DecryptionPool(self.private_key, decrypt_workers)
 
-    # ============================================================
-    #  LIBÉRER LE PORT S’IL EST DÉJÀ UTILISÉ
-    # ============================================================
-    def free_port(self):
-        for proc in psutil.process_iter(['pid', 'name']):
-            try:
-                for conn in proc.net_connections(kind='inet'):
-                    if conn.laddr.port == self.port:
-                        print(f"[ROUTER {self.name}] ⚠ Port {self.port} occupé, arrêt PID {proc.pid}")
-                        proc.kill()
-                        return
-            except Exception:
-                continue
+        # Circuits établis : id → (saut suivant, clé de session)
+        self.circuits = CircuitTable()
+
+        # Annuaire local : nom → (ip, port) des routeurs et des clients,
+        # rafraîchi avec les heartbeats (aucune requête par message)
+        self.address_book = AddressBook(DirectoryCache(self.master_request), CLIENT_ADDRESSES)
+
+        # Destinataires finaux : nom → (ip, port)
+        self.client_addresses = self.address_book.clients
+
+        # Liens persistants vers les routeurs suivants
+        self.links = LinkPool(max_frame=max_frame)
+
+        # Files sortantes bornées, une par saut suivant
+        self.forwarding = ForwardQueues(self.deliver, name=name)
+
+        # Couches reçues (débit publié dans les heartbeats)
+        self.messages = 0
+
+        # Enregistrement automatique auprès du MASTER
+        self.registered = self.register_to_master()
 
     # ============================================================
     #  ENREGISTREMENT AUPRÈS DU MASTER
     # ============================================================
+    def master_request(self, msg):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.connect((MASTER_IP, MASTER_PORT))
+            return request(s, msg).decode()
+
     def register_to_master(self):
         try:
             data = {
@@ -60,97 +106,276 @@ class RouterServer:
                 "public_key": list(self.public_key)
             }
 
-            msg = "REGISTER_ROUTER " + json.dumps(data)
-
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.connect((MASTER_IP, MASTER_PORT))
-                s.sendall(msg.encode())
+            self.master_request("REGISTER_ROUTER " + json.dumps(data))
 
             print(f"[ROUTER {self.name}] ✔ Enregistré auprès du MASTER.")
+            return True
 
         except Exception as e:
             print(f"[ROUTER {self.name}] ❌ ERREUR REGISTER: {e}")
+            return False
+
+    # ============================================================
+    #  HEARTBEAT : CHARGE DU ROUTEUR
+    # ============================================================
+    def queue_depth(self):
+        return self.forwarding.depth()
+
+    def load_report(self, previous):
+        """
+        Charge depuis la mesure précédente (previous = (instant, messages, cpu)).
+        Retourne (rapport, nouvelle mesure).
+        """
+        now, messages, cpu = time.monotonic(), self.messages, time.process_time()
+        elapsed = max(now - previous[0], 1e-6)
+
+        report = {
+            "queue": self.queue_depth(),
+            "rate": round((messages - previous[1]) / elapsed, 1),
+            "cpu": round(min(1.0, (cpu - previous[2]) / elapsed), 2),
+        }
+        return report, (now, messages, cpu)
+
+    def heartbeat(self, load):
+        """Un heartbeat ; le MASTER répond UNKNOWN s'il nous a oubliés."""
+        reply = self.master_request("HEARTBEAT " + json.dumps({"name": self.name, "load": load}))
+        if reply == "UNKNOWN":
+            self.registered = self.register_to_master()
+
+    def start_heartbeat(self, interval=HEARTBEAT_INTERVAL):
+        threading.Thread(target=self._heartbeat_loop, args=(interval,), daemon=True).start()
+
+    def _heartbeat_loop(self, interval):
+        # Premier chargement de l'annuaire local dès le démarrage
+        self.refresh_addresses()
+
+        sample = (time.monotonic(), self.messages, time.process_time())
+        while True:
+            time.sleep(interval)
+            load, sample = self.load_report(sample)
+            try:
+                self.heartbeat(load)
+
+                # Annuaire local à jour (le plus souvent : "pas de changement")
+                self.address_book.refresh()
+            except (OSError, ValueError) as e:
+                print(f"[ROUTER {self.name}] ⚠ Heartbeat impossible : {e}")
 
     # ============================================================
     #  DÉMARRAGE DU ROUTEUR
     # ============================================================
-    def start(self):
-        self.free_port()
+    def start(self, timer=None):
+        self.start_heartbeat()
 
+        # Bind direct ; le port n'est libéré (psutil) que s'il est vraiment pris
+        server = bind_listener(self.host, self.port, f"ROUTER {self.name}")
         print(f"[ROUTER {self.name}] En écoute sur {self.host}:{self.port}")
 
-        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        server.bind((self.host, self.port))
-        server.listen()
+        # Port ouvert + enregistré : le superviseur peut compter sur nous
+        notify_ready(self.name, self.port, self.registered)
 
-        while True:
-            conn, addr = server.accept()
-            data = conn.recv(4096).decode()
-
-            print(f"[{self.name}] Couche reçue : {data[:80]}...")
-
-            next_hop, payload = self.onion.process_onion_layer(
-                data, self.private_key
-            )
-
-            print(f"[{self.name}] next_hop = {next_hop}")
-
-            # =============================
-            # DESTINATAIRES FINAUX
-            # =============================
-            if next_hop == "clientB":
-                print(f"[{self.name}] Envoi au destinataire final (clientB).")
-                self.send_to_clientB(payload)
-                conn.sendall(b"OK")
-                conn.close()
-                continue
-
-            if next_hop == "clientA":
-                print(f"[{self.name}] Envoi au destinataire final (clientA).")
-                self.send_to_clientA(payload)
-                conn.sendall(b"OK")
-                conn.close()
-                continue
-
-            # =============================
-            # ROUTEUR SUIVANT
-            # =============================
-            if next_hop is None:
-                print(f"[{self.name}] ❌ next_hop invalide, abandon.")
-                conn.close()
-                continue
-
-            result = self.forward_to_next(next_hop, payload)
-            conn.sendall(result.encode())
+        if timer is not None:
+            timer.mark("écoute")
+            timer.report()
+
+        try:
+            while True:
+                conn, addr = server.accept()
+
+                # Thread : un lien persistant peut rester ouvert longtemps
+                threading.Thread(target=self.handle_connection, args=(conn,), daemon=True).start()
+        finally:
+            server.close()
+            self.close()
+
+    def close(self):
+        """Libère les ressources du routeur (processus de déchiffrement)."""
+        if self.decryption is not None:
+            self.decryption.close()
+            self.decryption = None
+
+    # ============================================================
+    #  RÉCEPTION : MESSAGE UNIQUE OU LIEN PERSISTANT
+    # ============================================================
+    def handle_connection(self, conn):
+        # Octets bruts : couche texte "12,54,..." ou couche binaire
+        try:
+            data = recv_frame(conn, self.max_frame)
+        except ConnectionError as e:
+            print(f"[{self.name}] ❌ Réception incomplète : {e}")
             conn.close()
+            return
+
+        if data is None:
+            conn.close()
+            return
+
+        # Lien d'un autre routeur : plusieurs messages multiplexés
+        if data == LINK_HELLO:
+            serve_link(conn, self.handle_layer, self.max_frame)
+            return
+
+        try:
+            send_frame(conn, self.handle_layer(data))
+        except OSError as e:
+            print(f"[{self.name}] ❌ Réponse impossible : {e}")
+        finally:
+            conn.close()
+
+    def handle_layer(self, data):
+        """Déchiffre UNE couche puis la transmet → réponse pour l'amont."""
+        if circuit_kind(data) == KIND_STREAM_CELL:
+            return self.relay_stream_cell(data)
+
+        print(f"[{self.name}] Couche reçue : {data[:80]}...")
+        self.messages += 1
+
+        try:
+            next_hop, payload = self.open_layer(data)
+        except (ValueError, UnicodeDecodeError) as e:
+            print(f"[{self.name}] ❌ Couche invalide : {e}")
+            return f"[{self.name}] ERREUR : couche invalide ({e})".encode()
+
+        print(f"[{self.name}] next_hop = {next_hop}")
+
+        # Fin d'un CREATE : circuit établi jusqu'à la sortie
+        if payload is None:
+            return b"OK"
+
+        if next_hop is None:
+            print(f"[{self.name}] ❌ next_hop invalide, abandon.")
+            return f"[{self.name}] ERREUR : next_hop invalide".encode()
+
+        destination, receipt = split_destination(next_hop)
+
+        # =============================
+        # STOCKER PUIS TRANSMETTRE
+        # =============================
+        # (sauf messages de circuit, relayés de bout en bout : "OK" à un CREATE
+        # = circuit établi jusqu'à la sortie, sinon les cellules de flux
+        # pourraient le doubler ; un "Circuit inconnu" plus loin sur une CELL
+        # doit revenir au client pour qu'il reconstruise son circuit)
+        if self.store_and_forward and not circuit_kind(data):
+            # Saut inconnu refusé tout de suite : pas de file (ni de workers)
+            # pour un nom quelconque, pas de nouvelles tentatives inutiles
+            try:
+                self.check_destination(destination)
+            except (OSError, ValueError) as e:
+                print(f"[{self.name}] ❌ Destination refusée : {e}")
+                return f"[{self.name}] ERREUR : {e}".encode()
+
+            # On acquitte uniquement NOTRE saut : plus de socket tenue
+            # ouverte sur toute la chaîne jusqu'à la livraison
+            if not self.forwarding.put(destination, (payload, receipt)):
+                print(f"[{self.name}] ❌ File vers {destination} pleine, message refusé.")
+                return f"[{self.name}] ERREUR : file vers {destination} pleine".encode()
+            return b"OK"
+
+        # =============================
+        # MODE SYNCHRONE (historique)
+        # =============================
+        try:
+            return self.deliver(destination, (payload, receipt))
+        except Exception as e:
+            return f"[{self.name}] ERREUR : {e}".encode()
+
+    def relay_stream_cell(self, data):
+        """
+        Cellule de flux : relayée tout de suite (pas de file), acquittée seulement
+        quand le saut suivant l'a acceptée → la fenêtre du circuit freine l'amont.
+        """
+        self.messages += 1
+        try:
+            with self.circuits.stream_slot(data):
+                next_hop, payload = self.open_layer(data)
+                return self.deliver(next_hop, (payload, None))
+        except Exception as e:
+            return f"[{self.name}] ERREUR : {e}".encode()
+
+    def open_layer(self, data):
+        """Oignon classique ou message de circuit → (next_hop, payload)."""
+        if circuit_kind(data):
+            return self.circuits.process(data, self.private_key)
+        if self.decryption is not None:
+            return self.decryption.process(data)
+        return self.onion.process_onion_layer(data, self.private_key)
 
     # ============================================================
     #  TRANSMISSION AU ROUTEUR SUIVANT
     # ============================================================
+    def refresh_addresses(self):
+        try:
+            self.address_book.refresh()
+        except (OSError, ValueError) as e:
+            print(f"[{self.name}] ⚠ Annuaire indisponible : {e}")
+
+    def router_address(self, next_name):
+        """Nom → (ip, port) du routeur suivant, d'après l'annuaire local."""
+        return self.address_book.router(next_name)
+
+    def check_destination(self, destination):
+        """Client ou routeur connu de l'annuaire ; sinon ValueError."""
+        if destination not in self.client_addresses:
+            self.router_address(destination)
+
     def forward_to_next(self, next_name, payload):
         try:
-            port = 8000 + int(next_name.replace("router", ""))
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.connect(("127.0.0.1", port))
-                s.sendall(payload.encode())
-                reply = s.recv(4096).decode()
-                return reply
+            # Lien réutilisé : pas de connect / TIME_WAIT par message
+            return self.links.request(self.router_address(next_name), payload).decode()
         except Exception as e:
             return f"[{self.name}] ERREUR : {e}"
 
+    def deliver(self, destination, item):
+        """
+        Livre (payload, accusé) au saut suivant ou au client final.
+        Lève une exception en cas d'échec (les workers réessaient).
+        """
+        payload, receipt = item
+
+        if destination in self.client_addresses and is_stream_data(payload):
+            # Flux : lien persistant vers le client, acquitté cellule par cellule
+            reply = self.links.request(self.client_addresses[destination], payload)
+            if reply != b"OK":
+                raise ConnectionError(reply.decode(errors="replace"))
+            return reply
+
+        if destination in self.client_addresses:
+            print(f"[{self.name}] Envoi au destinataire final ({destination}).")
+            try:
+                self.send_to_client(destination, payload)
+            except OSError:
+                # Le client a peut-être changé d'adresse : annuaire relu avant la nouvelle tentative
+                self.refresh_addresses()
+                raise
+
+            # Accusé de bout en bout : oignon de retour fourni par l'expéditeur,
+            # relayé comme une couche ordinaire (on ne sait pas à qui il revient)
+            if receipt is not None:
+                reply_hop, reply_onion = receipt
+                try:
+                    self.deliver(reply_hop, (reply_onion, None))
+                except (OSError, ValueError) as e:
+                    print(f"[{self.name}] ⚠ Accusé non envoyé vers {reply_hop} : {e}")
+            return b"OK"
+
+        reply = self.links.request(self.router_address(destination), payload)
+        if reply != b"OK":
+            raise ConnectionError(reply.decode(errors="replace"))
+        return reply
+
     # ============================================================
     #  ENVOI AUX CLIENTS FINAUX
     # ============================================================
-    def send_to_clientB(self, msg):
+    def send_to_client(self, client_name, msg):
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.connect(("127.0.0.1", 9100))
-            s.sendall(msg.encode())
+            s.connect(self.client_addresses[client_name])
+            send_frame(s, msg)
+
+    def send_to_clientB(self, msg):
+        self.send_to_client("clientB", msg)
 
     def send_to_clientA(self, msg):
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.connect(("127.0.0.1", 9001))
-            s.sendall(msg.encode())
+        self.send_to_client("clientA", msg)
 
 
 # ============================================================
@@ -159,12 +384,17 @@ class RouterServer:
 if __name__ == "__main__":
     """
     Usage :
-    python -m src.router.router_server router1 127.0.0.1 8001
+    python -m src.router.router_server router1 127.0.0.1 8001 [workers_déchiffrement] [bits_clé]
+    (bits_clé absent → variable SAE302_KEY_BITS, sinon 16)
     """
 
     name = sys.argv[1]
     host = sys.argv[2]
     port = int(sys.argv[3])
+    decrypt_workers = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+    key_bits = key_bits_setting(sys.argv[5] if len(sys.argv) > 5 else None)
 
-    router = RouterServer(name, host, port)
-    router.start()
+    timer = StartupTimer(name)
+    router = RouterServer(name, host, port, key_bits=key_bits, decrypt_workers=decrypt_workers)
+    timer.mark("clés + MASTER")
+    router.start(timer)
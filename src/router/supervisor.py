@@ -0,0 +1,227 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from src.common.framing import recv_frame, send_frame
+
+"""
+============================================================
+    SUPERVISEUR DE ROUTEURS (SAE 302)
+------------------------------------------------------------
+- Lance N routeurs EN PARALLÈLE (processus fils), sans pause fixe
+- Attend que chacun annonce "READY" (port ouvert + enregistré
+  auprès du MASTER) au lieu de deviner avec des sleep
+- Relance un routeur qui s'arrête de lui-même
+- Ajoute / arrête des routeurs à la volée (scale)
+
+Poignée de main : le superviseur écoute sur une adresse locale
+passée aux fils dans READY_ENV ; le fils s'y connecte et envoie
+    {"name": ..., "port": ..., "registered": true/false}
+============================================================
+"""
+
+READY_ENV = "SAE302_READY_ADDR"
+
+DEFAULT_MODULE = "src.router.router_server"
+BASE_PORT = 8000
+
+# Attente max de tous les READY d'un lancement (secondes)
+READY_TIMEOUT = 30.0
+
+# Relances max d'un même routeur, et vérification des fils
+MAX_RESTARTS = 5
+MONITOR_INTERVAL = 0.5
+
+
+# ============================================================
+#   CÔTÉ ROUTEUR : ANNONCER QU'ON EST PRÊT
+# ============================================================
+def notify_ready(name, port, registered):
+    """Prévient le superviseur (s'il y en a un) : port ouvert, enregistrement fait."""
+    address = os.environ.get(READY_ENV)
+    if not address:
+        return
+
+    host, _, ready_port = address.rpartition(":")
+    try:
+        with socket.create_connection((host, int(ready_port)), timeout=5) as s:
+            send_frame(s, json.dumps({"name": name, "port": port, "registered": registered}))
+    except OSError as e:
+        print(f"[ROUTER {name}] ⚠ Superviseur injoignable : {e}")
+
+
+# ============================================================
+#   CÔTÉ SUPERVISEUR
+# ============================================================
+class RouterSupervisor:
+    """
+    Routeurs routerN sur base_port + N.
+    command(nom, hôte, port) → liste d'arguments du processus fils.
+    key_bits : taille des clés des routeurs (None → SAE302_KEY_BITS ou défaut du routeur).
+    """
+
+    def __init__(self, host="127.0.0.1", base_port=BASE_PORT, module=DEFAULT_MODULE,
+                 command=None, ready_timeout=READY_TIMEOUT, max_restarts=MAX_RESTARTS, quiet=False,
+                 key_bits=None):
+        self.host = host
+        self.base_port = base_port
+        # Arguments du routeur : nom hôte port [workers_déchiffrement] [bits_clé]
+        key_args = ["0", str(key_bits)] if key_bits else []
+        self.command = command or (lambda name, host, port: [
+            sys.executable, "-m", module, name, host, str(port), *key_args
+        ])
+        self.ready_timeout = ready_timeout
+        self.max_restarts = max_restarts
+        self.quiet = quiet
+
+        self.processes = {}     # nom → Popen
+        self.ready = {}         # nom → threading.Event
+        self.registered = {}    # nom → enregistré auprès du MASTER ?
+        self.restarts = {}      # nom → nombre de relances
+        self._stopping = set()
+        self._lock = threading.Lock()
+
+        # Réception des READY
+        self._ready_server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._ready_server.bind(("127.0.0.1", 0))
+        self._ready_server.listen(128)
+        self.ready_address = "%s:%d" % self._ready_server.getsockname()
+
+        threading.Thread(target=self._ready_loop, daemon=True).start()
+        threading.Thread(target=self._monitor_loop, daemon=True).start()
+
+    @property
+    def running(self):
+        with self._lock:
+            return sorted(self.processes, key=_index)
+
+    # ============================================================
+    #   LANCEMENT
+    # ============================================================
+    def start(self, count):
+        """Lance router1..routerN (ceux qui manquent) puis attend leurs READY."""
+        names = [f"router{i}" for i in range(1, count + 1)]
+        return self.launch([name for name in names if name not in self.processes])
+
+    def launch(self, names):
+        """Lance tous les routeurs d'un coup ; retourne ceux qui ne sont pas prêts à temps."""
+        started = time.monotonic()
+
+        for name in names:
+            self._spawn(name)
+
+        deadline = started + self.ready_timeout
+        late = [name for name in names
+                if not self.ready[name].wait(max(0.0, deadline - time.monotonic()))]
+
+        ready = len(names) - len(late)
+        print(f"[SUPERVISEUR] {ready}/{len(names)} routeurs prêts en {time.monotonic() - started:.2f} s")
+        for name in names:
+            if name not in late and not self.registered.get(name):
+                print(f"[SUPERVISEUR] ⚠ {name} prêt mais non enregistré auprès du MASTER")
+        return late
+
+    def _spawn(self, name):
+        port = self.base_port + _index(name)
+        env = dict(os.environ, **{READY_ENV: self.ready_address})
+        output = subprocess.DEVNULL if self.quiet else None
+
+        with self._lock:
+            self.ready[name] = threading.Event()
+            self.processes[name] = subprocess.Popen(
+                self.command(name, self.host, port), env=env, stdout=output, stderr=output
+            )
+
+    def _ready_loop(self):
+        while True:
+            try:
+                conn, _ = self._ready_server.accept()
+            except OSError:
+                return
+
+            with conn:
+                try:
+                    info = json.loads(recv_frame(conn))
+                except (ConnectionError, TypeError, ValueError):
+                    continue
+
+            name = info.get("name")
+            self.registered[name] = info.get("registered", False)
+            event = self.ready.get(name)
+            if event is not None:
+                event.set()
+
+    # ============================================================
+    #   SURVEILLANCE + RELANCE
+    # ============================================================
+    def _monitor_loop(self):
+        while True:
+            time.sleep(MONITOR_INTERVAL)
+            self.check_processes()
+
+    def check_processes(self):
+        with self._lock:
+            crashed = [(name, proc.returncode) for name, proc in self.processes.items()
+                       if proc.poll() is not None and name not in self._stopping]
+
+        for name, code in crashed:
+            count = self.restarts.get(name, 0)
+            if count >= self.max_restarts:
+                print(f"[SUPERVISEUR] ❌ {name} arrêté (code {code}), trop de relances.")
+                with self._lock:
+                    self.processes.pop(name, None)
+                continue
+
+            self.restarts[name] = count + 1
+            print(f"[SUPERVISEUR] ⚠ {name} arrêté (code {code}), relance {count + 1}/{self.max_restarts}")
+            self._spawn(name)
+
+    # ============================================================
+    #   ARRÊT + MISE À L'ÉCHELLE
+    # ============================================================
+    def stop(self, *names, timeout=5.0):
+        """Arrête des routeurs (tous signalés d'abord, puis attendus)."""
+        with self._lock:
+            procs = [self.processes[name] for name in names if name in self.processes]
+            self._stopping.update(names)
+
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+        with self._lock:
+            for name in names:
+                self.processes.pop(name, None)
+                self._stopping.discard(name)
+
+    def scale(self, count):
+        """Ajuste le nombre de routeurs : lance les manquants ou arrête les derniers."""
+        current = self.running
+        if count > len(current):
+            used = set(current)
+            names, i = [], 1
+            while len(current) + len(names) < count:
+                if f"router{i}" not in used:
+                    names.append(f"router{i}")
+                i += 1
+            return self.launch(names)
+
+        self.stop(*current[count:])
+        return []
+
+    def stop_all(self):
+        self.stop(*self.running)
+        self._ready_server.close()
+
+
+def _index(name):
+    return int(name.replace("router", ""))
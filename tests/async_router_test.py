@@ -0,0 +1,105 @@
+import sys
+import os
+import time
+import asyncio
+import socket
+
+# Pour pouvoir importer src/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.router.async_router_server import AsyncRouterServer
+from src.common.onion import OnionRouter
+from src.common.wire import FORMAT_BINARY
+from src.common.framing import read_frame, write_frame
+from src.common.pool import LINK_HELLO, STREAM_ID
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def envoyer(port, data):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    await write_frame(writer, data)
+    reply = await read_frame(reader)
+    writer.close()
+    return reply
+
+
+async def scenario():
+    received = []
+
+    # Faux clientB
+    async def client_b(reader, writer):
+        received.append((await read_frame(reader)).decode())
+        writer.close()
+
+    # Faux routeur très lent (simule une chaîne qui traîne)
+    async def slow_router(reader, writer):
+        assert await read_frame(reader) == LINK_HELLO
+        frame = await read_frame(reader)
+        await asyncio.sleep(1.0)
+        await write_frame(writer, b"OK", frame[:STREAM_ID.size])
+        writer.close()
+
+    client_port, slow_port, router_port = free_port(), free_port(), free_port()
+    servers = [
+        await asyncio.start_server(client_b, "127.0.0.1", client_port),
+        await asyncio.start_server(slow_router, "127.0.0.1", slow_port),
+    ]
+
+    # Mode synchrone : l'amont attend la réponse du saut lent
+    router = AsyncRouterServer("router1", "127.0.0.1", router_port, store_and_forward=False)
+    router.client_addresses = {"clientB": ("127.0.0.1", client_port)}
+    router.router_address = lambda name: ("127.0.0.1", slow_port)
+    serve_task = asyncio.create_task(router.serve())
+    await asyncio.sleep(0.2)
+
+    onion = OnionRouter(FORMAT_BINARY)
+    keys = {"router1": router.public_key}
+    direct = onion.create_onion_message("Bonjour", "clientB", ["router1"], keys)
+
+    # Couche "router1 → router9 (lent)"
+    table_layer = onion.create_onion_message("x", "clientB", ["router1", "router9"],
+                                             {**keys, "router9": router.public_key})
+
+    start = time.perf_counter()
+    slow = asyncio.create_task(envoyer(router_port, table_layer))
+    await asyncio.sleep(0.1)
+
+    # Le message direct ne doit PAS attendre le saut lent
+    reply = await envoyer(router_port, direct)
+    fast_time = time.perf_counter() - start
+
+    assert reply == b"OK"
+    assert await slow == b"OK"
+
+    serve_task.cancel()
+    for s in servers:
+        s.close()
+
+    return received, fast_time
+
+
+def test_router_async():
+    print("\n===== TEST ROUTER ASYNC - DÉBUT =====")
+
+    received, fast_time = asyncio.run(scenario())
+
+    print("Messages reçus par clientB :", received)
+    print(f"Temps du message direct : {fast_time:.3f} s")
+
+    assert received == ["Bonjour"]
+    assert fast_time < 0.8, "Un saut lent ne doit pas bloquer les autres connexions"
+
+    print("✔ Test router async OK")
+    print("===== FIN TEST ROUTER ASYNC =====\n")
+
+
+if __name__ == "__main__":
+    from conftest import without_master
+
+    with without_master():
+        test_router_async()
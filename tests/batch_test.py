@@ -0,0 +1,71 @@
+import sys
+import os
+
+# Pour pouvoir importer src/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common import batch
+from src.common.crypto import RSAEncryption
+from src.common.onion import OnionRouter
+from src.common.wire import FORMAT_TEXT, FORMAT_BINARY, FORMAT_HYBRID
+
+CHAIN = ["router1", "router2", "router3"]
+
+
+def reseau():
+    keys = {name: RSAEncryption().generate_keys() for name in CHAIN}
+    return {name: pair[0] for name, pair in keys.items()}, {name: pair[1] for name, pair in keys.items()}
+
+
+def test_lots_identiques_un_par_un():
+    public_keys, private_keys = reseau()
+    autre_chaine = CHAIN[:2]
+
+    # Deux chaînes, caractères hors latin-1, message vide : tout le lot est couvert
+    lot = [(f"Bonjour {i} ! " * i, "clientB", CHAIN, public_keys) for i in range(30)]
+    lot += [("Ωmega ✔", "clientB", CHAIN, public_keys), ("", "clientA", autre_chaine, public_keys)]
+
+    for wire_format in (FORMAT_TEXT, FORMAT_BINARY, FORMAT_HYBRID):
+        onion = OnionRouter(wire_format)
+        layers = onion.create_onion_messages(lot)
+
+        # Oignons RSA déterministes : exactement les mêmes que un par un
+        if wire_format != FORMAT_HYBRID:
+            assert layers == [onion.create_onion_message(*item) for item in lot], wire_format
+
+        # Chaque routeur vide "sa file" en un seul appel
+        current = layers[:30]
+        for name in CHAIN:
+            results = onion.process_onion_layers(current, private_keys[name])
+            assert results == [onion.process_onion_layer(layer, private_keys[name]) for layer in current]
+            current = [payload for _, payload in results]
+
+        assert current == [item[0] for item in lot[:30]], wire_format
+
+    print(f"[TEST] Lots identiques au traitement un par un (NumPy : {batch.numpy_available()}) OK")
+
+
+def test_couche_invalide_dans_un_lot():
+    public_keys, private_keys = reseau()
+    attendu = ("router2", None)
+
+    for wire_format, invalides in ((FORMAT_TEXT, ["12,abc,7", "12,,7"]),
+                                   (FORMAT_BINARY, [b"\xa7\x01\x01\xff\xff", b"\xa7\x01\x01\x00"])):
+        onion = OnionRouter(wire_format)
+        layers = onion.create_onion_messages([("Bonjour", "clientB", CHAIN, public_keys)] * 3)
+
+        for invalid in invalides:
+            # Couche invalide au milieu du lot : seule elle échoue
+            results = onion.process_onion_layers(layers[:1] + [invalid] + layers[1:], private_keys["router1"])
+            assert isinstance(results[1], ValueError), (wire_format, invalid)
+
+            valides = results[:1] + results[2:]
+            assert [(hop, None) for hop, _ in valides] == [attendu] * 3
+            assert valides == [onion.process_onion_layer(layer, private_keys["router1"]) for layer in layers]
+
+    print("[TEST] Couche invalide dans un lot : les autres couches sont déchiffrées OK")
+
+
+if __name__ == "__main__":
+    test_lots_identiques_un_par_un()
+    test_couche_invalide_dans_un_lot()
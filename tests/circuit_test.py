@@ -0,0 +1,67 @@
+import sys
+import os
+
+# Pour pouvoir importer src/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.crypto import RSAEncryption
+from src.common.circuit import Circuit, CircuitTable
+from src.common.wire import KIND_CIRCUIT_CELL, circuit_kind
+
+
+def test_circuit():
+    print("\n===== TEST CIRCUITS - DÉBUT =====")
+
+    chain = ["router1", "router2", "router3"]
+    keys = {name: RSAEncryption().generate_keys() for name in chain}
+    public_keys = {name: keys[name][0] for name in chain}
+    tables = {name: CircuitTable() for name in chain}
+
+    circuit = Circuit(chain, public_keys, "clientB")
+
+    # ------------------------------------------------------------
+    #   1) CREATE : chaque routeur note son entrée de circuit
+    # ------------------------------------------------------------
+    message = circuit.create_message()
+    expected = ["router2", "router3", "clientB"]
+
+    for name, hop in zip(chain, expected):
+        next_hop, message = tables[name].process(message, keys[name][1])
+        print(f"[{name}] CREATE → {next_hop}")
+        assert next_hop == hop
+        assert len(tables[name]) == 1
+
+    assert message is None, "La sortie n'a rien à livrer pour un CREATE"
+
+    # ------------------------------------------------------------
+    #   2) CELL : plusieurs messages sur le même circuit
+    # ------------------------------------------------------------
+    for text in ("Bonjour", "Deuxième message", "x" * 5000):
+        cell = circuit.cell(text)
+        assert circuit_kind(cell) == KIND_CIRCUIT_CELL
+
+        # Surcoût d'une cellule : en-tête + id + nonce + 1 MAC par saut
+        assert len(cell) == len(text.encode()) + 3 + 8 + 12 + 16 * 3
+
+        for name, hop in zip(chain, expected):
+            next_hop, cell = tables[name].process(cell, keys[name][1])
+            assert next_hop == hop
+
+        assert cell == text, "Le message final doit être intact"
+
+    # ------------------------------------------------------------
+    #   3) Circuit inconnu → refusé
+    # ------------------------------------------------------------
+    other = Circuit(chain, public_keys, "clientB")
+    try:
+        tables["router1"].process(other.cell("perdu"), keys["router1"][1])
+        assert False, "Un circuit inconnu doit être refusé"
+    except ValueError:
+        pass
+
+    print("✔ Test circuits OK")
+    print("===== FIN TEST CIRCUITS =====\n")
+
+
+if __name__ == "__main__":
+    test_circuit()
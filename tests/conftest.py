@@ -0,0 +1,28 @@
+import sys
+import os
+from contextlib import contextmanager
+
+import pytest
+
+# Pour pouvoir importer src/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.router.router_server as router_server
+
+
+@contextmanager
+def without_master():
+    """Pas de MASTER pendant le test : l'enregistrement des routeurs échoue tout de suite."""
+    master = (router_server.MASTER_IP, router_server.MASTER_PORT)
+    router_server.MASTER_IP, router_server.MASTER_PORT = "127.0.0.1", 1
+    try:
+        yield
+    finally:
+        router_server.MASTER_IP, router_server.MASTER_PORT = master
+
+
+@pytest.fixture(autouse=True)
+def no_master():
+    # Lancé en script (python tests/xxx_test.py) : voir "with without_master()" dans __main__
+    with without_master():
+        yield
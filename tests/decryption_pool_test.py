@@ -0,0 +1,92 @@
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Pour pouvoir importer src/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.router.router_server import RouterServer
+from src.router.decryption_pool import DecryptionPool
+from src.common.crypto import RSAEncryption
+from src.common.onion import OnionRouter
+from src.common.wire import FORMAT_TEXT, FORMAT_BINARY, FORMAT_HYBRID
+
+
+def couche(wire_format, message, public_key):
+    return OnionRouter(wire_format).create_onion_message(message, "clientB", ["router1"], {"router1": public_key})
+
+
+def test_pool_cles_16_bits():
+    public_key, private_key = RSAEncryption().generate_keys()
+    pool = DecryptionPool(private_key, workers=2, chunk_units=1000)
+    assert pool.pids and os.getpid() not in pool.pids
+
+    try:
+        # Grosse couche (texte et binaire) → morceaux en parallèle, même résultat
+        message = "Bonjour SAE 302 ! " * 500
+        for wire_format in (FORMAT_TEXT, FORMAT_BINARY):
+            layer = couche(wire_format, message, public_key)
+            assert pool.process(layer) == ("clientB", message)
+        assert pool.chunked == 2
+
+        # Petits messages indépendants → répartis entre les workers
+        layers = [couche(FORMAT_HYBRID, f"message {i}", public_key) for i in range(20)]
+        futures = [pool.submit(layer) for layer in layers]
+        wait(futures)
+        assert [f.result() for f in futures] == [("clientB", f"message {i}") for i in range(20)]
+        assert pool.chunked == 2
+    finally:
+        pool.close()
+
+    print("[TEST] Pool de déchiffrement (clés 16 bits) OK")
+
+
+def test_pool_grandes_cles():
+    public_key, private_key = RSAEncryption(512).generate_keys()
+    pool = DecryptionPool(private_key, workers=2, chunk_units=4)
+
+    try:
+        message = "Grande clé, couche découpée en blocs. " * 20
+        for wire_format in (FORMAT_TEXT, FORMAT_BINARY, FORMAT_HYBRID):
+            layer = couche(wire_format, message, public_key)
+            assert pool.process(layer) == ("clientB", message)
+        assert pool.chunked == 2
+
+        # Couche corrompue : l'erreur du worker remonte au routeur
+        try:
+            pool.process(b"\xa7\x01\x01" + b"\xff" * 640)
+            assert False, "Couche invalide acceptée"
+        except ValueError:
+            pass
+    finally:
+        pool.close()
+
+    print("[TEST] Pool de déchiffrement (clés 512 bits) OK")
+
+
+def test_routeur_multi_coeurs():
+    router = RouterServer("router1", "127.0.0.1", 0, decrypt_workers=2)
+    try:
+        layer = couche(FORMAT_BINARY, "Bonjour", router.public_key)
+        assert router.open_layer(layer) == ("clientB", "Bonjour")
+        assert router.decryption.layers == 1
+
+        # Plusieurs connexions en même temps : aucun comptage perdu
+        with ThreadPoolExecutor(8) as threads:
+            results = list(threads.map(router.open_layer, [layer] * 40))
+        assert results == [("clientB", "Bonjour")] * 40
+        assert router.decryption.layers == 41
+    finally:
+        router.close()
+    assert router.decryption is None
+
+    print("[TEST] Routeur avec déchiffrement multi-cœurs OK")
+
+
+if __name__ == "__main__":
+    from conftest import without_master
+
+    with without_master():
+        test_pool_cles_16_bits()
+        test_pool_grandes_cles()
+        test_routeur_multi_coeurs()
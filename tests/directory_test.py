@@ -0,0 +1,242 @@
+import sys
+import os
+import json
+import random
+import tempfile
+import zlib
+
+# Pour pouvoir importer src/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.directory import (
+    DirectoryChanges, DirectoryCache, RouterRegistry, AddressBook, select_path, ROLE_CLIENT
+)
+from src.master.master_server import MasterServer
+
+
+def router(name, port):
+    return {"name": name, "ip": "127.0.0.1", "port": port, "public_key": [3, 33]}
+
+
+def make_master():
+    """MASTER simulé : journal + table des routeurs, et un compteur de requêtes."""
+    changes = DirectoryChanges()
+    table = {}
+    requests = []
+
+    def register(r):
+        table[r["name"]] = r
+        changes.record_add(r)
+
+    def remove(name):
+        del table[name]
+        changes.record_remove(name)
+
+    def fetch(req):
+        requests.append(req)
+        return changes.response(req.split()[1:], lambda: list(table.values()))
+
+    return changes, register, remove, fetch, requests
+
+
+def test_cache_delta():
+    changes, register, remove, fetch, requests = make_master()
+    register(router("router1", 8001))
+    register(router("router2", 8002))
+
+    cache = DirectoryCache(fetch, ttl=0)
+
+    # Premier appel : liste complète
+    assert sorted(r["name"] for r in cache.routers()) == ["router1", "router2"]
+    assert "routers" in json.loads(fetch(requests[0]))
+
+    # Rien n'a changé : "not_modified"
+    answer = json.loads(fetch(f"GET_ROUTERS {changes.epoch} {changes.version}"))
+    assert answer.get("not_modified")
+
+    # Un ajout, une mise à jour, une suppression → delta seulement
+    register(router("router3", 8003))
+    register(router("router1", 8101))
+    remove("router2")
+
+    answer = json.loads(fetch(f"GET_ROUTERS {cache.epoch} {cache.version}"))
+    assert "routers" not in answer
+    assert answer["removed"] == ["router2"]
+
+    routers = {r["name"]: r for r in cache.routers()}
+    assert sorted(routers) == ["router1", "router3"]
+    assert routers["router1"]["port"] == 8101
+    assert cache.version == changes.version
+
+    print("[TEST] Cache de l'annuaire : deltas OK")
+
+
+def test_cache_ttl():
+    _, register, _, fetch, requests = make_master()
+    register(router("router1", 8001))
+
+    cache = DirectoryCache(fetch, ttl=60)
+    for _ in range(10):
+        cache.routers()
+
+    # Un seul aller-retour vers le MASTER tant que le TTL n'est pas écoulé
+    assert len(requests) == 1
+    print("[TEST] Cache de l'annuaire : TTL OK")
+
+
+def test_master_redemarre():
+    changes, register, _, fetch, _ = make_master()
+    register(router("router1", 8001))
+
+    # Epoch inconnue (autre MASTER) ou journal trop court → liste complète
+    assert "routers" in json.loads(fetch("GET_ROUTERS deadbeef 1"))
+
+    small = DirectoryChanges(max_changes=2)
+    for i in range(5):
+        small.record_add(router(f"router{i}", 8000 + i))
+    assert small.delta_since(small.epoch, 1) == (5, None)
+    version, (added, removed) = small.delta_since(small.epoch, 3)
+    assert version == 5 and len(added) == 2 and not removed
+
+    print("[TEST] Cache de l'annuaire : rechargement complet OK")
+
+
+def test_registre_master():
+    registry = RouterRegistry([router("router1", 8001)])
+
+    # JSON construit une seule fois tant que rien ne change
+    first = registry.snapshot_json()
+    assert registry.snapshot_json() is first
+    assert json.loads(zlib.decompress(registry.snapshot_zlib())) == json.loads(first)
+
+    registry.add(router("router2", 8002))
+    assert registry.snapshot_json() is not first
+    assert len(json.loads(registry.snapshot_json())) == 2
+
+    # Clients dans l'annuaire : absents des listes complètes (anciens clients)
+    registry.add({"name": "clientB", "ip": "10.0.0.42", "port": 9100, "role": ROLE_CLIENT})
+    names = [r["name"] for r in json.loads(registry.snapshot_json())]
+    assert names == ["router1", "router2"]
+    assert json.loads(zlib.decompress(registry.snapshot_zlib())) == json.loads(registry.snapshot_json())
+
+    # Client à jour → réponse "not_modified" déjà sérialisée
+    args = [registry.changes.epoch, str(registry.version)]
+    assert json.loads(registry.response(args)).get("not_modified")
+    assert registry.response(args) is registry.response(args)
+
+    registry.remove("router1")
+    answer = json.loads(registry.response(args))
+    assert answer["removed"] == ["router1"] and answer["version"] == registry.version
+
+    print("[TEST] Annuaire en mémoire du MASTER OK")
+
+
+def test_chemin_selon_charge():
+    routers = [router(f"router{i}", 8000 + i) for i in range(5)]
+    routers[0]["load"] = {"queue": 5000, "rate": 900.0, "cpu": 0.95}
+
+    rng = random.Random(1)
+    counts = {r["name"]: 0 for r in routers}
+    for _ in range(500):
+        path = select_path(routers, 3, rng)
+        assert len({r["name"] for r in path}) == 3
+        for r in path:
+            counts[r["name"]] += 1
+
+    # Le routeur saturé est presque toujours évité
+    assert counts["router0"] < 30 < min(counts[f"router{i}"] for i in range(1, 5))
+    print("[TEST] Choix du chemin pondéré par la charge OK")
+
+
+def test_resolution_par_annuaire():
+    _, register, _, fetch, requests = make_master()
+    register({"name": "router7", "ip": "10.0.0.7", "port": 9007, "public_key": [3, 33]})
+    register({"name": "clientB", "ip": "10.0.0.42", "port": 9100, "role": ROLE_CLIENT})
+
+    book = AddressBook(DirectoryCache(fetch), {"clientA": ("127.0.0.1", 9001)})
+    clients = book.clients
+
+    # Nom inconnu localement → un rafraîchissement, puis plus aucune requête
+    assert book.router("router7") == ("10.0.0.7", 9007)
+    for _ in range(10):
+        book.router("router7")
+    assert len(requests) == 1
+
+    # Clients : annoncés par le MASTER + adresses par défaut (même dictionnaire)
+    assert clients["clientB"] == ("10.0.0.42", 9100)
+    assert clients["clientA"] == ("127.0.0.1", 9001)
+    assert "clientB" not in book.routers
+
+    # Noms inventés en rafale : au plus un rafraîchissement par intervalle
+    for _ in range(10):
+        try:
+            book.router("router99")
+            assert False, "routeur inconnu accepté"
+        except ValueError:
+            pass
+    assert len(requests) == 1
+
+    # Les clients ne sont jamais choisis dans un chemin
+    assert [r["name"] for r in book.directory.routers()] == ["router7"]
+    print("[TEST] Résolution des sauts par l'annuaire OK")
+
+
+def test_heartbeat_expiration():
+    path = os.path.join(tempfile.mkdtemp(), "heartbeat_test.db")
+    master = MasterServer(port=0, db_backend="sqlite", db_path=path)
+
+    master.process_request("REGISTER_ROUTER " + json.dumps(router("router1", 8001)))
+    version = master.registry.version
+
+    load = {"queue": 3, "rate": 12.5, "cpu": 0.2}
+    assert master.process_request("HEARTBEAT " + json.dumps({"name": "router1", "load": load})) == "OK"
+    assert master.registry.loads()["router1"] == load
+
+    # Heartbeats réguliers (charge qui bouge) : l'annuaire ne change pas de version
+    for i in range(50):
+        other = {"queue": i, "rate": 10.0 + i, "cpu": 0.2}
+        master.process_request("HEARTBEAT " + json.dumps({"name": "router1", "load": other}))
+    assert master.registry.version == version
+
+    # ... et un client à jour reçoit quand même la charge actuelle
+    args = [master.registry.changes.epoch, str(version)]
+    answer = json.loads(master.process_request("GET_ROUTERS " + " ".join(args)))
+    assert answer.get("not_modified") and answer["loads"]["router1"] == other
+    cache = DirectoryCache(master.process_request, ttl=0)
+    assert cache.routers()[0]["load"] == other
+    master.process_request("HEARTBEAT " + json.dumps({"name": "router1", "load": load}))
+
+    # Routeur muet → retiré, puis invité à se réenregistrer
+    master.expire_routers(ttl=0)
+    assert master.registry.get("router1") is None
+    assert master.process_request("HEARTBEAT " + json.dumps({"name": "router1", "load": load})) == "UNKNOWN"
+
+    # Heartbeats groupés (hôte de routeurs) : réponse = routeurs oubliés
+    master.process_request("REGISTER_ROUTER " + json.dumps(router("router2", 8002)))
+    batch = [{"name": "router1", "load": load}, {"name": "router2", "load": load}]
+    assert json.loads(master.process_request("HEARTBEATS " + json.dumps(batch))) == ["router1"]
+    assert master.registry.loads()["router2"] == load
+
+    # Heartbeats invalides : erreur renvoyée, entrées fautives ignorées dans un lot
+    assert "ERREUR HEARTBEAT" in master.process_request("HEARTBEAT {pas du json")
+    assert "ERREUR HEARTBEAT" in master.process_request("HEARTBEAT " + json.dumps({"name": "router2"}))
+    batch = [{"name": "router2"}, "router2", {"load": load}, {"name": "router2", "load": other}]
+    assert json.loads(master.process_request("HEARTBEATS " + json.dumps(batch))) == []
+    assert master.registry.loads()["router2"] == other
+    assert "ERREUR HEARTBEATS" in master.process_request("HEARTBEATS [")
+    master.expire_routers(ttl=0)
+
+    master._db_queue.join()
+    assert master.db.get_routers() == []
+    master.db.close()
+    print("[TEST] Heartbeats + expiration des routeurs OK")
+
+
+if __name__ == "__main__":
+    test_cache_delta()
+    test_cache_ttl()
+    test_master_redemarre()
+    test_registre_master()
+    test_chemin_selon_charge()
+    test_resolution_par_annuaire()
+    test_heartbeat_expiration()
@@ -0,0 +1,80 @@
+import sys
+import os
+import json
+import socket
+import tempfile
+import threading
+
+# Pour pouvoir importer src/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.feed import ChangeFeed
+from src.common.framing import recv_frame, send_frame
+from src.master.master_server import MasterServer
+
+
+def test_abonne_lent():
+    feed = ChangeFeed(maxsize=3)
+    fast, slow = feed.subscribe(), feed.subscribe()
+
+    for i in range(3):
+        feed.publish({"i": i})
+    assert [e["i"] for e in fast.get_batch(timeout=1)] == [0, 1, 2]
+
+    # L'abonné qui ne lit pas déborde, les autres continuent
+    feed.publish({"i": 3})
+    assert slow.overflowed and not fast.overflowed
+    assert fast.get_batch(timeout=1) == [{"i": 3}]
+    assert fast.get_batch(timeout=0.05) == []
+
+    print("[TEST] Flux : abonné lent déconnecté OK")
+
+
+def test_subscribe_master():
+    path = os.path.join(tempfile.mkdtemp(), "feed_test.db")
+    master = MasterServer(port=0, db_backend="sqlite", db_path=path)
+
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+
+    def serve():
+        while True:
+            conn, addr = server.accept()
+            threading.Thread(target=master.handle_connection, args=(conn, addr), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+
+    sub = socket.create_connection(server.getsockname())
+    send_frame(sub, b"SUBSCRIBE")
+
+    # 1er message : instantané (annuaire vide)
+    snapshot = json.loads(recv_frame(sub))
+    assert snapshot[0]["type"] == "snapshot" and snapshot[0]["routers"] == []
+
+    req = {"name": "router1", "ip": "127.0.0.1", "port": 8001, "public_key": [3, 33]}
+    master.process_request("REGISTER_ROUTER " + json.dumps(req))
+
+    # Le changement est poussé sans rien demander
+    events = []
+    while len(events) < 2:
+        events += json.loads(recv_frame(sub))
+    assert events[0]["type"] == "router" and events[0]["router"]["name"] == "router1"
+    assert events[1]["type"] == "log"
+
+    # Client : événement à part, pas un routeur
+    client = {"name": "clientB", "ip": "127.0.0.1", "port": 9100}
+    master.process_request("REGISTER_CLIENT " + json.dumps(client))
+    events = []
+    while len(events) < 2:
+        events += json.loads(recv_frame(sub))
+    assert events[0]["type"] == "client" and events[0]["client"]["name"] == "clientB"
+
+    sub.close()
+    master.db.close()
+    print("[TEST] SUBSCRIBE : changements poussés par le MASTER OK")
+
+
+if __name__ == "__main__":
+    test_abonne_lent()
+    test_subscribe_master()
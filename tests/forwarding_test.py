@@ -0,0 +1,148 @@
+import sys
+import os
+import json
+import socket
+import threading
+import time
+
+# Pour pouvoir importer src/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.router.router_server import RouterServer
+from src.router.forwarding import ForwardQueues
+from src.common.onion import OnionRouter, receipt_destination
+from src.common.circuit import Circuit, CircuitTable
+from src.common.wire import FORMAT_HYBRID
+from src.common.framing import recv_frame, request
+
+
+def listening_socket():
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    s.bind(("127.0.0.1", 0))
+    s.listen()
+    return s
+
+
+def fake_client(sock, inbox):
+    while True:
+        conn, _ = sock.accept()
+        inbox.append(bytes(recv_frame(conn)).decode())
+        conn.close()
+
+
+def serve(router, sock):
+    while True:
+        conn, _ = sock.accept()
+        threading.Thread(target=router.handle_connection, args=(conn,), daemon=True).start()
+
+
+def test_stocker_puis_transmettre():
+    print("\n===== TEST FILES SORTANTES - DÉBUT =====")
+
+    inbox_b, inbox_a = [], []
+    client_b, client_a = listening_socket(), listening_socket()
+    threading.Thread(target=fake_client, args=(client_b, inbox_b), daemon=True).start()
+    threading.Thread(target=fake_client, args=(client_a, inbox_a), daemon=True).start()
+
+    r1 = RouterServer("router1", "127.0.0.1", 0)
+    r2 = RouterServer("router2", "127.0.0.1", 0)
+    sock1, sock2 = listening_socket(), listening_socket()
+
+    clients = {
+        "clientB": client_b.getsockname(),
+        "clientA": client_a.getsockname(),
+    }
+    sockets = {"router1": sock1, "router2": sock2}
+    for r in (r1, r2):
+        r.client_addresses = dict(clients)
+        r.router_address = lambda name: sockets[name].getsockname()
+
+    threading.Thread(target=serve, args=(r1, sock1), daemon=True).start()
+
+    onion = OnionRouter(FORMAT_HYBRID)
+    keys = {"router1": r1.public_key, "router2": r2.public_key}
+    # Accusé : oignon de retour par router1, la sortie (router2) ne voit pas "clientA"
+    reply_onion = onion.create_onion_message("RECEIPT 42", "clientA", ["router1"], keys)
+    destination = receipt_destination("clientB", "router1", reply_onion)
+    layer = onion.create_onion_message("Bonjour", destination, ["router1", "router2"], keys)
+
+    # router2 n'écoute pas encore : router1 acquitte quand même SON saut
+    with socket.create_connection(sock1.getsockname()) as s:
+        start = time.perf_counter()
+        reply = request(s, layer)
+        elapsed = time.perf_counter() - start
+
+    print("Réponse de router1 :", reply, f"({elapsed:.3f} s)")
+    assert reply == b"OK"
+    assert elapsed < 0.5
+
+    # router2 démarre : les workers de router1 réessaient et livrent
+    threading.Thread(target=serve, args=(r2, sock2), daemon=True).start()
+
+    deadline = time.time() + 5
+    while (not inbox_b or not inbox_a) and time.time() < deadline:
+        time.sleep(0.05)
+
+    print("clientB a reçu :", inbox_b)
+    print("clientA a reçu :", inbox_a)
+    assert inbox_b == ["Bonjour"]
+    assert inbox_a == ["RECEIPT 42"], "L'accusé de bout en bout doit revenir à clientA"
+
+    print("✔ Test files sortantes OK")
+    print("===== FIN TEST FILES SORTANTES =====\n")
+
+
+def test_saut_inconnu_et_files_inactives():
+    r1 = RouterServer("router1", "127.0.0.1", 0)
+    r1.address_book.directory.fetch = lambda req: json.dumps({"epoch": "e", "version": 1, "routers": []})
+    onion = OnionRouter(FORMAT_HYBRID)
+
+    # Saut absent de l'annuaire : refusé tout de suite, aucune file créée
+    layer = onion.create_onion_message("Bonjour", "clientB", ["router1", "inconnu"],
+                                       {"router1": r1.public_key, "inconnu": r1.public_key})
+    reply = r1.handle_layer(layer)
+    assert b"ERREUR" in reply and b"inconnu" in reply
+    assert not r1.forwarding._queues
+
+    # File vidée puis inutilisée → supprimée avec ses workers
+    sent = []
+    queues = ForwardQueues(lambda hop, payload: sent.append(payload), idle_timeout=0.1)
+    assert queues.put("router2", "a")
+    queues.join()
+    assert sent == ["a"] and "router2" in queues._queues
+
+    deadline = time.time() + 2
+    while queues._queues and time.time() < deadline:
+        time.sleep(0.05)
+    assert not queues._queues, "La file inactive doit être supprimée"
+
+    # Un nouveau message recrée la file
+    assert queues.put("router2", "b")
+    queues.join()
+    assert sent == ["a", "b"]
+
+
+def test_cellule_rejetee_plus_loin():
+    r1 = RouterServer("router1", "127.0.0.1", 0)
+    r2 = RouterServer("router2", "127.0.0.1", 0)
+    sock2 = listening_socket()
+    r1.router_address = lambda name: sock2.getsockname()
+    threading.Thread(target=serve, args=(r2, sock2), daemon=True).start()
+
+    circuit = Circuit(["router1", "router2"], {"router1": r1.public_key, "router2": r2.public_key}, "clientB")
+    assert r1.handle_layer(circuit.create_message()) == b"OK"
+
+    # router2 a oublié le circuit (redémarrage) : le refus remonte jusqu'au client
+    r2.circuits = CircuitTable()
+    reply = r1.handle_layer(circuit.cell("Bonjour"))
+    assert b"Circuit inconnu" in reply, reply
+
+
+if __name__ == "__main__":
+    from conftest import without_master
+
+    with without_master():
+        test_stocker_puis_transmettre()
+        test_saut_inconnu_et_files_inactives()
+        test_cellule_rejetee_plus_loin()
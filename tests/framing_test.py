@@ -0,0 +1,70 @@
+import sys
+import os
+import socket
+import threading
+
+# Pour pouvoir importer src/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.framing import FrameError, recv_frame, send_frame
+
+
+def test_gros_message():
+    print("\n===== TEST FRAMING - DÉBUT =====")
+
+    a, b = socket.socketpair()
+
+    # 5 Mo : bien plus que n'importe quel recv(4096)
+    payload = os.urandom(5 * 1024 * 1024)
+
+    t = threading.Thread(target=send_frame, args=(a, payload))
+    t.start()
+    received = recv_frame(b)
+    t.join()
+
+    print("Octets reçus :", len(received))
+    assert received == payload, "Le message doit arriver complet"
+
+    # Plusieurs messages à la suite sur la même connexion
+    send_frame(a, "Bonjour")
+    send_frame(a, b"")
+    assert recv_frame(b) == b"Bonjour"
+    assert recv_frame(b) == b""
+
+    # Fermeture propre → None
+    a.close()
+    assert recv_frame(b) is None
+    b.close()
+
+    print("✔ Test framing OK")
+    print("===== FIN TEST FRAMING =====\n")
+
+
+def test_limites():
+    a, b = socket.socketpair()
+
+    # Message trop gros pour la limite configurée
+    send_frame(a, b"x" * 100)
+    try:
+        recv_frame(b, max_size=10)
+        assert False, "Une FrameError était attendue"
+    except FrameError:
+        pass
+
+    # Message tronqué : en-tête annonce 10 octets, 3 seulement arrivent
+    c, d = socket.socketpair()
+    c.sendall(b"\x00\x00\x00\x0aabc")
+    c.close()
+    try:
+        recv_frame(d)
+        assert False, "Une FrameError était attendue"
+    except FrameError:
+        pass
+
+    for s in (a, b, d):
+        s.close()
+
+
+if __name__ == "__main__":
+    test_gros_message()
+    test_limites()
@@ -0,0 +1,73 @@
+import sys
+import os
+import time
+
+# Pour pouvoir importer src/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.crypto import (
+    RSAEncryption, generate_key_pairs, is_prime, primes_of_size,
+    rsa_decrypt, encrypt_blocks, decrypt_blocks,
+)
+
+
+def premier_naif(n):
+    return n >= 2 and all(n % d for d in range(2, int(n ** 0.5) + 1))
+
+
+def test_primalite():
+    # Table (petits nombres) et Miller-Rabin (au-delà) contre la division naïve
+    for n in list(range(3000)) + list(range(65500, 67000)) + list(range(10**9, 10**9 + 300)):
+        assert is_prime(n) == premier_naif(n), n
+
+    assert primes_of_size(8) == [n for n in range(128, 256) if premier_naif(n)]
+    assert is_prime(2**61 - 1) and not is_prime(2**61 + 1)
+    print("[TEST] Primalité sans sympy OK")
+
+
+def test_generation_en_masse():
+    start = time.perf_counter()
+    pairs = generate_key_pairs(1000)
+    print(f"[TEST] 1000 paires de clés en {time.perf_counter() - start:.3f} s")
+
+    # Chaque paire chiffre / déchiffre tous les octets
+    for public_key, private_key in pairs[:50]:
+        (e, n), d = public_key, private_key[0]
+        assert n > 255
+        assert all(pow(pow(x, e, n), d, n) == x for x in range(256))
+
+    # Répartition forcée sur deux processus
+    assert len(generate_key_pairs(5000, workers=2)) == 5000
+
+    rsa = RSAEncryption()
+    rsa.generate_keys()
+    assert rsa.decrypt_text(rsa.encrypt_text("Bonjour")) == "Bonjour"
+    print("[TEST] Génération de clés en masse OK")
+
+
+def test_cles_1024_bits():
+    public_key, private_key = RSAEncryption(1024).generate_keys()
+    e, n = public_key
+    assert n.bit_length() == 1024
+
+    # Restes chinois : même résultat que pow(c, d, n)
+    for m in (0, 1, 42, n - 1, n // 3):
+        c = pow(m, e, n)
+        assert rsa_decrypt(c, private_key) == pow(c, private_key[0], n) == m
+
+    # Blocs de 127 octets, zéros finaux et message vide conservés
+    for data in (b"", b"\x00", b"abc\x00\x00", bytes(range(256)) * 3):
+        blocks = encrypt_blocks(data, public_key)
+        assert len(blocks) == len(data) // 127 + 1
+        assert decrypt_blocks(blocks, private_key) == data
+
+    # Ancienne clé privée (d, n) : toujours acceptée, sans restes chinois
+    c = pow(42, e, n)
+    assert rsa_decrypt(c, private_key[:2]) == 42
+    print("[TEST] Clés 1024 bits, blocs et restes chinois OK")
+
+
+if __name__ == "__main__":
+    test_primalite()
+    test_generation_en_masse()
+    test_cles_1024_bits()
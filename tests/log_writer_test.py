@@ -0,0 +1,67 @@
+import sys
+import os
+import threading
+import time
+
+# Pour pouvoir importer src/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.log_writer import LogWriter
+
+
+def test_lots():
+    batches = []
+    writer = LogWriter(batches.append, batch_size=10, flush_interval=60)
+
+    for i in range(25):
+        writer.log(f"log {i}")
+
+    # 2 lots pleins écrits sans attendre le délai, le reste au flush
+    writer.flush(timeout=2)
+    assert [len(b) for b in batches] == [10, 10, 5]
+    assert [m for b in batches for m, _ in b] == [f"log {i}" for i in range(25)]
+
+    writer.close(timeout=2)
+    assert writer.written == 25
+    print("[TEST] Logs par lots OK")
+
+
+def test_delai_et_fermeture():
+    batches = []
+    writer = LogWriter(batches.append, batch_size=1000, flush_interval=0.1)
+
+    writer.log("seul")
+    time.sleep(0.5)
+    assert len(batches) == 1   # écrit après flush_interval
+
+    writer.log("dernier")
+    writer.close(timeout=2)    # écrit avant de rendre la main
+    assert batches[-1][0][0] == "dernier"
+    assert not writer.log("après fermeture")
+
+    # flush() après close() rend la main tout de suite
+    start = time.monotonic()
+    assert writer.flush(timeout=5)
+    assert time.monotonic() - start < 1
+    print("[TEST] Délai + écriture à la fermeture OK")
+
+
+def test_file_pleine():
+    gate = threading.Event()
+    writer = LogWriter(lambda batch: gate.wait(), batch_size=1, maxsize=5)
+
+    # Le thread est bloqué sur l'écriture : la file se remplit sans bloquer log()
+    start = time.monotonic()
+    results = [writer.log(f"log {i}") for i in range(20)]
+    assert time.monotonic() - start < 0.5
+
+    assert not all(results) and writer.dropped > 0
+    gate.set()
+    writer.close(timeout=2)
+    print("[TEST] File pleine : logs abandonnés sans bloquer OK")
+
+
+if __name__ == "__main__":
+    test_lots()
+    test_delai_et_fermeture()
+    test_file_pleine()
@@ -10,6 +10,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.common.crypto import RSAEncryption
 from src.common.onion import OnionRouter
+from src.common.wire import FORMAT_TEXT, FORMAT_BINARY, FORMAT_HYBRID, is_binary
 
 
 def test_onion_routing():
@@ -94,5 +95,137 @@ def test_onion_routing():
     print("===== TEST ROUTAGE EN OIGNON – FIN =====\n")
 
 
+def test_tables_precalculees():
+
+    print("\n===== TEST TABLES RSA - DÉBUT =====")
+
+    rsa = RSAEncryption()
+    pub, priv = rsa.generate_keys()
+    e, n = pub
+    d = priv[0]
+
+    onion = OnionRouter()
+    texte = "router2|Bonjour 123"
+
+    # La table doit donner exactement le même résultat que pow()
+    attendu = [pow(ord(c), e, n) for c in texte]
+    assert onion._encrypt_layer(texte, pub) == attendu
+    assert rsa.encrypt_text(texte) == attendu
+
+    attendu_clair = "".join(chr(pow(x, d, n)) for x in attendu)
+    assert onion._decrypt_layer(attendu, priv) == attendu_clair
+    assert rsa.decrypt_text(attendu) == attendu_clair
+
+    # Clé reçue du MASTER en JSON → liste au lieu de tuple
+    assert onion._encrypt_layer(texte, list(pub)) == attendu
+
+    print("✔ SUCCÈS : Tables identiques à pow() !")
+    print("===== TEST TABLES RSA – FIN =====\n")
+
+
+def test_routage_binaire():
+
+    print("\n===== TEST FORMAT BINAIRE - DÉBUT =====")
+
+    chain = ["router1", "router2", "router3"]
+    keys = {name: RSAEncryption().generate_keys() for name in chain}
+    public_keys = {name: keys[name][0] for name in chain}
+
+    onion = OnionRouter(FORMAT_BINARY)
+    message = "Bonjour é !"
+
+    layer = onion.create_onion_message(message, "clientB", chain, public_keys)
+    assert is_binary(layer), "La couche externe doit être binaire"
+
+    # Le format texte de la même chaîne est bien plus volumineux
+    text_layer = OnionRouter().create_onion_message(message, "clientB", chain, public_keys)
+    print("Taille texte   :", len(text_layer))
+    print("Taille binaire :", len(layer))
+    assert len(layer) < len(text_layer)
+
+    expected_hops = ["router2", "router3", "clientB"]
+    for name, expected in zip(chain, expected_hops):
+        next_hop, layer = onion.process_onion_layer(layer, keys[name][1])
+        print(f"[{name}] next hop :", next_hop)
+        assert next_hop == expected
+
+    assert layer == message, "Le message final doit être intact"
+
+    print("✔ SUCCÈS : Routage binaire fonctionnel !")
+    print("===== TEST FORMAT BINAIRE – FIN =====\n")
+
+
+def test_routage_hybride():
+
+    print("\n===== TEST COUCHES HYBRIDES - DÉBUT =====")
+
+    # Chaîne de 7 routeurs : impossible en RSA caractère par caractère
+    chain = [f"router{i}" for i in range(1, 8)]
+    keys = {name: RSAEncryption().generate_keys() for name in chain}
+    public_keys = {name: keys[name][0] for name in chain}
+
+    onion = OnionRouter(FORMAT_HYBRID)
+    message = "x" * 1000
+
+    layer = onion.create_onion_message(message, "clientB", chain, public_keys)
+    print("Taille couche externe (7 sauts, 1000 octets) :", len(layer))
+
+    # Surcoût constant par saut → taille ~ linéaire
+    assert len(layer) < len(message) + 7 * 100
+
+    # Une couche altérée est rejetée (MAC)
+    altered = bytearray(layer)
+    altered[-1] ^= 1
+    try:
+        onion.process_onion_layer(bytes(altered), keys["router1"][1])
+        assert False, "Une couche altérée doit être refusée"
+    except ValueError:
+        pass
+
+    for i, name in enumerate(chain):
+        next_hop, layer = onion.process_onion_layer(layer, keys[name][1])
+        expected = chain[i + 1] if i + 1 < len(chain) else "clientB"
+        assert next_hop == expected
+
+    assert layer == message, "Le message final doit être intact"
+
+    print("✔ SUCCÈS : Routage hybride fonctionnel !")
+    print("===== TEST COUCHES HYBRIDES – FIN =====\n")
+
+
+def test_grandes_cles():
+
+    print("\n===== TEST CLÉS 512 BITS - DÉBUT =====")
+
+    chain = ["router1", "router2", "router3"]
+    keys = {name: RSAEncryption(512).generate_keys() for name in chain}
+    public_keys = {name: keys[name][0] for name in chain}
+    message = "Bonjour é ! " * 20
+
+    for wire_format in (FORMAT_TEXT, FORMAT_BINARY, FORMAT_HYBRID):
+        onion = OnionRouter(wire_format)
+        layer = onion.create_onion_message(message, "clientB", chain, public_keys)
+        print(f"Taille couche externe ({wire_format}) :", len(layer))
+
+        for name, expected in zip(chain, ["router2", "router3", "clientB"]):
+            next_hop, layer = onion.process_onion_layer(layer, keys[name][1])
+            assert next_hop == expected
+
+        assert layer == message, f"Message altéré en format {wire_format}"
+
+    # Blocs de 63 octets : une couche binaire est bien plus petite qu'en 16 bits
+    small = {name: RSAEncryption().generate_keys()[0] for name in chain}
+    big_layer = OnionRouter(FORMAT_BINARY).create_onion_message(message, "clientB", chain, public_keys)
+    small_layer = OnionRouter(FORMAT_BINARY).create_onion_message(message, "clientB", chain, small)
+    assert len(big_layer) < len(small_layer)
+
+    print("✔ SUCCÈS : Grandes clés (blocs + restes chinois) !")
+    print("===== TEST CLÉS 512 BITS – FIN =====\n")
+
+
 if __name__ == "__main__":
     test_onion_routing()
+    test_tables_precalculees()
+    test_routage_binaire()
+    test_routage_hybride()
+    test_grandes_cles()
@@ -0,0 +1,155 @@
+import sys
+import os
+import socket
+import threading
+import time
+
+# Pour pouvoir importer src/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.framing import recv_frame
+from src.common.pool import LINK_HELLO, LinkPool, MuxLink, serve_link
+
+
+def start_echo_server():
+    """Faux routeur : répond 'echo:<message>' sur des liens multiplexés."""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    accepted = []
+
+    def handler(body):
+        time.sleep(0.05)
+        return b"echo:" + bytes(body)
+
+    def loop():
+        while True:
+            conn, _ = server.accept()
+            accepted.append(conn)
+            assert recv_frame(conn) == LINK_HELLO
+            threading.Thread(target=serve_link, args=(conn, handler), daemon=True).start()
+
+    threading.Thread(target=loop, daemon=True).start()
+    return server.getsockname(), accepted
+
+
+def test_liens_reutilises():
+    print("\n===== TEST POOL DE LIENS - DÉBUT =====")
+
+    address, accepted = start_echo_server()
+    pool = LinkPool(max_links=1)
+
+    # 20 messages en parallèle → un seul lien, réponses dans le bon flux
+    results = {}
+
+    def send(i):
+        results[i] = pool.request(address, f"msg{i}".encode())
+
+    threads = [threading.Thread(target=send, args=(i,)) for i in range(20)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    print("Connexions TCP ouvertes :", len(accepted))
+    print(f"20 messages en {elapsed:.2f} s")
+
+    assert len(accepted) == 1, "Un seul lien doit être ouvert"
+    assert all(results[i] == f"echo:msg{i}".encode() for i in range(20))
+    assert elapsed < 0.5, "Les messages doivent être multiplexés, pas en série"
+
+    # Le pair ferme le lien → reconnexion transparente
+    accepted[0].shutdown(socket.SHUT_RDWR)
+    time.sleep(0.1)
+    assert pool.request(address, b"retour") == b"echo:retour"
+    assert len(accepted) == 2
+
+    pool.close()
+    print("✔ Test pool OK")
+    print("===== FIN TEST POOL DE LIENS =====\n")
+
+
+def test_eviction_liens_inactifs():
+    address, accepted = start_echo_server()
+    pool = LinkPool(idle_timeout=0.1)
+
+    assert pool.request(address, b"a") == b"echo:a"
+    time.sleep(0.2)
+    pool.check_links()
+
+    assert not pool._links, "Le lien inactif doit être fermé"
+
+    # Pings de santé plus fréquents que idle_timeout : le lien est quand même fermé
+    pool = LinkPool(idle_timeout=0.5, health_interval=0.1)
+    assert pool.request(address, b"b") == b"echo:b"
+
+    deadline = time.monotonic() + 3
+    pings = 0
+    while pool._links and time.monotonic() < deadline:
+        time.sleep(0.11)
+        pool.check_links()
+        pings += 1
+    assert not pool._links, "Les pings ne doivent pas garder le lien ouvert"
+    assert pings > 3, "Le lien doit d'abord survivre à des pings"
+
+
+def test_pair_muet():
+    # Pair qui accepte les messages sans jamais répondre
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+
+    link = MuxLink(server.getsockname())
+    start = time.perf_counter()
+    try:
+        link.request(b"silence", timeout=0.2)
+        assert False, "Réponse attendue indéfiniment"
+    except TimeoutError:
+        pass
+
+    assert time.perf_counter() - start < 2
+    assert link.in_flight == 0, "Le flux abandonné doit être oublié"
+    link.close()
+    server.close()
+
+
+def test_lien_workers_bornes():
+    # Au plus 2 messages d'un même lien traités en même temps
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def handler(body):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return bytes(body)
+
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+
+    def accept():
+        conn, _ = server.accept()
+        assert recv_frame(conn) == LINK_HELLO
+        serve_link(conn, handler, workers=2)
+
+    threading.Thread(target=accept, daemon=True).start()
+
+    link = MuxLink(server.getsockname())
+    pending = [link.submit(f"m{i}".encode()) for i in range(8)]
+    assert [link.wait(*p) for p in pending] == [f"m{i}".encode() for i in range(8)]
+    assert peak[0] == 2
+    link.close()
+    server.close()
+
+
+if __name__ == "__main__":
+    test_liens_reutilises()
+    test_eviction_liens_inactifs()
+    test_pair_muet()
+    test_lien_workers_bornes()
@@ -0,0 +1,76 @@
+import sys
+import os
+import asyncio
+import socket
+import threading
+
+# Pour pouvoir importer src/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.router.router_host import RouterHost
+from src.common.onion import OnionRouter
+from src.common.wire import FORMAT_BINARY
+from src.common.framing import recv_frame, request
+
+
+N = 30
+
+
+def test_hote_routeurs():
+    print("\n===== TEST HÔTE DE ROUTEURS - DÉBUT =====")
+
+    # Faux clientB
+    client = socket.socket()
+    client.bind(("127.0.0.1", 0))
+    client.listen()
+    client.settimeout(10)
+
+    # N routeurs, ports choisis par le système
+    router_host = RouterHost("127.0.0.1")
+    for i in range(1, N + 1):
+        router_host.add(f"router{i}", 0)
+    router_host.address_book.clients["clientB"] = client.getsockname()
+
+    threading.Thread(target=asyncio.run, args=(router_host.serve(),), daemon=True).start()
+    assert router_host.ready.wait(10)
+
+    ports = {router.port for router in router_host.routers.values()}
+    assert len(ports) == N and 0 not in ports
+    print(f"[TEST] {N} routeurs en écoute dans un seul processus")
+
+    # Chemin entièrement hébergé : router1 → router7 → router30 → clientB
+    path = ["router1", "router7", "router30"]
+    keys = {name: router_host.routers[name].public_key for name in path}
+    data = OnionRouter(FORMAT_BINARY).create_onion_message("Bonjour", "clientB", path, keys)
+
+    with socket.create_connection(("127.0.0.1", router_host.routers["router1"].port)) as s:
+        assert request(s, data) == b"OK"
+
+    conn, _ = client.accept()
+    with conn:
+        assert recv_frame(conn) == b"Bonjour"
+    client.close()
+
+    # Sauts internes : appel direct, aucun lien TCP ouvert
+    for name in path:
+        assert router_host.routers[name].messages == 1
+        assert router_host.routers[name].async_links._links == {}
+    print("[TEST] Message relayé entre routeurs hébergés sans socket OK")
+
+    print("===== FIN TEST HÔTE DE ROUTEURS =====\n")
+
+
+def test_taille_des_cles():
+    router_host = RouterHost("127.0.0.1")
+    router_host.add_range(2, key_bits=64)
+    for router in router_host.routers.values():
+        assert router.public_key[1].bit_length() == 64
+    print("[TEST] add_range(key_bits=64) → clés de 64 bits OK")
+
+
+if __name__ == "__main__":
+    from conftest import without_master
+
+    with without_master():
+        test_hote_routeurs()
+        test_taille_des_cles()
@@ -0,0 +1,116 @@
+import sys
+import os
+import json
+import sqlite3
+import tempfile
+import threading
+
+# Pour pouvoir importer src/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.storage import open_database
+from src.master.master_server import MasterServer
+
+
+def temp_db_path():
+    return os.path.join(tempfile.mkdtemp(), "onion_test.db")
+
+
+def test_sqlite_api():
+    db = open_database("sqlite", path=temp_db_path())
+
+    db.add_router("router1", "127.0.0.1", 8001, (3, 33))
+    db.add_router("router2", "127.0.0.1", 8002, (5, 35))
+
+    # Ré-enregistrement : mise à jour, pas de doublon
+    db.add_router("router1", "127.0.0.1", 8101, (7, 77))
+    routers = {r["name"]: r for r in db.get_routers()}
+    assert len(routers) == 2
+    assert routers["router1"]["port"] == 8101
+    assert routers["router1"]["public_key"] == (7, 77)
+
+    db.remove_router("router2")
+    assert [r["name"] for r in db.get_routers()] == ["router1"]
+
+    for i in range(50):
+        db.add_log(f"log {i}")
+    db.log_writer.flush(timeout=2)
+    assert db.get_logs(3)[0][0] == "log 49"
+
+    # Lecture incrémentale : seulement les logs après le dernier id vu
+    recent = db.get_logs_since(0, limit=5)
+    assert [m for _, m, _ in recent] == [f"log {i}" for i in range(45, 50)]
+    assert db.get_logs_since(recent[-1][0]) == []
+
+    with db.cursor() as cur:
+        cur.execute("PRAGMA journal_mode")
+        assert cur.fetchone()[0] == "wal"
+
+    db.close()
+    print("[TEST] Backend SQLite OK")
+
+
+def test_sqlite_threads():
+    db = open_database("sqlite", path=temp_db_path())
+
+    def register(i):
+        db.add_router(f"router{i % 5}", "127.0.0.1", 8000 + i, (3, 33))
+
+    threads = [threading.Thread(target=register, args=(i,)) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(db.get_routers()) == 5
+    db.close()
+    print("[TEST] SQLite depuis plusieurs threads OK")
+
+
+def test_master_sqlite():
+    master = MasterServer(port=0, db_backend="sqlite", db_path=temp_db_path())
+
+    req = {"name": "router1", "ip": "127.0.0.1", "port": 8001, "public_key": [3, 33]}
+    assert master.process_request("REGISTER_ROUTER " + json.dumps(req)) == "OK"
+
+    routers = json.loads(master.process_request("GET_ROUTERS"))
+    assert routers[0]["name"] == "router1"
+
+    # Écriture différée : la base finit par contenir le routeur
+    master._db_queue.join()
+    assert master.db.get_routers()[0]["port"] == 8001
+
+    master.db.close()
+    print("[TEST] MASTER avec SQLite OK")
+
+
+def test_sqlite_grandes_cles():
+    path = temp_db_path()
+
+    # Ancien fichier : n en INTEGER
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE routers (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE, "
+            "ip TEXT, port INTEGER, public_e INTEGER, public_n INTEGER)"
+        )
+        conn.execute("INSERT INTO routers (name, ip, port, public_e, public_n) "
+                     "VALUES ('router1', '127.0.0.1', 8001, 65537, 40301)")
+    conn.close()
+
+    db = open_database("sqlite", path=path)
+    n = (1 << 2047) + 12345
+    db.add_router("router2", "127.0.0.1", 8002, (65537, n))
+
+    routers = {r["name"]: r for r in db.get_routers()}
+    assert routers["router1"]["public_key"] == (65537, 40301)
+    assert routers["router2"]["public_key"] == (65537, n)
+
+    db.close()
+    print("[TEST] Clés 2048 bits + migration de l'ancienne table OK")
+
+
+if __name__ == "__main__":
+    test_sqlite_api()
+    test_sqlite_threads()
+    test_master_sqlite()
+    test_sqlite_grandes_cles()
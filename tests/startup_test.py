@@ -0,0 +1,74 @@
+import sys
+import os
+import socket
+import subprocess
+
+# Pour pouvoir importer src/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.common.startup import StartupTimer, bind_listener
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_imports_paresseux():
+    # Processus neuf : aucun module lourd chargé par un routeur / MASTER synchrone
+    code = (
+        "import sys\n"
+        "import src.router.router_server, src.master.master_server\n"
+        "print(sorted(m for m in ('asyncio', 'psutil', 'sympy', 'numpy', 'mariadb', 'PyQt5') if m in sys.modules))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]", out.stdout
+
+    # lazy_import : chargé au premier attribut utilisé seulement
+    code = (
+        "import sys\n"
+        "from src.common.startup import lazy_import\n"
+        "fractions = lazy_import('fractions')\n"
+        "print('fractions' in sys.modules, fractions.Fraction(1, 2), 'fractions' in sys.modules)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["False", "1/2", "True"], out.stdout
+    print("[TEST] Aucun import lourd au démarrage OK")
+
+
+def test_port_occupe():
+    # Port libre : bind direct, sans psutil
+    server = bind_listener("127.0.0.1", 0, "TEST")
+    port = server.getsockname()[1]
+    server.close()
+
+    # Port réoccupé par un vieux processus → arrêté, puis port repris
+    old = subprocess.Popen([sys.executable, "-c", (
+        "import socket, sys, time\n"
+        f"s = socket.socket(); s.bind(('127.0.0.1', {port})); s.listen()\n"
+        "print('ok', flush=True); time.sleep(60)\n"
+    )], stdout=subprocess.PIPE, text=True)
+    assert old.stdout.readline().strip() == "ok"
+
+    server = bind_listener("127.0.0.1", port, "TEST")
+    assert old.wait(10) != 0
+
+    with socket.create_connection(("127.0.0.1", port)):
+        conn, _ = server.accept()
+        conn.close()
+    server.close()
+    old.stdout.close()
+    print("[TEST] Port occupé libéré puis repris OK")
+
+
+def test_temps_demarrage():
+    timer = StartupTimer("test")
+    timer.mark("étape")
+
+    assert [step for step, _ in timer.steps] == ["imports", "étape"]
+    assert timer.steps[0][1] > 0, "Lancement + imports : temps CPU déjà consommé"
+    timer.report()
+    print("[TEST] Rapport de démarrage OK")
+
+
+if __name__ == "__main__":
+    test_imports_paresseux()
+    test_port_occupe()
+    test_temps_demarrage()
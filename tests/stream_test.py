@@ -0,0 +1,165 @@
+import sys
+import os
+import io
+import random
+import socket
+import asyncio
+import threading
+import time
+
+# Pour pouvoir importer src/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.router.router_host import RouterHost
+from src.common.crypto import RSAEncryption
+from src.common.circuit import Circuit, CircuitTable
+from src.common.framing import recv_frame, request
+from src.common.pool import LINK_HELLO, MuxLink, serve_link
+from src.common.stream import (
+    CELL_SIZE, CELL_DATA_SIZE, StreamReceiver, is_stream_data, pack_delivery, pack_stream_data, send_stream,
+)
+from src.common.wire import KIND_STREAM_CELL, circuit_kind
+
+
+CHAIN = ["router1", "router2", "router3"]
+
+
+class Sink(io.BytesIO):
+    """Fichier en mémoire qui garde son contenu à la fermeture."""
+
+    received = []
+
+    def close(self):
+        Sink.received.append(self.getvalue())
+        super().close()
+
+
+def test_cellules_et_fenetre():
+    keys = {name: RSAEncryption().generate_keys() for name in CHAIN}
+    tables = {name: CircuitTable(window=2) for name in CHAIN}
+    circuit = Circuit(CHAIN, {name: keys[name][0] for name in CHAIN}, "clientB")
+
+    message = circuit.create_message()
+    for name in CHAIN:
+        _, message = tables[name].process(message, keys[name][1])
+
+    # Cellules de taille fixe, relayées une à une jusqu'à la sortie
+    data = os.urandom(3 * CELL_SIZE + 123)
+    delivered = []
+    for cell in circuit.stream_cells(data):
+        assert circuit_kind(cell) == KIND_STREAM_CELL
+        assert len(cell) == 3 + 8 + 12 + CELL_SIZE + 16 * 3
+
+        for name in CHAIN:
+            next_hop, cell = tables[name].process(cell, keys[name][1])
+        assert next_hop == "clientB" and is_stream_data(cell)
+        delivered.append(cell)
+
+    # Arrivée dans le désordre : remise dans l'ordre avant écriture
+    Sink.received.clear()
+    receiver = StreamReceiver(lambda stream_id: Sink())
+    random.shuffle(delivered)
+    assert [receiver.feed(cell) for cell in delivered].count(True) == 1
+    assert Sink.received == [data]
+
+    # Fenêtre du circuit : au plus 2 cellules relayées en même temps
+    cell = next(circuit.stream_cells(b"x"))
+    with tables["router1"].stream_slot(cell), tables["router1"].stream_slot(cell):
+        try:
+            with tables["router1"].stream_slot(cell):
+                assert False, "Fenêtre dépassée acceptée"
+        except ValueError:
+            pass
+    with tables["router1"].stream_slot(cell):
+        pass
+
+    print("[TEST] Cellules de taille fixe, ordre et fenêtre OK")
+
+
+def test_fichier_sur_circuit():
+    print("\n===== TEST FLUX SUR CIRCUIT - DÉBUT =====")
+
+    # Faux clientB : accepte le lien de la sortie, écrit les cellules reçues
+    Sink.received.clear()
+    receiver = StreamReceiver(lambda stream_id: Sink())
+    client = socket.socket()
+    client.bind(("127.0.0.1", 0))
+    client.listen()
+
+    def handle(frame):
+        receiver.feed(frame)
+        return b"OK"
+
+    def accept_links():
+        while True:
+            conn, _ = client.accept()
+            if recv_frame(conn) == LINK_HELLO:
+                threading.Thread(target=serve_link, args=(conn, handle), daemon=True).start()
+
+    threading.Thread(target=accept_links, daemon=True).start()
+
+    router_host = RouterHost("127.0.0.1")
+    for name in CHAIN:
+        router_host.add(name, 0)
+    router_host.address_book.clients["clientB"] = client.getsockname()
+
+    threading.Thread(target=asyncio.run, args=(router_host.serve(),), daemon=True).start()
+    assert router_host.ready.wait(10)
+
+    circuit = Circuit(CHAIN, {name: router_host.routers[name].public_key for name in CHAIN}, "clientB")
+    entry = ("127.0.0.1", router_host.routers["router1"].port)
+    with socket.create_connection(entry) as s:
+        assert request(s, circuit.create_message()) == b"OK"
+
+    # 1 Mo lu par morceaux, 8 cellules au plus en vol
+    data = os.urandom(1 << 20)
+    link = MuxLink(entry)
+    try:
+        count = send_stream(link, circuit.stream_cells(io.BytesIO(data)), window=8)
+    finally:
+        link.close()
+
+    assert count == len(data) // CELL_DATA_SIZE + 1
+    assert Sink.received == [data]
+    assert router_host.routers["router3"].messages == count + 1    # + CREATE
+    client.close()
+    print(f"[TEST] Fichier de 1 Mo relayé en {count} cellules OK")
+
+    print("===== FIN TEST FLUX SUR CIRCUIT =====\n")
+
+
+def test_flux_abandonnes():
+    Sink.received.clear()
+    receiver = StreamReceiver(lambda stream_id: Sink(), idle_timeout=0.2, max_streams=2)
+
+    def first_cell(stream_id):
+        return pack_delivery(pack_stream_data(stream_id, 0, stream_id))
+
+    # Deux flux commencés puis abandonnés par l'émetteur ; un troisième est refusé
+    assert not receiver.feed(first_cell(b"AAAA"))
+    assert not receiver.feed(first_cell(b"BBBB"))
+    try:
+        receiver.feed(first_cell(b"CCCC"))
+        assert False, "Flux de trop accepté"
+    except ValueError:
+        pass
+
+    # Après idle_timeout : fichiers fermés et flux oubliés, la place est libre
+    time.sleep(0.3)
+    assert not receiver.feed(first_cell(b"CCCC"))
+    assert sorted(Sink.received) == [b"AAAA", b"BBBB"]
+    assert receiver.expired == {b"AAAA": 4, b"BBBB": 4}
+    assert list(receiver._streams) == [b"CCCC"]
+
+    time.sleep(0.3)
+    assert receiver.expire_idle() == 1 and not receiver._streams
+    print("[TEST] Flux abandonnés fermés + limite de flux OK")
+
+
+if __name__ == "__main__":
+    from conftest import without_master
+
+    with without_master():
+        test_cellules_et_fenetre()
+        test_fichier_sur_circuit()
+        test_flux_abandonnes()
@@ -0,0 +1,79 @@
+import sys
+import os
+import time
+
+# Pour pouvoir importer src/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.router.supervisor import RouterSupervisor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Faux routeur : ouvre son port, annonce READY puis attend
+FAKE_ROUTER = (
+    "import sys, socket, time\n"
+    f"sys.path.insert(0, {ROOT!r})\n"
+    "from src.router.supervisor import notify_ready\n"
+    "s = socket.socket(); s.bind((sys.argv[2], 0)); s.listen()\n"
+    "notify_ready(sys.argv[1], s.getsockname()[1], True)\n"
+    "time.sleep(60)\n"
+)
+
+
+def fake_command(name, host, port):
+    return [sys.executable, "-c", FAKE_ROUTER, name, host]
+
+
+def test_lancement_parallele():
+    supervisor = RouterSupervisor(command=fake_command, ready_timeout=20)
+    try:
+        start = time.monotonic()
+        assert supervisor.start(8) == []
+        assert supervisor.running == [f"router{i}" for i in range(1, 9)]
+        print(f"[TEST] 8 routeurs prêts en {time.monotonic() - start:.2f} s")
+
+        # Réduction puis augmentation à chaud
+        supervisor.scale(3)
+        assert supervisor.running == ["router1", "router2", "router3"]
+        assert supervisor.scale(5) == []
+        assert supervisor.running == [f"router{i}" for i in range(1, 6)]
+    finally:
+        supervisor.stop_all()
+
+    assert supervisor.running == []
+    print("[TEST] Lancement parallèle + mise à l'échelle OK")
+
+
+def test_relance():
+    supervisor = RouterSupervisor(command=fake_command, ready_timeout=20)
+    try:
+        supervisor.start(2)
+        first = supervisor.processes["router2"]
+
+        # Plantage simulé : le superviseur relance le routeur
+        first.kill()
+        deadline = time.monotonic() + 20
+        while supervisor.processes.get("router2") is first and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+        assert supervisor.processes["router2"] is not first
+        assert supervisor.ready["router2"].wait(20)
+        assert supervisor.restarts["router2"] == 1
+    finally:
+        supervisor.stop_all()
+
+    print("[TEST] Relance d'un routeur planté OK")
+
+
+def test_taille_des_cles():
+    # Commande par défaut : nom hôte port workers_déchiffrement bits_clé
+    supervisor = RouterSupervisor(key_bits=64)
+    assert supervisor.command("router1", "127.0.0.1", 8001)[-5:] == ["router1", "127.0.0.1", "8001", "0", "64"]
+    assert RouterSupervisor().command("router1", "127.0.0.1", 8001)[-1] == "8001"
+    print("[TEST] Taille des clés transmise aux routeurs OK")
+
+
+if __name__ == "__main__":
+    test_lancement_parallele()
+    test_relance()
+    test_taille_des_cles()